@@ -0,0 +1,148 @@
+# adaptive_timeout.py
+
+import argparse
+import json
+import math
+import os
+import threading
+import time
+from colorama import Fore, Style
+
+LATENCY_HISTORY = ".aipycraft_latency.jsonl"
+
+# Per operation: timeout used until enough durations are known, floor and ceiling (seconds).
+# The defaults are the fixed timeouts tester.py used (wait time + TIMEOUT_SECONDS); the install
+# timeout is the one of scenario_runner.py, and never goes below it since package downloads vary a lot.
+OPERATION_LIMITS = {
+    "correct_component": {"default": 80, "floor": 30, "ceiling": 900},
+    "run": {"default": 70, "floor": 70, "ceiling": 900},
+    "install": {"default": 900, "floor": 900, "ceiling": 1800},
+}
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of a non-empty list (fraction in 0..1).
+    """
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+class AdaptiveTimeouts:
+    """
+    Timeouts derived from the durations of past operations (AI correction, solution run, install).
+
+    Every finished operation appends its duration to a JSON-lines history shared by all test
+    runs started from the same directory. The timeout of an operation is a high percentile of
+    its last `window` durations times `factor`, kept between the floor and ceiling of the
+    operation; with fewer than `min_samples` durations the operation default is used. Timed-out
+    operations are recorded with the timeout as duration, so false timeouts raise the next
+    timeout. Each decision is appended to the history as well, for auditing.
+    """
+
+    def __init__(self, history_path=LATENCY_HISTORY, quantile=0.95, factor=1.5, window=50, min_samples=5,
+                 limits=None):
+        self.history_path = history_path
+        self.quantile = quantile
+        self.factor = factor
+        self.window = window
+        self.min_samples = min_samples
+        self.limits = {**OPERATION_LIMITS, **(limits or {})}
+        self.lock = threading.Lock()
+
+    def _append(self, record):
+        line = json.dumps({"time": time.time(), **record}) + "\n"
+        with self.lock:
+            # One small append per record: concurrent trials writing the same history do not interleave
+            with open(self.history_path, "a", encoding="utf-8") as file:
+                file.write(line)
+
+    def records(self, kind=None):
+        records = []
+        try:
+            with open(self.history_path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Partial line of a writer that was killed
+                    if kind is None or record.get("kind") == kind:
+                        records.append(record)
+        except OSError:
+            pass
+        return records
+
+    def durations(self, operation):
+        """
+        Returns the last `window` recorded durations of an operation, oldest first.
+        """
+        durations = [r["duration"] for r in self.records("duration") if r.get("operation") == operation]
+        return durations[-self.window:]
+
+    def record(self, operation, duration, status="SUCCESS"):
+        self._append({"kind": "duration", "operation": operation, "duration": round(duration, 3), "status": status})
+
+    def derive(self, operation, durations):
+        """
+        Returns the timeout for `durations` of an operation and the decision details:
+        the reason (default, adaptive, floor or ceiling) and the percentile it is based on.
+        """
+        limits = self.limits[operation]
+        if len(durations) < self.min_samples:
+            return float(limits["default"]), {"reason": "default"}
+        observed = percentile(durations, self.quantile)
+        timeout = float(min(max(observed * self.factor, limits["floor"]), limits["ceiling"]))
+        reason = {limits["floor"]: "floor", limits["ceiling"]: "ceiling"}.get(timeout, "adaptive")
+        return timeout, {"reason": reason, "percentile": observed}
+
+    def timeout(self, operation, context=None):
+        """
+        Decides the timeout of the next `operation` and logs the decision.
+
+        Returns:
+            float: Timeout in seconds.
+        """
+        durations = self.durations(operation)
+        timeout, details = self.derive(operation, durations)
+        decision = {"kind": "timeout", "operation": operation, "samples": len(durations), **details,
+                    "timeout": round(timeout, 1), "quantile": self.quantile, "factor": self.factor}
+        if context:
+            decision["context"] = context
+        self._append(decision)
+        detail = f"p{int(self.quantile * 100)}={decision['percentile']:.1f}s x {self.factor}" if "percentile" in decision \
+            else f"{len(durations)} sample(s)"
+        print(Style.DIM + f"TIMEOUT: {operation} -> {timeout:.1f}s ({decision['reason']}, {detail})" + Style.RESET_ALL)
+        return timeout
+
+    def summary(self):
+        """
+        Returns per operation: number of durations, median, percentile and the next timeout
+        (without logging a decision).
+        """
+        rows = {}
+        for operation in self.limits:
+            durations = self.durations(operation)
+            row = {"samples": len(durations), "timeout": self.derive(operation, durations)[0]}
+            if durations:
+                row.update(median=percentile(durations, 0.5), percentile=percentile(durations, self.quantile))
+            rows[operation] = row
+        return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the operation durations and the adaptive timeouts derived from them.")
+    parser.add_argument("--history", default=LATENCY_HISTORY, help=f"Duration history file (default: {LATENCY_HISTORY}).")
+    parser.add_argument("--decisions", type=int, default=0, help="Also list the last N timeout decisions.")
+    args = parser.parse_args()
+
+    timeouts = AdaptiveTimeouts(args.history)
+    if not os.path.exists(args.history):
+        print(Fore.YELLOW + f"No history in {args.history} yet: the default timeouts are used." + Style.RESET_ALL)
+    for operation, row in timeouts.summary().items():
+        stats = f", median {row['median']:.1f}s, p{int(timeouts.quantile * 100)} {row['percentile']:.1f}s" if row["samples"] else ""
+        print(Fore.GREEN + f"- {operation}: {row['samples']} duration(s){stats}, next timeout {row['timeout']:.1f}s" + Style.RESET_ALL)
+    for decision in timeouts.records("timeout")[-args.decisions:] if args.decisions else []:
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(decision["time"]))
+        print(f"{when} {decision['operation']}: {decision['timeout']}s ({decision['reason']}, {decision['samples']} sample(s))"
+              + (f" [{decision['context']}]" if decision.get("context") else ""))
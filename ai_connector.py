@@ -1,4 +1,5 @@
 import os
+import time
 import openai
 import google.generativeai as genai
 # Removed: import anthropic
@@ -6,6 +7,7 @@ from dotenv import load_dotenv
 from decision import Decision # Import the new Decision class
 import concurrent.futures # For parallel API calls
 from typing import Callable, Tuple, Optional, Dict # For type hinting
+import event_stream
 
 class AIConnector:
     def __init__(self):
@@ -44,6 +46,7 @@ class AIConnector:
              raise RuntimeError("OpenAI API key is not configured.")
         try:
             print(f"{' ' * 20}Calling OpenAI model: {model_name}") # Log model name
+            start = time.perf_counter()
             response = openai.ChatCompletion.create(
                 model=model_name,            # Use variable
                 messages=[
@@ -54,6 +57,9 @@ class AIConnector:
                 max_tokens=8192,  # Adjust as needed
                 n=1
             )
+            usage = response.get("usage", {})
+            event_stream.record_tokens(model_name, usage.get("prompt_tokens"), usage.get("completion_tokens"),
+                                       time.perf_counter() - start)
 
             answer = response.choices[0].message["content"]
             return answer.strip()
@@ -97,12 +103,16 @@ class AIConnector:
                 {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
             ]
 
+            start = time.perf_counter()
             response = model.generate_content(
                 full_prompt,
                 generation_config=generation_config,
                 safety_settings=safety_settings
                 # stream=False # Set to True for streaming responses
             )
+            usage = getattr(response, 'usage_metadata', None)
+            event_stream.record_tokens(model_identifier, getattr(usage, 'prompt_token_count', None),
+                                       getattr(usage, 'candidates_token_count', None), time.perf_counter() - start)
 
             # Handle potential blocks or lack of content
             if not response.candidates:
@@ -144,6 +154,7 @@ class AIConnector:
              raise RuntimeError("OpenAI API key is not configured.")
         try:
             print(f"{' ' * 20}Calling OpenAI model: {model_name}") # Log model name
+            start = time.perf_counter()
             response = openai.ChatCompletion.create(
                 model=model_name, # Use variable
                 messages=[
@@ -154,6 +165,9 @@ class AIConnector:
                 max_tokens=4096, # Adjust if needed for GPT-3.5
                 n=1
             )
+            usage = response.get("usage", {})
+            event_stream.record_tokens(model_name, usage.get("prompt_tokens"), usage.get("completion_tokens"),
+                                       time.perf_counter() - start)
             answer = response.choices[0].message["content"]
             return answer.strip()
         except openai.OpenAIError as e:
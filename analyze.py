@@ -0,0 +1,384 @@
+# analyze.py
+
+import argparse
+import csv
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from collections import Counter
+import numpy as np
+import toml
+from colorama import Fore, Style
+from cumulative_stats import cumulative_mean_ci, CI_METHODS, BOOTSTRAP_RESAMPLES
+from log_index import LOG_DIR, ANSI_ESCAPE, open_index, outcome_from_state, duration_from_state
+
+PLOT_DIR = "plots"
+TOP_ERROR_CATEGORIES = 10
+COLORS = ["dodgerblue", "darkorange", "forestgreen", "crimson", "mediumpurple", "saddlebrown", "deeppink", "gray"]
+
+EXCEPTION_PATTERN = re.compile(r"\b(?:[A-Za-z_]\w*\.)*([A-Za-z_]\w*(?:Error|Exception|Exit|Interrupt))\b")
+QUOTED_PATTERN = re.compile(r"'[^']*'|\"[^\"]*\"")
+HEX_PATTERN = re.compile(r"\b0x[0-9a-fA-F]+\b")
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+
+class AnalysisError(Exception):
+    """
+    Raised for invalid experiment definitions and missing log folders.
+    """
+
+
+def parse_runs(runs):
+    """
+    Parses a run id selection such as "1-20" or "1-10,15,21-25".
+
+    Returns:
+        list[int]: Run ids in order.
+    """
+    run_ids = []
+    for part in str(runs).split(","):
+        bounds = part.strip().split("-")
+        try:
+            first, last = int(bounds[0]), int(bounds[-1])
+        except ValueError:
+            raise AnalysisError(f"Invalid run selection '{runs}' (expected e.g. '1-20' or '1-10,15').")
+        if len(bounds) > 2 or last < first:
+            raise AnalysisError(f"Invalid run range '{part.strip()}' in '{runs}'.")
+        run_ids.extend(range(first, last + 1))
+    return run_ids
+
+
+def load_experiments(config_path):
+    """
+    Loads the experiments of a TOML file: one [[experiments]] table per experiment with `name`,
+    and optionally `solution` (default: the name), `log_dir` (default: logs) and `runs`
+    (e.g. "1-20", default: every run id found in the log folder).
+    """
+    try:
+        config = toml.load(config_path)
+    except (OSError, toml.TomlDecodeError) as e:
+        raise AnalysisError(f"Cannot read experiment file {config_path}: {e}")
+    experiments = []
+    for entry in config.get("experiments", []):
+        if "name" not in entry:
+            raise AnalysisError(f"{config_path}: every [[experiments]] entry needs a name.")
+        experiments.append(experiment(entry["name"], entry.get("solution"), entry.get("log_dir", LOG_DIR), entry.get("runs")))
+    return experiments
+
+
+def experiment(name, solution=None, log_dir=LOG_DIR, runs=None):
+    return {"name": name, "solution": solution or name, "log_dir": log_dir,
+            "runs": parse_runs(runs) if runs else None}
+
+
+def parse_experiment_argument(value, trials):
+    """
+    Parses a command-line experiment, SOLUTION or SOLUTION=LOG_DIR, analyzing runs 1..trials if given.
+    """
+    solution, _, log_dir = value.partition("=")
+    return experiment(solution, solution, log_dir or LOG_DIR, f"1-{trials}" if trials else None)
+
+
+def error_category(error_line):
+    """
+    Category of the first output line of a failed run: the exception class it names if any,
+    otherwise the line with numbers, quoted strings and addresses replaced by placeholders.
+    """
+    text = ANSI_ESCAPE.sub("", error_line).strip()
+    match = EXCEPTION_PATTERN.search(text)
+    if match:
+        return match.group(1)
+    text = QUOTED_PATTERN.sub("<str>", text)
+    text = HEX_PATTERN.sub("<hex>", text)
+    text = NUMBER_PATTERN.sub("<n>", text)
+    return " ".join(text.split())[:80]
+
+
+def summarize(values):
+    """
+    Count, mean with its 95% t interval, median, min and max of a list of values (None when empty).
+    """
+    if not values:
+        return {"count": 0, "mean": None, "ci_low": None, "ci_high": None, "median": None, "min": None, "max": None}
+    means, lowers, uppers = cumulative_mean_ci(values)
+    low, high = (None, None) if np.isnan(lowers[-1]) else (float(lowers[-1]), float(uppers[-1]))
+    return {"count": len(values), "mean": float(means[-1]), "ci_low": low, "ci_high": high,
+            "median": statistics.median(values), "min": min(values), "max": max(values)}
+
+
+class Analysis:
+    """
+    Metrics of several experiments (a solution, a log folder and the run ids of its trials)
+    computed in one process: the index of each log folder is updated and read once, however
+    many experiments use it.
+    """
+
+    def __init__(self, experiments, jobs=1, ci_method="t", resamples=BOOTSTRAP_RESAMPLES):
+        self.experiments = experiments
+        self.jobs = jobs
+        self.ci_method = ci_method
+        self.resamples = resamples
+        self.log_data = {}  # log folder -> latest logs, scanner states and errors per solution
+
+    def _load(self, log_dir, solution):
+        if log_dir not in self.log_data:
+            if not os.path.isdir(log_dir):
+                raise AnalysisError(f"Log folder not found: {log_dir}")
+            index = open_index(log_dir, jobs=self.jobs)
+            self.log_data[log_dir] = {"index": index, "errors": {},
+                                      "tester": index.latest_logs("tester"), "main": index.latest_logs("main"),
+                                      "states": {**index.states("tester"), **index.states("main")}}
+        data = self.log_data[log_dir]
+        if solution not in data["errors"]:
+            data["errors"][solution] = data["index"].all_errors(solution)
+        return data
+
+    def close(self):
+        for data in self.log_data.values():
+            data["index"].close()
+
+    def analyze(self, experiment):
+        """
+        Returns the per-trial results and metrics of one experiment.
+        """
+        data = self._load(experiment["log_dir"], experiment["solution"])
+        run_ids = experiment["runs"] or sorted(data["tester"])
+        trials = []
+        categories = Counter()
+        category_trials = {}
+        category_examples = {}
+        for trial, run_id in enumerate(run_ids, 1):
+            tester_log = data["tester"].get(run_id)
+            result = {"trial": trial, "run_id": run_id, "log": tester_log, "iterations": None,
+                      "failure": None, "duration": None, "errors": 0}
+            trials.append(result)
+            if not tester_log:
+                result["failure"] = "Log file not found"
+                continue
+            iterations, error_msg = outcome_from_state(tester_log, data["states"].get(tester_log))
+            if iterations >= 0:
+                result["iterations"] = iterations
+                main_log = data["main"].get(run_id)
+                duration = duration_from_state(main_log, data["states"].get(main_log)) if main_log else -1.0
+                result["duration"] = duration if duration >= 0 else None
+            else:
+                result["failure"] = error_msg
+            errors = data["errors"][experiment["solution"]].get(tester_log, [])
+            result["errors"] = len(errors)
+            for error_line, _ in errors:
+                category = error_category(error_line)
+                categories[category] += 1
+                category_trials.setdefault(category, set()).add(trial)
+                category_examples.setdefault(category, error_line)
+
+        iterations = [t["iterations"] for t in trials if t["iterations"] is not None]
+        durations = [t["duration"] for t in trials if t["duration"] is not None]
+        found = sum(1 for t in trials if t["log"])
+        return {
+            **{key: experiment[key] for key in ("name", "solution", "log_dir")},
+            "trials": len(trials), "logs_found": found, "successes": len(iterations),
+            "failures": found - len(iterations),
+            "success_rate": len(iterations) / found if found else None,
+            "iterations": summarize(iterations),
+            "duration": summarize(durations),
+            "duration_errors": len(iterations) - len(durations),
+            "error_runs": sum(categories.values()),
+            "error_categories": [{"category": category, "count": count, "trials": len(category_trials[category]),
+                                  "example": category_examples[category]}
+                                 for category, count in categories.most_common()],
+            "per_trial": trials,
+        }
+
+    def run(self):
+        return [self.analyze(experiment) for experiment in self.experiments]
+
+    def cumulative_series(self, results, metric):
+        """
+        Running mean and CI of a metric over the trials of an experiment, as the plot scripts draw it:
+        iterations from the first success on (a failed trial repeats the previous statistics),
+        durations at the successful trials with a duration.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Trial numbers, means, lower and upper bounds.
+        """
+        trial_numbers = np.array([t["trial"] for t in results["per_trial"]])
+        values = np.array([np.nan if t[metric] is None else t[metric] for t in results["per_trial"]], dtype=float)
+        counted = ~np.isnan(values)
+        means, lowers, uppers = cumulative_mean_ci(values[counted], method=self.ci_method, resamples=self.resamples)
+        if metric != "iterations":
+            return trial_numbers[counted], means, lowers, uppers
+        counted_so_far = np.cumsum(counted) - 1
+        plotted = counted_so_far >= 0
+        positions = counted_so_far[plotted]
+        return trial_numbers[plotted], means[positions], lowers[positions], uppers[positions]
+
+
+def render_figures(analysis, results, output_dir, tag):
+    """
+    Writes the overlaid comparison figures: cumulative iterations to success, cumulative total
+    time (mean line in its CI band per experiment) and the most frequent error categories.
+
+    Returns:
+        list[str]: Paths of the figures written.
+    """
+    # Imported only when figures are rendered, with a non-interactive backend (no display needed)
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import matplotlib.ticker as ticker
+
+    ci_label = f'95% {"bootstrap " if analysis.ci_method == "bootstrap" else ""}CI'
+    paths = []
+    for metric, ylabel, prefix in (("iterations", "Iterations to Success", "compare-iterations"),
+                                   ("duration", "Total Test Duration (s)", "compare-time")):
+        figure, axes = plt.subplots(figsize=(5, 3))
+        for number, result in enumerate(results):
+            x_values, means, lowers, uppers = analysis.cumulative_series(result, metric)
+            if len(x_values) == 0:
+                continue
+            color = COLORS[number % len(COLORS)]
+            axes.fill_between(x_values, lowers, uppers, color=color, alpha=0.2, linewidth=0)
+            axes.plot(x_values, means, color=color, linewidth=1.5, marker='o' if len(x_values) <= 30 else None,
+                      markersize=3, label=f"{result['name']} (failed: {result['failures']})")
+        axes.set_xlabel("Trial Number", fontsize=12)
+        axes.set_ylabel(ylabel, fontsize=12)
+        axes.set_title(f"Cumulative mean ({ci_label})", fontsize=11)
+        axes.xaxis.set_major_locator(ticker.MaxNLocator(integer=True))
+        axes.tick_params(labelsize=11)
+        axes.grid(axis='y', linestyle='--', alpha=0.7)
+        axes.set_ylim(bottom=0)
+        if axes.get_legend_handles_labels()[0]:
+            axes.legend(fontsize=9)
+        figure.tight_layout(pad=1.5)
+        paths.append(os.path.join(output_dir, f"{prefix}-{tag}.pdf"))
+        figure.savefig(paths[-1], format='pdf')
+        plt.close(figure)
+
+    # Error taxonomy: the most frequent categories over all experiments, one bar per experiment
+    totals = Counter()
+    for result in results:
+        totals.update({entry["category"]: entry["count"] for entry in result["error_categories"]})
+    categories = [category for category, _ in totals.most_common(TOP_ERROR_CATEGORIES)]
+    figure, axes = plt.subplots(figsize=(7, 1.5 + 0.45 * max(len(categories), 3)))
+    height = 0.8 / len(results)
+    positions = np.arange(len(categories))
+    for number, result in enumerate(results):
+        counts = {entry["category"]: entry["count"] for entry in result["error_categories"]}
+        axes.barh(positions + number * height, [counts.get(category, 0) for category in categories], height=height,
+                  color=COLORS[number % len(COLORS)], label=result["name"])
+    axes.set_yticks(positions + height * (len(results) - 1) / 2)
+    axes.set_yticklabels([category if len(category) <= 50 else category[:47] + "..." for category in categories], fontsize=8)
+    axes.invert_yaxis()  # Most frequent category on top
+    axes.set_xlabel("Failed runs", fontsize=12)
+    axes.xaxis.set_major_locator(ticker.MaxNLocator(integer=True))
+    axes.grid(axis='x', linestyle='--', alpha=0.7)
+    if categories:
+        axes.legend(fontsize=9, loc='lower right')  # Below the most frequent (longest) bars
+    else:
+        axes.text(0.5, 0.5, "No failed runs", ha='center', va='center', transform=axes.transAxes)
+    figure.tight_layout(pad=1.5)
+    paths.append(os.path.join(output_dir, f"compare-errors-{tag}.pdf"))
+    figure.savefig(paths[-1], format='pdf')
+    plt.close(figure)
+    return paths
+
+
+def summary_rows(results):
+    """
+    One flat row per experiment for the CSV summary.
+    """
+    rows = []
+    for result in results:
+        row = {key: result[key] for key in ("name", "solution", "log_dir", "trials", "logs_found", "successes",
+                                            "failures", "success_rate", "duration_errors", "error_runs")}
+        for metric in ("iterations", "duration"):
+            row.update({f"{metric}_{key}": value for key, value in result[metric].items() if key != "count"})
+        row["error_categories"] = len(result["error_categories"])
+        row["top_error"] = result["error_categories"][0]["category"] if result["error_categories"] else ""
+        rows.append(row)
+    return rows
+
+
+def write_summary(results, output_dir, tag, ci_method):
+    """
+    Writes analysis-<tag>.json (metrics, error taxonomy and per-trial results) and analysis-<tag>.csv
+    (one row of metrics per experiment).
+
+    Returns:
+        list[str]: Paths of the files written.
+    """
+    json_path = os.path.join(output_dir, f"analysis-{tag}.json")
+    with open(json_path, "w", encoding="utf-8") as file:
+        json.dump({"generated": time.strftime("%Y-%m-%d %H:%M:%S"), "ci_method": ci_method, "experiments": results},
+                  file, indent=2)
+    csv_path = os.path.join(output_dir, f"analysis-{tag}.csv")
+    rows = summary_rows(results)
+    with open(csv_path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return [json_path, csv_path]
+
+
+def print_results(results):
+    def fmt(value, unit=""):
+        return "-" if value is None else f"{value:.2f}{unit}"
+    for result in results:
+        iterations, duration = result["iterations"], result["duration"]
+        print(Fore.CYAN + f"\n--- {result['name']} (solution '{result['solution']}', {result['log_dir']}) ---" + Style.RESET_ALL)
+        print(f"Trials: {result['trials']}, logs found: {result['logs_found']}, successful: {result['successes']}, failed: {result['failures']}")
+        print(f"Iterations to success: mean {fmt(iterations['mean'])} (95% CI {fmt(iterations['ci_low'])}-{fmt(iterations['ci_high'])}), "
+              f"median {fmt(iterations['median'])}, min {fmt(iterations['min'])}, max {fmt(iterations['max'])}")
+        print(f"Total test duration: mean {fmt(duration['mean'], 's')} (95% CI {fmt(duration['ci_low'], 's')}-{fmt(duration['ci_high'], 's')}), "
+              f"median {fmt(duration['median'], 's')} over {duration['count']} trial(s), {result['duration_errors']} without duration")
+        print(f"Failed runs with an error output: {result['error_runs']} in {len(result['error_categories'])} categories")
+        for entry in result["error_categories"][:5]:
+            print(f"  {entry['count']:>5} x {entry['category']} ({entry['trials']} trial(s))")
+
+
+def main(experiments, output_dir=PLOT_DIR, jobs=1, ci_method="t", resamples=BOOTSTRAP_RESAMPLES, plots=True):
+    """
+    Analyzes several experiments in one pass and writes the comparison figures and the summary.
+    """
+    analysis = Analysis(experiments, jobs=jobs, ci_method=ci_method, resamples=resamples)
+    try:
+        results = analysis.run()
+    finally:
+        analysis.close()
+    print_results(results)
+
+    os.makedirs(output_dir, exist_ok=True)
+    tag = "-".join(re.sub(r"[^\w.-]", "_", e["name"]) for e in experiments)
+    written = write_summary(results, output_dir, tag, ci_method)
+    if plots:
+        written += render_figures(analysis, results, output_dir, tag)
+    print(Fore.GREEN + "\nWritten: " + ", ".join(written) + Style.RESET_ALL)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the test logs of several solutions or experiments in one pass: "
+                                                 "iterations to success, total time and error taxonomy.")
+    parser.add_argument("experiments", nargs="*", metavar="SOLUTION[=LOG_DIR]",
+                        help=f"Solution whose trials are in LOG_DIR (default: {LOG_DIR}).")
+    parser.add_argument("--config", help="TOML file with [[experiments]] entries (name, solution, log_dir, runs).")
+    parser.add_argument("-Trials", type=int, default=None, help="Analyze runs 1..Trials of the command-line experiments (default: all runs found).")
+    parser.add_argument("--output-dir", default=PLOT_DIR, help=f"Folder of the figures and the summary (default: {PLOT_DIR}).")
+    parser.add_argument("--no-plots", action="store_true", help="Write only the CSV/JSON summary (matplotlib is not imported).")
+    parser.add_argument("--jobs", type=int, default=1, help="Processes indexing the logs (default: 1).")
+    parser.add_argument("--ci", choices=CI_METHODS, default="t", help="Confidence interval method of the figures: Student t (default) or percentile bootstrap.")
+    parser.add_argument("--bootstrap-resamples", type=int, default=BOOTSTRAP_RESAMPLES, help=f"Resamples of the bootstrap intervals (default: {BOOTSTRAP_RESAMPLES}).")
+    args = parser.parse_args()
+
+    try:
+        experiments = load_experiments(args.config) if args.config else []
+        experiments += [parse_experiment_argument(value, args.Trials) for value in args.experiments]
+        if not experiments:
+            parser.error("Give at least one experiment (SOLUTION[=LOG_DIR]) or --config.")
+        main(experiments, args.output_dir, args.jobs, args.ci, args.bootstrap_resamples, plots=not args.no_plots)
+    except AnalysisError as e:
+        print(Fore.RED + f"Error: {e}" + Style.RESET_ALL)
+        sys.exit(2)
@@ -0,0 +1,199 @@
+# bench_log_parsers.py
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+ANSI_ESCAPE_PATTERN = r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])'
+
+
+def write_synthetic_logs(folder, size_mb):
+    """
+    Writes a tester log and a main.py log of about size_mb each, made of correction loop
+    iterations with colored main.py output, failing runs and a final successful run.
+
+    Returns:
+        tuple[str, str]: Paths of the tester log and the main log.
+    """
+    # Separate folders, so the index scan of the tester log folder reads only the tester log
+    tester_path = os.path.join(folder, "tester_logs", "tester_run_20250101_000000_run1.log")
+    main_path = os.path.join(folder, "main_logs", "AIPyCraft_main_20250101_000000_run1.log")
+    for path in (tester_path, main_path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    target = size_mb * 1024 * 1024
+    output_lines = "".join(f"\x1b[37mjob {n}: processing record batch with payload {'x' * 60}\x1b[0m\n" for n in range(40))
+
+    with open(tester_path, "w", encoding="utf-8") as tester_log, open(main_path, "w", encoding="utf-8") as main_log:
+        tester_log.write("2025-01-01 00:00:00,000 [INFO] AIPyCraft logging configured.\n")
+        main_log.write("2025-01-01 00:00:00,000 [INFO] AIPyCraft logging configured.\n")
+        iteration = 0
+        while tester_log.tell() < target:
+            iteration += 1
+            tester_log.write(f"\n--- Starting Correction Loop Iteration {iteration}/1000000 ---\n"
+                             "This is the output of the solution main.py run:\n\n"
+                             f"Error creating job: 422 - invalid job type (iteration {iteration})\n{output_lines}"
+                             "\x1b[95m\nSolution completed with status: ERROR\n\x1b[0m\n"
+                             "Solution 'toml1' completed with status: ERROR\n")
+            main_log.write(f"2025-01-01 00:00:{iteration % 60:02d},000 [INFO] Running solution: toml1\n{output_lines}")
+        tester_log.write(f"\n--- Starting Correction Loop Iteration {iteration + 1}/1000000 ---\n"
+                         "This is the output of the solution main.py run:\n\nok\n"
+                         "\x1b[95m\nSolution completed with status: SUCCESS\n\x1b[0m\n"
+                         "2025-01-01 01:00:00,000 [INFO] Program ended.\n")
+        main_log.write("2025-01-01 01:00:00,000 [INFO] Program ended.\n")
+    return tester_path, main_path
+
+
+# --- Previous implementations (whole file in memory), kept as the baseline ---
+
+def readlines_outcome(log_filepath):
+    import re
+    loop_pattern = re.compile(r"--- Starting Correction Loop Iteration (\d+)/(\d+) ---")
+    ansi_escape = re.compile(ANSI_ESCAPE_PATTERN)
+    with open(log_filepath, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    last_success_index = last_error_index = -1
+    for idx, line in enumerate(lines):
+        cleaned_line = ansi_escape.sub('', line).strip()
+        if cleaned_line.endswith("Solution completed with status: SUCCESS"):
+            last_success_index = idx
+        elif cleaned_line.endswith("Solution completed with status: ERROR"):
+            last_error_index = idx
+    if last_success_index > last_error_index:
+        for i in range(last_success_index - 1, -1, -1):
+            loop_match = loop_pattern.search(lines[i])
+            if loop_match:
+                return (int(loop_match.group(1)), None)
+        return (0, None)
+    return (-1, "Completed with status: ERROR" if last_error_index != -1 else "SUCCESS/ERROR status not found")
+
+
+def readlines_duration(log_filepath):
+    import re
+    from datetime import datetime
+    pattern = re.compile(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3})")
+    with open(log_filepath, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    first = datetime.strptime(pattern.match(lines[0]).group(1), "%Y-%m-%d %H:%M:%S,%f")
+    for line in reversed(lines):
+        match = pattern.match(line)
+        if match:
+            return (datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S,%f") - first).total_seconds()
+    return -1.0
+
+
+def index_scan(log_filepath):
+    from log_index import LogIndex
+    index_path = os.path.join(tempfile.mkdtemp(), "index.sqlite")
+    index = LogIndex(os.path.dirname(log_filepath), index_path)
+    index.update(rebuild=True)
+    outcome = index.tester_outcome(log_filepath)
+    index.close()
+    shutil.rmtree(os.path.dirname(index_path))
+    return outcome
+
+
+def reverse_outcome(log_filepath):
+    from plot_interactions_to_success import parse_log_file
+    return parse_log_file(log_filepath, "toml1", 0)
+
+
+def streaming_errors(log_filepath):
+    from result import extract_errors_from_log
+    return len(extract_errors_from_log(log_filepath, "toml1"))
+
+
+def reverse_duration(log_filepath):
+    from plot_total_test_time import parse_log_for_duration
+    return parse_log_for_duration(log_filepath)
+
+
+# name: (log parsed, parser, modules imported before measuring)
+PARSERS = {
+    "outcome_readlines": ("tester", readlines_outcome, []),
+    "outcome_reverse": ("tester", reverse_outcome, ["plot_interactions_to_success"]),
+    "errors_streaming": ("tester", streaming_errors, ["result"]),
+    "index_full_scan": ("tester", index_scan, ["log_index"]),
+    "duration_readlines": ("main", readlines_duration, []),
+    "duration_reverse": ("main", reverse_duration, ["plot_total_test_time"]),
+}
+
+
+def peak_memory():
+    """
+    Peak resident memory of this process in bytes (ru_maxrss), or None where unavailable.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_worker(name, log_filepath):
+    """
+    Runs one parser in this (fresh) process and prints its time and memory growth as JSON.
+    """
+    _, parse, modules = PARSERS[name]
+    for module in modules:  # Imported before the baseline measurement
+        __import__(module)
+    tracing = peak_memory() is None
+    if tracing:
+        import tracemalloc
+        tracemalloc.start()
+    before = peak_memory() or 0
+    start = time.perf_counter()
+    result = parse(log_filepath)
+    seconds = time.perf_counter() - start
+    growth = tracemalloc.get_traced_memory()[1] if tracing else peak_memory() - before
+    print(json.dumps({"seconds": seconds, "memory": growth, "result": str(result)}))
+
+
+def benchmark(size_mb, folder, repeat):
+    tester_path, main_path = write_synthetic_logs(folder, size_mb)
+    paths = {"tester": tester_path, "main": main_path}
+    print(f"Synthetic logs: tester {os.path.getsize(tester_path) / 1e6:.0f} MB, main {os.path.getsize(main_path) / 1e6:.0f} MB\n")
+    # MB/s is the log size over the time: the reverse parsers only read the tail of the log
+    print(f"{'parser':<20} {'seconds':>9} {'MB/s':>9} {'peak memory growth':>20}  result")
+    for name, (kind, _, _) in PARSERS.items():
+        size = os.path.getsize(paths[kind])
+        best = None
+        for _ in range(repeat):
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", name, paths[kind]],
+                                    capture_output=True, text=True, cwd=REPO_DIR)
+            if output.returncode != 0:
+                print(f"{name:<20} failed: {output.stderr.strip().splitlines()[-1]}")
+                break
+            measure = json.loads(output.stdout.strip().splitlines()[-1])
+            if best is None or measure["seconds"] < best["seconds"]:
+                best = measure
+        if best:
+            print(f"{name:<20} {best['seconds']:>9.3f} {size / 1e6 / best['seconds']:>9.1f} "
+                  f"{best['memory'] / 1e6:>17.1f} MB  {best['result'][:40]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the log parsers on synthetic multi-hundred-MB logs (time and memory).")
+    parser.add_argument("--size-mb", type=int, default=300, help="Approximate size of each synthetic log (default: 300).")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per parser; the fastest is reported.")
+    parser.add_argument("--dir", default=None, help="Folder for the synthetic logs (default: a temporary folder, removed afterwards).")
+    parser.add_argument("--worker", nargs=2, metavar=("PARSER", "LOG"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(*args.worker)
+        sys.exit(0)
+    folder = args.dir or tempfile.mkdtemp(prefix="aipycraft_bench_")
+    try:
+        benchmark(args.size_mb, folder, args.repeat)
+    finally:
+        if not args.dir:
+            shutil.rmtree(folder, ignore_errors=True)
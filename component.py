@@ -1,5 +1,7 @@
 # component.py
 
+from execution_engine import ExecutionEngine
+
 class Component:
     def __init__(self, name, extension, content, semantic_description, language="python"):
         self.name = name
@@ -10,30 +12,23 @@ class Component:
         self.status = 'PENDING'
         self.result_description = ''
 
-    def execute(self):
-        try:
-            if self.language != "python":
-                # Skip execution for non-Python components
-                self.status = 'SKIPPED'
-                self.result_description = self._color_text(f"Execution skipped for non-Python component: {self.language}.", 'yellow')
-                return
-
-            # Execute Python code
-            exec(self.content, globals())
-
-            # Check if the component code has a main function
-            if 'main' in globals():
-                # Call the main function if it exists
-                main_func = globals()['main']
-                main_func()
+    def execute(self, engine=None, folder=None):
+        """
+        Executes the component in its own namespace inside a worker process.
+        """
+        engine = engine or ExecutionEngine.default()
+        status, error = engine.run([self], folder)[0]
+        self.apply_result(status, error)
 
-            # Update the component status and result description
-            self.status = 'SUCCESS'
+    def apply_result(self, status, error=None):
+        # Update the component status and result description from an engine result
+        self.status = status
+        if status == 'SKIPPED':
+            self.result_description = self._color_text(f"Execution skipped for non-Python component: {self.language}.", 'yellow')
+        elif status == 'SUCCESS':
             self.result_description = self._color_text('Python component executed successfully.', 'green')
-        except Exception as e:
-            # Handle any exceptions that occur during component execution
-            self.status = 'ERROR'
-            self.result_description = self._color_text(f"An error occurred during component execution: {str(e)}", 'orange')
+        else:
+            self.result_description = self._color_text(f"An error occurred during component execution: {error}", 'orange')
 
     def to_dict(self):
         # Convert the component object to a dictionary
@@ -1,13 +1,16 @@
 # solution_updater.py
 
-import os
 import re
 from colorama import Fore, Style
 from ai_connector import AIConnector
+from solution_snapshot import SolutionSnapshot
+from version_store import VersionStore
+from component_persistence import ComponentPersistence
 
 class ComponentCorrector:
     def __init__(self):
         self.ai_connector = AIConnector()
+        self.snapshot = SolutionSnapshot()
 
     def update_solution(self, solution, component_name, user_prompt=""):
         """
@@ -17,13 +20,16 @@ class ComponentCorrector:
             solution: The solution object containing components and metadata.
             component_name: The name of the component file to correct (e.g., "main.py").
             user_prompt (str, optional): Additional instructions from the user. Defaults to "".
+
+        Returns:
+            bool: True if the component file was rewritten.
         """
         # Find the component to correct.
         comp_to_correct = next((c for c in solution.components if f"{c.name}.{c.extension}" == component_name), None)
 
         if not comp_to_correct:
             print(Fore.RED + f"Error: Component '{component_name}' not found in the solution." + Style.RESET_ALL)
-            return
+            return False
 
         # Create a context string with only the specific component's content.
         context = (
@@ -70,15 +76,18 @@ class ComponentCorrector:
         if content_match:
             # Strip leading/trailing whitespace from the captured block, but preserve internal indentation
             updated_content = content_match.group(1).strip()
-            file_path = os.path.join(solution.folder, f"{comp.name}.{comp.extension}")
             try:
-                with open(file_path, "w") as file:
-                    file.write(updated_content)
+                version_store = VersionStore(solution.folder)
+                version_store.begin_step(f"correct_component:{component_name}")
+                ComponentPersistence(solution.folder, version_store).write(component_name, updated_content)
                 comp.content = updated_content
+                self.snapshot.save(solution)
                 print(Fore.GREEN + Style.BRIGHT + f"Updated {comp.name}.{comp.extension} successfully." + Style.RESET_ALL)
+                return True
             except Exception as e:
                 print(Fore.RED + f"Error updating {comp.name}.{comp.extension}: {e}" + Style.RESET_ALL)
         elif response.strip() == "NO":
             print(Fore.CYAN + f"No changes needed for {comp.name}.{comp.extension}." + Style.RESET_ALL)
         else:
             print(Fore.MAGENTA + Style.DIM + f"No valid correction provided for {comp.name}.{comp.extension}." + Style.RESET_ALL)
+        return False
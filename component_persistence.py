@@ -0,0 +1,208 @@
+# component_persistence.py
+
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from file_utils import sha256_bytes
+import event_stream
+
+
+class ComponentPersistence:
+    """
+    Single write path for component files and model.txt of a solution.
+
+    - Content is always encoded as UTF-8.
+    - Writes whose content hash matches the file on disk are skipped.
+    - Files are replaced atomically through a temp file in the same folder and a rename.
+    - Inside batch() (or begin()/commit()), writes are staged and committed together;
+      rollback() discards them. Each file is fsynced before the renames, the folder after.
+      If a rename fails, the files already replaced get their previous contents back.
+    - When a VersionStore is given, every effective write is recorded as a revision.
+    """
+
+    def __init__(self, folder, version_store=None):
+        self.folder = folder
+        self.version_store = version_store
+        self._known_hashes = {}  # file_name -> (size, mtime_ns, sha256)
+        self._pending = None  # file_name -> bytes while a batch is open
+        self.stats = {"writes": 0, "skipped": 0, "bytes": 0, "commits": 0, "seconds": 0.0}
+
+    def _path(self, file_name):
+        return os.path.join(self.folder, file_name)
+
+    def _disk_hash(self, file_name):
+        file_path = self._path(file_name)
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        known = self._known_hashes.get(file_name)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+        with open(file_path, "rb") as file:
+            digest = sha256_bytes(file.read())
+        self._known_hashes[file_name] = (stat.st_size, stat.st_mtime_ns, digest)
+        return digest
+
+    def write(self, file_name, content):
+        """
+        Writes a component or model file unless its content is unchanged.
+
+        Returns:
+            bool: True if the file was (or, inside a batch, will be) written.
+        """
+        start = time.perf_counter()
+        data = content.encode("utf-8")
+        digest = sha256_bytes(data)
+
+        if self._pending is not None and file_name in self._pending:
+            current = sha256_bytes(self._pending[file_name])
+        else:
+            current = self._disk_hash(file_name)
+        if current == digest:
+            self.stats["skipped"] += 1
+            self.stats["seconds"] += time.perf_counter() - start
+            return False
+
+        if self.version_store is not None:
+            staged = self._pending is not None and file_name in self._pending
+            self.version_store.record(file_name, content, capture_disk=not staged, save_index=self._pending is None)
+
+        if self._pending is not None:
+            self._pending[file_name] = data
+        else:
+            self._commit({file_name: data})
+        self.stats["seconds"] += time.perf_counter() - start
+        return True
+
+    def begin(self):
+        """
+        Starts staging writes until commit() is called.
+        """
+        if self._pending is None:
+            self._pending = {}
+
+    def commit(self):
+        """
+        Writes every staged file and renames them into place. On failure no file is
+        changed, the staged writes are discarded and the error is raised.
+
+        Returns:
+            int: Number of files written.
+        """
+        pending = self._pending or {}
+        if not pending:
+            self._pending = None
+            return 0
+        start = time.perf_counter()
+        try:
+            self._commit(pending)
+        except BaseException:
+            self.rollback()
+            raise
+        self._pending = None
+        if self.version_store is not None:
+            self.version_store.save()
+        self.stats["seconds"] += time.perf_counter() - start
+        return len(pending)
+
+    @contextmanager
+    def batch(self):
+        """
+        Stages every write made inside the block and commits them together on exit.
+        Nothing is written if the block raises.
+        """
+        if self._pending is not None:
+            yield self
+            return
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def rollback(self):
+        """
+        Discards the staged writes, and the revisions recorded for them in the version store.
+        """
+        self._pending = None
+        if self.version_store is not None:
+            self.version_store.index = self.version_store._load_index()
+
+    def _commit(self, files):
+        os.makedirs(self.folder, exist_ok=True)
+        staged = []
+        previous = {}  # file_path -> bytes before the commit, None for a new file
+        replaced = []
+        try:
+            for file_name, data in files.items():
+                file_path = self._path(file_name)
+                fd, temp_path = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(file_path) or ".")
+                staged.append((temp_path, file_path, file_name, data))
+                with os.fdopen(fd, "wb") as temp_file:
+                    temp_file.write(data)
+                    temp_file.flush()
+                    os.fsync(temp_file.fileno())
+                try:
+                    mode = os.stat(file_path).st_mode & 0o777
+                    with open(file_path, "rb") as file:
+                        previous[file_path] = file.read()
+                except FileNotFoundError:
+                    mode = 0o644
+                    previous[file_path] = None
+                os.chmod(temp_path, mode)
+
+            for temp_path, file_path, _, _ in staged:
+                os.replace(temp_path, file_path)
+                replaced.append(file_path)
+        except BaseException:
+            for temp_path, _, _, _ in staged:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            self._restore(replaced, previous)
+            raise
+
+        for _, file_path, file_name, data in staged:
+            stat = os.stat(file_path)
+            digest = sha256_bytes(data)
+            self._known_hashes[file_name] = (stat.st_size, stat.st_mtime_ns, digest)
+            event_stream.emit("component_changed", folder=self.folder, file=file_name, bytes=len(data), sha256=digest)
+            self.stats["writes"] += 1
+            self.stats["bytes"] += len(data)
+        self._sync_directory()
+        self.stats["commits"] += 1
+
+    def _restore(self, file_paths, previous):
+        # Puts back the contents the files had before a commit that failed partway
+        for file_path in reversed(file_paths):
+            try:
+                if previous[file_path] is None:
+                    os.remove(file_path)
+                    continue
+                fd, temp_path = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(file_path) or ".")
+                with os.fdopen(fd, "wb") as temp_file:
+                    temp_file.write(previous[file_path])
+                    temp_file.flush()
+                    os.fsync(temp_file.fileno())
+                os.chmod(temp_path, os.stat(file_path).st_mode & 0o777)
+                os.replace(temp_path, file_path)
+            except OSError:
+                continue
+
+    def _sync_directory(self):
+        # Make the renames durable; directories cannot be opened this way on Windows
+        if os.name == "nt":
+            return
+        fd = os.open(self.folder, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def summary(self):
+        return (f"{self.stats['writes']} written, {self.stats['skipped']} unchanged, "
+                f"{self.stats['bytes']} bytes in {self.stats['commits']} commit(s), "
+                f"{self.stats['seconds'] * 1000:.1f} ms")
@@ -0,0 +1,77 @@
+# cumulative_stats.py
+
+import numpy as np
+from scipy.special import pdtr, stdtrit  # Poisson CDF and t quantiles, without importing scipy.stats
+
+CI_METHODS = ("t", "bootstrap")
+BOOTSTRAP_RESAMPLES = 1000
+# P(count <= k) of a Poisson(1) resampling weight, k = 0..9 (larger counts are negligible)
+POISSON_CDF = pdtr(np.arange(10), 1.0).astype(np.float32)
+
+
+def cumulative_mean_ci(values, confidence=0.95, method="t", resamples=BOOTSTRAP_RESAMPLES, seed=0):
+    """
+    Running mean and confidence interval of every prefix of `values` (the first 1, 2, ..., n values),
+    computed for all prefixes at once.
+
+    Args:
+        values (sequence of float): Observations in trial order.
+        confidence (float): Confidence level of the intervals.
+        method (str): "t" for Student t intervals, "bootstrap" for percentile bootstrap intervals.
+        resamples (int): Bootstrap resamples (bootstrap method only).
+        seed (int): Seed of the bootstrap resampling, so a plot can be reproduced.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: Means, lower and upper bounds per prefix. The bounds
+        of the first prefix (a single value) are NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        empty = np.empty(0)
+        return empty, empty, empty
+    counts = np.arange(1, values.size + 1)
+    # Sums of the deviations from the first value: the same means and variances, without the
+    # cancellation of sum(x^2) - sum(x)^2 / n on large values such as durations in seconds
+    deviations = values - values[0]
+    sums = np.cumsum(deviations)
+    means = values[0] + sums / counts
+    if method == "bootstrap":
+        lowers, uppers = _bootstrap_bounds(values, means, confidence, resamples, seed)
+    elif method == "t":
+        lowers, uppers = _t_bounds(deviations, sums, counts, means, confidence)
+    else:
+        raise ValueError(f"Unknown confidence interval method '{method}' (expected one of {', '.join(CI_METHODS)}).")
+    lowers[0] = uppers[0] = np.nan
+    return means, lowers, uppers
+
+
+def _t_bounds(deviations, sums, counts, means, confidence):
+    squares = np.cumsum(deviations * deviations)
+    degrees = np.maximum(counts - 1, 1)  # Prefix of one value: bounds replaced by NaN by the caller
+    variances = np.maximum(squares - sums * sums / counts, 0.0) / degrees
+    sems = np.sqrt(variances / counts)
+    # One vectorized call for the critical values of every prefix (SEM 0: the interval is the mean)
+    margins = sems * stdtrit(degrees, (1 + confidence) / 2.)
+    return means - margins, means + margins
+
+
+def _bootstrap_bounds(values, means, confidence, resamples, seed):
+    """
+    Percentile bootstrap intervals of every prefix mean, using Poisson(1) resampling weights: each
+    resample weights every value once, so the resampled means of all prefixes are cumulative sums.
+    """
+    generator = np.random.default_rng(seed)
+    # Poisson(1) weights by inverse CDF, one comparison per count: much faster than poisson()
+    uniforms = generator.random((values.size, resamples), dtype=np.float32)
+    weights = np.zeros((values.size, resamples), dtype=np.float32)
+    for threshold in POISSON_CDF:
+        weights += uniforms > threshold
+    weight_sums = np.cumsum(weights, axis=0)
+    deviations = (values - values[0]).astype(np.float32)
+    weighted_sums = np.cumsum(weights * deviations[:, None], axis=0)
+    # A resample drawing none of the first values has no mean: count it at the prefix mean
+    resampled_means = np.where(weight_sums > 0, weighted_sums / np.maximum(weight_sums, 1),
+                               (means - values[0])[:, None].astype(np.float32))
+    tail = (1 - confidence) / 2
+    lowers, uppers = np.quantile(resampled_means, [tail, 1 - tail], axis=1)
+    return values[0] + lowers, values[0] + uppers
@@ -0,0 +1,277 @@
+# dependency_resolver.py
+
+import argparse
+import ast
+import glob
+import os
+import re
+import sys
+import zipfile
+from importlib import metadata
+from colorama import Fore, Style
+
+# Import names whose distribution is known. Most entries only exist because the
+# distribution name differs from the import name; the others are common packages
+# listed so they resolve without any local metadata.
+IMPORT_TO_DISTRIBUTION = {
+    "aiohttp": "aiohttp",
+    "anthropic": "anthropic",
+    "attr": "attrs",
+    "boto3": "boto3",
+    "bs4": "beautifulsoup4",
+    "chardet": "chardet",
+    "click": "click",
+    "colorama": "colorama",
+    "Crypto": "pycryptodome",
+    "cv2": "opencv-python",
+    "dateutil": "python-dateutil",
+    "django": "Django",
+    "docx": "python-docx",
+    "dotenv": "python-dotenv",
+    "fastapi": "fastapi",
+    "flask": "Flask",
+    "fitz": "PyMuPDF",
+    "gi": "PyGObject",
+    "google.generativeai": "google-generativeai",
+    "google.cloud.storage": "google-cloud-storage",
+    "google.protobuf": "protobuf",
+    "httpx": "httpx",
+    "jinja2": "Jinja2",
+    "jwt": "PyJWT",
+    "lxml": "lxml",
+    "magic": "python-magic",
+    "matplotlib": "matplotlib",
+    "MySQLdb": "mysqlclient",
+    "networkx": "networkx",
+    "nltk": "nltk",
+    "numpy": "numpy",
+    "openai": "openai",
+    "OpenSSL": "pyOpenSSL",
+    "openpyxl": "openpyxl",
+    "pandas": "pandas",
+    "PIL": "pillow",
+    "plotly": "plotly",
+    "psutil": "psutil",
+    "psycopg2": "psycopg2-binary",
+    "pydantic": "pydantic",
+    "pygame": "pygame",
+    "pytest": "pytest",
+    "pptx": "python-pptx",
+    "requests": "requests",
+    "rich": "rich",
+    "scipy": "scipy",
+    "seaborn": "seaborn",
+    "serial": "pyserial",
+    "skimage": "scikit-image",
+    "sklearn": "scikit-learn",
+    "sqlalchemy": "SQLAlchemy",
+    "tensorflow": "tensorflow",
+    "toml": "toml",
+    "torch": "torch",
+    "tqdm": "tqdm",
+    "transformers": "transformers",
+    "usb": "pyusb",
+    "win32api": "pywin32",
+    "win32com": "pywin32",
+    "wx": "wxPython",
+    "yaml": "PyYAML",
+    "zmq": "pyzmq",
+}
+
+_REQUIREMENT_LINE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*(\[[A-Za-z0-9_,.-]+\])?\s*((==|>=|<=|~=|!=|>|<)\s*[A-Za-z0-9.*+!-]+\s*,?\s*)*$")
+
+
+def import_names(solution):
+    """
+    Returns the dotted module names imported by the Python components of a solution,
+    without standard library modules and imports of sibling components.
+    """
+    siblings = {component.name for component in solution.components}
+    stdlib = set(getattr(sys, "stdlib_module_names", ())) | set(sys.builtin_module_names)
+    modules = set()
+    for component in solution.components:
+        if component.language != "python":
+            continue
+        try:
+            tree = ast.parse(component.content)
+        except SyntaxError:
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+                modules.add(node.module)
+    return sorted(m for m in modules if m.split(".")[0] not in stdlib and m.split(".")[0] not in siblings
+                  and m != "__future__")
+
+
+def third_party_imports(solution):
+    """
+    Returns the sorted top-level modules imported by the Python components of a solution,
+    without standard library modules and imports of sibling components.
+    """
+    return sorted({name.split(".")[0] for name in import_names(solution)})
+
+
+def wheel_index(folders):
+    """
+    Maps top-level import names to (distribution, version) using the top_level.txt of
+    the wheels found in the given folders (a wheelhouse or pip's wheel cache).
+    """
+    index = {}
+    for folder in folders:
+        for wheel_path in glob.glob(os.path.join(folder, "**", "*.whl"), recursive=True):
+            parts = os.path.basename(wheel_path).split("-")
+            if len(parts) < 2:
+                continue
+            distribution, version = parts[0], parts[1]
+            try:
+                with zipfile.ZipFile(wheel_path) as wheel:
+                    names = [n for n in wheel.namelist() if n.endswith(".dist-info/top_level.txt")]
+                    top_levels = wheel.read(names[0]).decode("utf-8").split() if names else []
+            except (OSError, zipfile.BadZipFile, KeyError):
+                continue
+            # Wheels without top_level.txt usually ship a package named after the distribution
+            for name in top_levels or [distribution.lower()]:
+                index.setdefault(name, (distribution.replace("_", "-"), version))
+    return index
+
+
+def default_wheel_folders():
+    """
+    Returns the local wheel folders searched for metadata: AIPYCRAFT_WHEELHOUSE and pip's wheel cache.
+    """
+    folders = []
+    if os.getenv("AIPYCRAFT_WHEELHOUSE"):
+        folders.append(os.getenv("AIPYCRAFT_WHEELHOUSE"))
+    if os.name == 'nt':
+        cache_root = os.path.join(os.getenv("LOCALAPPDATA", ""), "pip", "Cache")
+    else:
+        cache_root = os.path.join(os.getenv("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "pip")
+    folders.append(os.path.join(cache_root, "wheels"))
+    return [folder for folder in folders if os.path.isdir(folder)]
+
+
+class DependencyResolver:
+    """
+    Infers the pip requirements of a solution from the imports of its Python components.
+
+    Import names are resolved locally, in order, through the bundled table, the
+    distributions installed in the current interpreter and the metadata of local wheels.
+    Only names none of these know are sent to the AI, so most solutions need no AI call.
+    """
+
+    def __init__(self, ai_connector=None, wheel_folders=None):
+        self.ai_connector = ai_connector
+        self.wheel_folders = default_wheel_folders() if wheel_folders is None else wheel_folders
+        self._installed = None
+        self._wheels = None
+
+    def _installed_distributions(self):
+        if self._installed is None:
+            try:
+                self._installed = metadata.packages_distributions()
+            except AttributeError:  # Python < 3.10
+                self._installed = {}
+        return self._installed
+
+    @staticmethod
+    def _installed_version(distribution):
+        try:
+            return metadata.version(distribution)
+        except metadata.PackageNotFoundError:
+            return None
+
+    def _wheel_index(self):
+        if self._wheels is None:
+            self._wheels = wheel_index(self.wheel_folders)
+        return self._wheels
+
+    def resolve_name(self, module):
+        """
+        Resolves one dotted import name locally.
+
+        Returns:
+            tuple[str, str | None, str] | None: (distribution, version or None, source) or None.
+        """
+        top_level = module.split(".")[0]
+        # Longest dotted prefix first, for namespace packages such as google.*
+        parts = module.split(".")
+        for length in range(len(parts), 0, -1):
+            distribution = IMPORT_TO_DISTRIBUTION.get(".".join(parts[:length]))
+            if distribution:
+                return distribution, self._installed_version(distribution), "table"
+
+        installed = self._installed_distributions().get(top_level)
+        if installed and len(installed) == 1:
+            return installed[0], self._installed_version(installed[0]), "installed"
+
+        wheel = self._wheel_index().get(top_level)
+        if wheel:
+            return wheel[0], wheel[1], "wheel"
+        return None
+
+    def resolve(self, solution):
+        """
+        Resolves the requirements of a solution.
+
+        Returns:
+            tuple[list[str], dict]: Requirement lines and, per import name, how it was resolved
+            ('table', 'installed', 'wheel', 'ai' or 'unresolved').
+        """
+        requirements = {}
+        sources = {}
+        unresolved = []
+        for module in import_names(solution):
+            resolved = self.resolve_name(module)
+            if resolved is None:
+                unresolved.append(module)
+                continue
+            distribution, version, source = resolved
+            requirements[distribution.lower()] = f"{distribution}=={version}" if version else distribution
+            sources[module] = source
+
+        if unresolved:
+            for line in self.ask_ai(solution, unresolved):
+                requirements.setdefault(re.split(r"[\[=<>~!\s]", line, 1)[0].lower(), line)
+            for module in unresolved:
+                sources[module] = "ai" if self.ai_connector is not None else "unresolved"
+        return sorted(requirements.values(), key=str.lower), sources
+
+    def ask_ai(self, solution, modules):
+        """
+        Asks the AI for the distributions providing import names that could not be resolved locally.
+        """
+        if self.ai_connector is None:
+            return []
+        instructions = """Context:
+
+        You are going to determine the pip packages that provide some Python import names.
+
+        Expected answer format:
+
+        Provide only the required package names, one per line, without any additional text or explanations.
+        """
+        prompt = "The Python solution '" + solution.name + "' imports the following modules:\n\n"
+        prompt += "\n".join(f"import {module}" for module in modules) + "\n\n"
+        prompt += "Please provide the pip packages that need to be installed for these imports to work.\n"
+        prompt += "IMPORTANT 1: Provide only the required package names, one per line, without any additional text or explanations. \n"
+        prompt += "IMPORTANT 2: Include the version of all packages (for example: requests==2.31.0).\n"
+        response = self.ai_connector.send_prompt_ensemble(instructions, prompt)
+        return [line.strip() for line in response.strip().splitlines() if _REQUIREMENT_LINE.match(line.strip())]
+
+
+if __name__ == "__main__":
+    from solution_loader import SolutionLoader
+
+    parser = argparse.ArgumentParser(description="Show the requirements inferred locally for a solution.")
+    parser.add_argument("solutions_folder", help="Path to the solutions folder.")
+    parser.add_argument("solution_name", help="Name of the solution.")
+    args = parser.parse_args()
+
+    solution = SolutionLoader(args.solutions_folder).load_solution(args.solution_name, args.solution_name)
+    requirements, sources = DependencyResolver().resolve(solution)
+    for module, source in sources.items():
+        color = Fore.LIGHTRED_EX if source == "unresolved" else Fore.YELLOW
+        print(color + f"{module}: {source}" + Style.RESET_ALL)
+    print(Fore.GREEN + "\n".join(requirements) + Style.RESET_ALL)
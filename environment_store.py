@@ -0,0 +1,316 @@
+# environment_store.py
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from colorama import Fore, Style
+from file_utils import atomic_write
+from interpreter_pool import venv_python
+from incremental_installer import InstallPlan, apply_pip_plan, installed_distributions
+from workspace_snapshot import reflink_or_copy
+
+STORE_FOLDER = ".aipycraft_envs"
+METADATA_FILE = "aipycraft_env.json"
+OVERLAY_FILE = "aipycraft_shared_env.pth"
+LOCK_STALE_SECONDS = 3600
+
+
+def normalize_requirement(line):
+    """
+    Normalizes a requirement line: canonical distribution name (PEP 503) and no spaces.
+    """
+    line = line.split("#", 1)[0].strip().replace(" ", "")
+    if not line:
+        return None
+    match = re.match(r"^([A-Za-z0-9][A-Za-z0-9._-]*)(.*)$", line)
+    if not match:
+        return line
+    return re.sub(r"[-_.]+", "-", match.group(1)).lower() + match.group(2)
+
+
+def normalize_requirements(lines):
+    return sorted({requirement for requirement in map(normalize_requirement, lines) if requirement})
+
+
+def read_requirements(requirements_file_path):
+    try:
+        with open(requirements_file_path, "r", encoding="utf-8") as file:
+            return normalize_requirements(file.read().splitlines())
+    except OSError:
+        return []
+
+
+def interpreter_tag(python=None):
+    """
+    Identifies the interpreter environments are created from (version and location).
+    """
+    python = python or sys.executable
+    if python == sys.executable:
+        version = sys.version
+    else:
+        version = subprocess.run([python, "-c", "import sys; print(sys.version)"],
+                                 capture_output=True, text=True, check=True).stdout.strip()
+    return f"{os.path.realpath(python)}|{version}"
+
+
+def site_packages(env_path):
+    folders = glob.glob(os.path.join(env_path, "lib", "python*", "site-packages"))
+    folders += glob.glob(os.path.join(env_path, "Lib", "site-packages"))
+    return folders[0] if folders else None
+
+
+class EnvironmentStore:
+    """
+    Content-addressed store of virtual environments shared between solutions.
+
+    An environment is keyed by the normalized requirement set plus the interpreter it
+    was created with, so solutions with identical requirements share one environment:
+    the solution's venv/ is a symlink to it, or, where symlinks are not allowed, a tiny
+    venv whose site-packages contains a .pth overlay pointing at the shared one.
+    A new environment starts as a reflinked (else copied) clone of the existing environment sharing
+    the most requirements, and only the difference (packages to add, change or remove,
+    see incremental_installer.py) is applied to it. Environments no solution links to can be
+    garbage collected.
+    """
+
+    def __init__(self, solutions_folder, python=None, installer=None):
+        self.solutions_folder = solutions_folder
+        self.store_folder = os.path.join(solutions_folder, STORE_FOLDER)
+        self.python = python or sys.executable
+        self.interpreter = interpreter_tag(self.python)
+        # Callable(python_exe, requirements) installing packages into an environment; pip by default
+        self.installer = installer or self.pip_install
+
+    def key(self, requirements):
+        payload = json.dumps({"interpreter": self.interpreter, "requirements": normalize_requirements(requirements)})
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:20]
+
+    def env_path(self, key):
+        return os.path.join(self.store_folder, key)
+
+    @staticmethod
+    def read_metadata(env_path):
+        try:
+            with open(os.path.join(env_path, METADATA_FILE), "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def environments(self):
+        """
+        Returns (path, metadata) of every complete environment in the store.
+        """
+        if not os.path.isdir(self.store_folder):
+            return []
+        result = []
+        for name in sorted(os.listdir(self.store_folder)):
+            env_path = self.env_path(name)
+            metadata = self.read_metadata(env_path)
+            if metadata is not None:
+                result.append((env_path, metadata))
+        return result
+
+    def _acquire(self, key):
+        lock_path = self.env_path(key) + ".lock"
+        while True:
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode("ascii"))
+                os.close(fd)
+                return lock_path
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) > LOCK_STALE_SECONDS:
+                        os.remove(lock_path)
+                        continue
+                except OSError:
+                    continue
+                time.sleep(0.5)
+
+    def ensure(self, requirements):
+        """
+        Returns the path of the shared environment for a requirement set, creating it if needed.
+        """
+        requirements = normalize_requirements(requirements)
+        key = self.key(requirements)
+        env_path = self.env_path(key)
+        if self.read_metadata(env_path) is not None:
+            print(f"{Fore.GREEN}Reusing shared environment {key} ({len(requirements)} requirement(s)).{Style.RESET_ALL}")
+            return env_path
+
+        os.makedirs(self.store_folder, exist_ok=True)
+        lock_path = self._acquire(key)
+        try:
+            if self.read_metadata(env_path) is not None:  # Built by another process meanwhile
+                return env_path
+            if os.path.exists(env_path):  # Leftover of an interrupted build
+                shutil.rmtree(env_path)
+
+            start = time.perf_counter()
+            base_path, base_requirements = self._best_base(requirements)
+            if base_path:
+                print(f"{Fore.CYAN}Cloning shared environment {os.path.basename(base_path)} into {key}.{Style.RESET_ALL}")
+                self.clone(base_path, env_path)
+            else:
+                print(f"{Fore.CYAN}Creating shared environment {key}.{Style.RESET_ALL}")
+                subprocess.run([self.python, "-m", "venv", env_path], check=True, capture_output=True, text=True)
+
+            # Only apply the difference between what the clone contains and what is required
+            plan = InstallPlan.compute(installed_distributions(env_path), requirements, base_requirements)
+            if not plan.empty:
+                apply_pip_plan(venv_python(env_path), plan, self.installer)
+
+            metadata = {
+                "key": key,
+                "interpreter": self.interpreter,
+                "requirements": requirements,
+                "base": os.path.basename(base_path) if base_path else None,
+                "created_at": time.time(),
+            }
+            atomic_write(os.path.join(env_path, METADATA_FILE), json.dumps(metadata, indent=2).encode("utf-8"))
+            print(f"{Fore.GREEN}Shared environment {key} ready in {time.perf_counter() - start:.1f}s.{Style.RESET_ALL}")
+            return env_path
+        except BaseException:
+            shutil.rmtree(env_path, ignore_errors=True)
+            raise
+        finally:
+            os.remove(lock_path)
+
+    def _best_base(self, requirements):
+        # Most requirements in common first, then fewest packages to remove
+        wanted = set(requirements)
+        best_path, best_requirements, best_score = None, set(), None
+        for env_path, metadata in self.environments():
+            if metadata.get("interpreter") != self.interpreter:
+                continue
+            env_requirements = set(metadata.get("requirements", []))
+            score = (len(env_requirements & wanted), -len(env_requirements - wanted))
+            if score[0] == 0 and score[1] < 0:
+                continue  # Nothing to reuse, only packages to remove
+            if best_score is None or score > best_score:
+                best_path, best_requirements, best_score = env_path, env_requirements, score
+        return best_path, best_requirements
+
+    @staticmethod
+    def clone(source, destination):
+        """
+        Copies an environment, with reflinks where the filesystem supports them (never hardlinks:
+        a file written in place would change every clone), fixing the scripts that embed its path.
+        """
+        shutil.copytree(source, destination, symlinks=True, copy_function=reflink_or_copy,
+                        ignore=shutil.ignore_patterns(METADATA_FILE))
+        old_prefix, new_prefix = os.path.abspath(source).encode(), os.path.abspath(destination).encode()
+        for scripts in ("bin", "Scripts"):
+            for entry in glob.glob(os.path.join(destination, scripts, "*")):
+                if os.path.islink(entry) or not os.path.isfile(entry) or os.path.getsize(entry) > 1024 * 1024:
+                    continue
+                with open(entry, "rb") as file:
+                    data = file.read()
+                if old_prefix in data:
+                    mode = os.stat(entry).st_mode
+                    os.remove(entry)  # Never write through a reflinked or shared file
+                    with open(entry, "wb") as file:
+                        file.write(data.replace(old_prefix, new_prefix))
+                    os.chmod(entry, mode)
+
+    @staticmethod
+    def pip_install(python_exe, requirements):
+        clean_env = os.environ.copy()
+        # Remove PYTHONPATH if it exists to prevent interference
+        clean_env.pop('PYTHONPATH', None)
+        result = subprocess.run([python_exe, "-m", "pip", "install", *requirements],
+                                env=clean_env, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"{Fore.RED}pip install failed with return code {result.returncode}{Style.RESET_ALL}")
+            print(f"{Fore.RED}{result.stderr}{Style.RESET_ALL}")
+            raise subprocess.CalledProcessError(result.returncode, result.args, result.stdout, result.stderr)
+
+    def link(self, solution_directory, env_path):
+        """
+        Points the venv/ of a solution to a shared environment.
+        """
+        venv_directory = os.path.join(solution_directory, "venv")
+        if os.path.islink(venv_directory):
+            os.remove(venv_directory)
+        elif os.path.exists(venv_directory):
+            # Private venv from before the environment store, or a previous overlay
+            shutil.rmtree(venv_directory)
+        try:
+            os.symlink(os.path.abspath(env_path), venv_directory, target_is_directory=True)
+            return "symlink"
+        except (OSError, NotImplementedError):
+            pass
+
+        # Symlinks need extra privileges on Windows: use a minimal venv with a .pth overlay
+        subprocess.run([self.python, "-m", "venv", "--without-pip", venv_directory], check=True, capture_output=True, text=True)
+        with open(os.path.join(site_packages(venv_directory), OVERLAY_FILE), "w", encoding="utf-8") as file:
+            # Comment lines are ignored by the site module; the first one records the environment for gc()
+            file.write(f"# {os.path.abspath(env_path)}\n{os.path.abspath(site_packages(env_path))}\n")
+        return "overlay"
+
+    def referenced(self):
+        """
+        Returns the paths of the environments linked from a solution venv, at any depth
+        below the solutions folder (link() accepts nested solution directories).
+        """
+        referenced = set()
+        for directory, subdirectories, _ in os.walk(self.solutions_folder):
+            # Never descend into hidden folders (the store itself) or into the venvs
+            subdirectories[:] = [name for name in subdirectories if not name.startswith(".") and name != "venv"]
+            if directory == self.solutions_folder:
+                continue
+            venv_directory = os.path.join(directory, "venv")
+            if os.path.islink(venv_directory):
+                referenced.add(os.path.realpath(venv_directory))
+                continue
+            packages = site_packages(venv_directory) if os.path.isdir(venv_directory) else None
+            overlay = os.path.join(packages, OVERLAY_FILE) if packages else None
+            if overlay and os.path.exists(overlay):
+                with open(overlay, "r", encoding="utf-8") as file:
+                    referenced.add(os.path.realpath(file.readline()[1:].strip()))
+        return referenced
+
+    def gc(self, min_age_seconds=0, dry_run=False):
+        """
+        Removes environments that no solution links to.
+
+        Returns:
+            list[str]: Removed environment keys.
+        """
+        referenced = self.referenced()
+        removed = []
+        for env_path, metadata in self.environments():
+            if os.path.realpath(env_path) in referenced:
+                continue
+            if time.time() - metadata.get("created_at", 0) < min_age_seconds:
+                continue
+            removed.append(os.path.basename(env_path))
+            if not dry_run:
+                shutil.rmtree(env_path, ignore_errors=True)
+        return removed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the shared solution environments.")
+    parser.add_argument("solutions_folder", help="Path to the solutions folder.")
+    parser.add_argument("--gc", action="store_true", help="Remove environments no solution links to.")
+    parser.add_argument("--min-age", type=float, default=0, help="Only collect environments older than this many hours.")
+    parser.add_argument("--dry-run", action="store_true", help="Only show what --gc would remove.")
+    args = parser.parse_args()
+
+    store = EnvironmentStore(args.solutions_folder)
+    if args.gc:
+        removed = store.gc(args.min_age * 3600, args.dry_run)
+        verb = "Would remove" if args.dry_run else "Removed"
+        print(Fore.YELLOW + f"{verb} {len(removed)} unused environment(s): {', '.join(removed) or '-'}" + Style.RESET_ALL)
+    referenced = store.referenced()
+    for env_path, metadata in store.environments():
+        used = "in use" if os.path.realpath(env_path) in referenced else "unused"
+        print(Fore.GREEN + f"- {os.path.basename(env_path)} ({used}): {', '.join(metadata['requirements']) or 'no packages'}" + Style.RESET_ALL)
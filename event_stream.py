@@ -0,0 +1,109 @@
+# event_stream.py
+
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+# Single process-wide stream, configured once by main.py (like the logger)
+_lock = threading.Lock()
+_stream = None
+_socket = None
+_active_operations = []
+
+
+def configure(fd=None, socket_address=None, file_path=None):
+    """
+    Opens the event stream. Events are written as JSON lines to one of:
+    - fd: an inherited file descriptor (e.g. a pipe created by the test driver);
+    - socket_address: 'host:port' (TCP) or a Unix socket path;
+    - file_path: a file, appended to.
+    """
+    global _stream, _socket
+    close()
+    if fd is not None:
+        _stream = os.fdopen(fd, "w", encoding="utf-8", buffering=1)
+    elif socket_address:
+        host, _, port = socket_address.rpartition(":")
+        if host and port.isdigit():
+            _socket = socket.create_connection((host, int(port)))
+        else:
+            _socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            _socket.connect(socket_address)
+        _stream = _socket.makefile("w", encoding="utf-8")
+    elif file_path:
+        _stream = open(file_path, "a", encoding="utf-8", buffering=1)
+    emit("stream_opened", pid=os.getpid())
+
+
+def close():
+    global _stream, _socket
+    with _lock:
+        for resource in (_stream, _socket):
+            if resource is not None:
+                try:
+                    resource.close()
+                except OSError:
+                    pass
+        _stream = _socket = None
+
+
+def enabled():
+    return _stream is not None
+
+
+def emit(event, **fields):
+    """
+    Writes one event. Does nothing when no stream is configured; a reader that went away
+    disables the stream instead of failing the operation being reported.
+    """
+    global _stream
+    if _stream is None:
+        return
+    line = json.dumps({"event": event, "time": time.time(), **fields}, default=str)
+    with _lock:
+        if _stream is None:
+            return
+        try:
+            _stream.write(line + "\n")
+            _stream.flush()  # Readers react to each event as it happens
+        except (OSError, ValueError):
+            _stream = None
+
+
+def record_tokens(model, prompt_tokens, completion_tokens, duration):
+    """
+    Reports one AI call and adds its tokens to the operations in progress.
+    """
+    emit("ai_call", model=model, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+         duration=round(duration, 3))
+    with _lock:
+        for operation in _active_operations:
+            operation["prompt_tokens"] += prompt_tokens or 0
+            operation["completion_tokens"] += completion_tokens or 0
+
+
+@contextmanager
+def operation(name, **fields):
+    """
+    Emits operation_started and operation_finished around a block. The block can set the
+    result fields (status, reason, ...) on the yielded dict; an exception sets status ERROR
+    with the exception as reason and is re-raised.
+    """
+    result = {"status": "SUCCESS", "prompt_tokens": 0, "completion_tokens": 0}
+    start = time.perf_counter()
+    emit("operation_started", operation=name, **fields)
+    with _lock:
+        _active_operations.append(result)
+    try:
+        yield result
+    except BaseException as e:
+        result.update(status="ERROR", reason=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        with _lock:
+            # By identity: two operations can have equal result dicts
+            del _active_operations[next(i for i, active in enumerate(_active_operations) if active is result)]
+        emit("operation_finished", operation=name, duration=round(time.perf_counter() - start, 3), **fields, **result)
@@ -0,0 +1,246 @@
+# execution_engine.py
+
+import ast
+import builtins
+import hashlib
+import importlib.util
+import marshal
+import math
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from file_utils import atomic_write
+
+
+def _run_component(name, code_bytes, folder):
+    """
+    Executes one compiled component inside a pool worker, in a namespace of its own.
+
+    The worker runs a single component (maxtasksperchild=1), so the working directory,
+    sys.path entries and modules imported by one component never leak into the next.
+
+    Returns:
+        tuple[str, str | None]: ('SUCCESS', None) or ('ERROR', error message).
+    """
+    code = marshal.loads(code_bytes)
+    namespace = {
+        "__name__": name,
+        "__file__": os.path.join(folder, f"{name}.py") if folder else f"{name}.py",
+        "__builtins__": builtins,
+    }
+    try:
+        if folder:
+            os.chdir(folder)
+            if folder not in sys.path:
+                sys.path.insert(0, folder)
+        exec(code, namespace)
+        # Call the main function if the component defines one
+        main_func = namespace.get("main")
+        if callable(main_func):
+            main_func()
+        return ("SUCCESS", None)
+    except EOFError:
+        return ("ERROR", "The component read from stdin, which is not available in worker processes.")
+    except BaseException as e:
+        return ("ERROR", str(e) or e.__class__.__name__)
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+
+def sibling_imports(components):
+    """
+    Returns {index: set of indexes} of the components each Python component imports.
+    """
+    names = {component.name: i for i, component in enumerate(components) if component.language == "python"}
+    graph = {}
+    for name, i in names.items():
+        imported = set()
+        try:
+            tree = ast.parse(components[i].content)
+        except SyntaxError:
+            tree = None
+        for node in ast.walk(tree) if tree is not None else ():
+            if isinstance(node, ast.Import):
+                imported.update(alias.name.split(".")[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+                imported.add(node.module.split(".")[0])
+        graph[i] = {names[module] for module in imported if module in names and names[module] != i}
+    return graph
+
+
+def execution_rounds(indexes, graph):
+    """
+    Splits components into rounds that can run concurrently: components connected through
+    imports, directly or not, form a group run one after the other in their original order,
+    and round k holds the k-th component of every group.
+    """
+    group_of = {i: i for i in indexes}
+
+    def find(i):
+        while group_of[i] != i:
+            i = group_of[i]
+        return i
+
+    for i in indexes:
+        for j in graph.get(i, ()):
+            if j in group_of:
+                roots = sorted((find(i), find(j)))
+                group_of[roots[1]] = roots[0]
+    groups = {}
+    for i in indexes:
+        groups.setdefault(find(i), []).append(i)
+    rounds = []
+    for members in groups.values():
+        for k, i in enumerate(members):
+            if k == len(rounds):
+                rounds.append([])
+            rounds[k].append(i)
+    return [sorted(members) for members in rounds]
+
+
+class ExecutionEngine:
+    """
+    Runs Python components in isolated namespaces inside a process pool.
+
+    Each component is compiled once per content hash; code objects are cached in memory
+    and, when a cache folder is given, on disk as marshal data tagged with the interpreter's
+    bytecode magic (like a .pyc cache). Each component runs in a fresh worker process.
+
+    Components run one after the other in their order, as before. With parallel=True,
+    components with no import between them (see execution_rounds) run concurrently;
+    components sharing other state, such as files, should not be run that way.
+
+    Differences with running the components in-process:
+        - The default timeout is None, so components may run as long as they need, as before.
+          With a timeout, a component that exceeds it is reported as an error and hung
+          workers are terminated.
+        - Workers have no stdin: a component calling input() fails with an error saying so.
+    """
+
+    _default = None
+
+    def __init__(self, max_workers=None, timeout=None, parallel=False):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.parallel = parallel
+        self._code_cache = {}  # digest -> marshalled code bytes
+        self._pool = None
+        self._pool_size = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def default(cls):
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+    def compile(self, component, cache_folder=None):
+        """
+        Returns (digest, marshalled code) for a Python component, compiling it only once.
+        """
+        file_name = f"{component.name}.{component.extension}"
+        digest = hashlib.sha256(f"{file_name}\0{component.content}".encode("utf-8")).hexdigest()
+        code_bytes = self._code_cache.get(digest)
+        if code_bytes is not None:
+            return digest, code_bytes
+
+        cache_path = None
+        if cache_folder:
+            cache_path = os.path.join(cache_folder, f"{digest}.{importlib.util.MAGIC_NUMBER.hex()}.bin")
+            try:
+                with open(cache_path, "rb") as file:
+                    code_bytes = file.read()
+            except OSError:
+                code_bytes = None
+
+        if code_bytes is None:
+            code_bytes = marshal.dumps(compile(component.content, file_name, "exec"))
+            if cache_path:
+                try:
+                    atomic_write(cache_path, code_bytes, fsync=False)
+                except OSError:
+                    pass
+
+        self._code_cache[digest] = code_bytes
+        return digest, code_bytes
+
+    def _get_pool(self, size):
+        with self._lock:
+            if self._pool is None or self._pool_size < size:
+                if self._pool is not None:
+                    self._pool.terminate()
+                # One component per worker: the cwd, sys.path entries and modules a component changes
+                # or imports never reach the next one (workers are forked from this process, so they
+                # start with its own sys.modules)
+                self._pool = multiprocessing.Pool(processes=size, maxtasksperchild=1)
+                self._pool_size = size
+            return self._pool
+
+    def _reset_pool(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool.join()
+            self._pool = None
+            self._pool_size = 0
+
+    def run(self, components, folder=None, cache_folder=None):
+        """
+        Executes Python components, one after the other or, with parallel, in rounds of
+        components with no import between them.
+
+        Returns:
+            list[tuple[str, str | None]]: (status, error message) per component, in order.
+            Non-Python components get ('SKIPPED', None).
+        """
+        results = [("SKIPPED", None)] * len(components)
+        submissions = []
+        for i, component in enumerate(components):
+            if component.language != "python":
+                continue
+            try:
+                _, code_bytes = self.compile(component, cache_folder)
+            except SyntaxError as e:
+                results[i] = ("ERROR", f"Syntax error: {e}")
+                continue
+            submissions.append((i, component.name, code_bytes))
+
+        if not submissions:
+            return results
+
+        by_index = {i: (name, code_bytes) for i, name, code_bytes in submissions}
+        if self.parallel:
+            rounds = execution_rounds(list(by_index), sibling_imports(components))
+        else:
+            rounds = [[i] for i in by_index]
+        for members in rounds:
+            self._run_round(members, by_index, folder, results)
+        return results
+
+    def _run_round(self, members, by_index, folder, results):
+        size = min(len(members), self.max_workers)
+        pool = self._get_pool(size)
+        pending = [(i, pool.apply_async(_run_component, (*by_index[i], folder))) for i in members]
+
+        # Queued components wait for a free worker, so scale the deadline by the number of waves
+        timeout = self.timeout * math.ceil(len(members) / size) if self.timeout is not None else None
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        timed_out = False
+        for i, async_result in pending:
+            try:
+                remaining = max(0, deadline - time.monotonic()) if deadline is not None else None
+                results[i] = async_result.get(timeout=remaining)
+            except multiprocessing.TimeoutError:
+                timed_out = True
+                results[i] = ("ERROR", f"Execution did not finish within {timeout}s.")
+            except Exception as e:
+                results[i] = ("ERROR", str(e))
+        if timed_out:
+            # A hung component keeps its worker busy forever: discard the whole pool
+            self._reset_pool()
+
+    def close(self):
+        self._reset_pool()
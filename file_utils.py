@@ -0,0 +1,64 @@
+# file_utils.py
+
+import hashlib
+import os
+import tempfile
+
+
+def sha256_bytes(data):
+    """
+    Returns the hex SHA-256 digest of a bytes object.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_text(text):
+    """
+    Returns the hex SHA-256 digest of a string encoded as UTF-8.
+    """
+    return sha256_bytes(text.encode("utf-8"))
+
+
+def sha256_file(file_path, chunk_size=1024 * 1024):
+    """
+    Returns the hex SHA-256 digest of a file, reading it in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def atomic_write(file_path, data, fsync=True):
+    """
+    Writes bytes to a file atomically.
+
+    The data is written to a temporary file in the same directory and then renamed
+    over the target, so readers never observe a half-written file.
+
+    Args:
+        file_path (str): Destination file path.
+        data (bytes): Content to write.
+        fsync (bool): Flush the temporary file to disk before the rename.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as temp_file:
+            temp_file.write(data)
+            temp_file.flush()
+            if fsync:
+                os.fsync(temp_file.fileno())
+        # mkstemp creates 0600 files; keep the target's mode or use a regular file mode
+        try:
+            mode = os.stat(file_path).st_mode & 0o777
+        except OSError:
+            mode = 0o644
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
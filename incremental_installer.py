@@ -0,0 +1,177 @@
+# incremental_installer.py
+
+import glob
+import json
+import os
+import re
+import subprocess
+import time
+from colorama import Fore, Style
+
+CONDA_STATE_FILE = "aipycraft_requirements.json"
+
+
+def canonical_name(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def parse_requirement(requirement):
+    """
+    Splits a requirement line into (canonical name, pinned version or None).
+    """
+    match = re.match(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?\s*(==\s*([^,;\s]+))?", requirement)
+    if not match:
+        return None, None
+    return canonical_name(match.group(1)), match.group(4)
+
+
+def installed_distributions(env_path):
+    """
+    Returns {canonical name: version} of the distributions installed in a virtual
+    environment, read from the dist-info METADATA headers without starting Python.
+    """
+    installed = {}
+    patterns = [os.path.join(env_path, "lib", "python*", "site-packages", "*.dist-info", "METADATA"),
+                os.path.join(env_path, "Lib", "site-packages", "*.dist-info", "METADATA")]
+    for pattern in patterns:
+        for metadata_path in glob.glob(pattern):
+            name = version = None
+            try:
+                with open(metadata_path, "r", encoding="utf-8", errors="replace") as file:
+                    for line in file:
+                        if not line.strip():
+                            break  # End of the headers
+                        if line.startswith("Name:"):
+                            name = line[5:].strip()
+                        elif line.startswith("Version:"):
+                            version = line[8:].strip()
+            except OSError:
+                continue
+            if name and version:
+                installed[canonical_name(name)] = version
+    return installed
+
+
+def conda_packages(prefix):
+    """
+    Returns {canonical name: version} of the packages of a conda environment, read from conda-meta.
+    """
+    packages = {}
+    for record_path in glob.glob(os.path.join(prefix, "conda-meta", "*.json")):
+        try:
+            with open(record_path, "r", encoding="utf-8") as file:
+                record = json.load(file)
+        except (OSError, ValueError):
+            continue
+        if record.get("name") and record.get("version"):
+            packages[canonical_name(record["name"])] = record["version"]
+    return packages
+
+
+class InstallPlan:
+    """
+    Difference between what an environment contains and what the requirements ask for.
+    """
+
+    def __init__(self, add=None, upgrade=None, remove=None, unchanged=None):
+        self.add = add or []  # Requirement lines not installed yet
+        self.upgrade = upgrade or []  # (requirement line, installed version) with a different pinned version
+        self.remove = remove or []  # Canonical names no longer required
+        self.unchanged = unchanged or []
+
+    @classmethod
+    def compute(cls, installed, requirements, previous_requirements=()):
+        """
+        Args:
+            installed (dict): {canonical name: version} currently in the environment.
+            requirements (list[str]): Requested requirement lines.
+            previous_requirements (iterable[str]): Requirement lines the environment was built for;
+                only those are candidates for removal, never their dependencies.
+        """
+        plan = cls()
+        wanted = set()
+        for requirement in requirements:
+            name, version = parse_requirement(requirement)
+            if name is None:
+                plan.add.append(requirement)
+                continue
+            wanted.add(name)
+            if name not in installed:
+                plan.add.append(requirement)
+            elif version and installed[name] != version:
+                plan.upgrade.append((requirement, installed[name]))
+            else:
+                plan.unchanged.append(requirement)
+        for requirement in previous_requirements:
+            name, _ = parse_requirement(requirement)
+            if name and name not in wanted and name in installed and name not in plan.remove:
+                plan.remove.append(name)
+        return plan
+
+    @property
+    def empty(self):
+        return not (self.add or self.upgrade or self.remove)
+
+    def to_install(self):
+        return self.add + [requirement for requirement, _ in self.upgrade]
+
+    def summary(self):
+        parts = [f"{len(self.add)} to add", f"{len(self.upgrade)} to change", f"{len(self.remove)} to remove",
+                 f"{len(self.unchanged)} unchanged"]
+        lines = [", ".join(parts)]
+        lines += [f"  + {requirement}" for requirement in self.add]
+        lines += [f"  ~ {requirement} (installed {installed})" for requirement, installed in self.upgrade]
+        lines += [f"  - {name}" for name in self.remove]
+        return "\n".join(lines)
+
+
+def apply_pip_plan(python_exe, plan, installer):
+    """
+    Applies a plan to a virtual environment: pip uninstall for removals, then the installer for the rest.
+
+    Returns:
+        float: Seconds spent.
+    """
+    start = time.perf_counter()
+    print(f"{Fore.CYAN}Environment changes: {plan.summary()}{Style.RESET_ALL}")
+    if plan.remove:
+        subprocess.run([python_exe, "-m", "pip", "uninstall", "--yes", *plan.remove],
+                       check=True, capture_output=True, text=True)
+    if plan.to_install():
+        installer(python_exe, plan.to_install())
+    elapsed = time.perf_counter() - start
+    print(f"{Fore.GREEN}Applied in {elapsed:.1f}s.{Style.RESET_ALL}")
+    return elapsed
+
+
+def sync_conda_environment(prefix, requirements_file_path, requirements):
+    """
+    Creates a conda environment, or brings an existing one in line with the requirements
+    by installing and removing only the packages that differ.
+
+    Returns:
+        float: Seconds spent.
+    """
+    start = time.perf_counter()
+    # Requirements the environment was last synced to, the only candidates for removal
+    state_path = os.path.join(prefix, CONDA_STATE_FILE)
+    if not os.path.isdir(os.path.join(prefix, "conda-meta")):
+        subprocess.run(["conda", "create", "--prefix", prefix, "--file", requirements_file_path, "-y"])
+    else:
+        try:
+            with open(state_path, "r", encoding="utf-8") as file:
+                previous_requirements = json.load(file)
+        except (OSError, ValueError):
+            previous_requirements = []
+        plan = InstallPlan.compute(conda_packages(prefix), requirements, previous_requirements)
+        print(f"{Fore.CYAN}Conda environment changes: {plan.summary()}{Style.RESET_ALL}")
+        if plan.remove:
+            subprocess.run(["conda", "remove", "--prefix", prefix, "-y", *plan.remove])
+        if plan.to_install():
+            subprocess.run(["conda", "install", "--prefix", prefix, "-y", *plan.to_install()])
+    if os.path.isdir(prefix):
+        with open(state_path, "w", encoding="utf-8") as file:
+            json.dump(list(requirements), file)
+    elapsed = time.perf_counter() - start
+    print(f"{Fore.GREEN}Conda environment ready in {elapsed:.1f}s.{Style.RESET_ALL}")
+    return elapsed
@@ -3,41 +3,49 @@
 import os
 import subprocess
 from ai_connector import AIConnector
+from dependency_resolver import DependencyResolver, default_wheel_folders
+from environment_store import EnvironmentStore
+from wheelhouse import Wheelhouse, default_wheelhouse
+from incremental_installer import sync_conda_environment
 from colorama import Fore, Style, init
 
 init(autoreset=True)
 
 class InstallationScriptGenerator:
-    def __init__(self, solutions_folder):
+    def __init__(self, solutions_folder, wheelhouse=None):
         self.solutions_folder = solutions_folder
         self.ai_connector = AIConnector()
+        # Offline mode: install only from a local wheel folder (--wheelhouse or AIPYCRAFT_WHEELHOUSE)
+        wheelhouse = wheelhouse or default_wheelhouse()
+        self.wheelhouse = Wheelhouse(wheelhouse) if wheelhouse else None
+        if self.wheelhouse:
+            # Resolve imports from the wheelhouse metadata too, and never ask the AI while offline
+            wheel_folders = [self.wheelhouse.folder] + [folder for folder in default_wheel_folders()
+                                                        if os.path.abspath(folder) != self.wheelhouse.folder]
+            self.dependency_resolver = DependencyResolver(None, wheel_folders)
+        else:
+            self.dependency_resolver = DependencyResolver(self.ai_connector)
+        self.environment_store = EnvironmentStore(solutions_folder, installer=self.wheelhouse.install if self.wheelhouse else None)
+
+    def generate_installation_scripts(self, solution, installation_method=None):
+        """
+        Writes the requirements of a solution and installs its environment.
 
-    def generate_installation_scripts(self, solution):
-        solution_directory = os.path.join(self.solutions_folder, solution.name)
+        Args:
+            solution: The solution to install.
+            installation_method (str, optional): 'pip' or 'conda'; asked interactively when None.
+
+        Returns:
+            str | None: Path of the installed environment, or None if the installation did not happen.
+        """
+        # The folder the solution was loaded from (catalog path, trial copy), else <solutions folder>/<name>
+        solution_directory = solution.folder or os.path.join(self.solutions_folder, solution.name)
         print(f"{Fore.BLUE}This is the solution directory: {solution_directory}")
         os.makedirs(solution_directory, exist_ok=True)
 
         requirements_file_path = os.path.join(solution_directory, "requirements.txt")
 
-        instructions = """Context:
-
-        You are going to determine the required Python packages for a Solution.
-
-        Expected answer format:
-
-        Provide only the required package names, one per line, without any additional text or explanations.
-        Be careful to provide packages that are mutually compatible. Deal with versions to avoid incompatibilities.
-
-        Example of answer (a list of package names, one per line):
-
-        aiohttp==3.9.4
-        aiosignal==1.3.1
-        async-timeout==4.0.3
-        attrs==23.2.0
-        """
-
         # Filter Python components
-        python_components = [component for component in solution.components if component.language == "python"]
         non_python_components = [component for component in solution.components if component.language != "python"]
 
         # Notify about non-Python components
@@ -46,34 +54,17 @@ class InstallationScriptGenerator:
             for component in non_python_components:
                 print(f"{Fore.YELLOW}- {component.name}.{component.extension} ({component.language})")
 
-        # Generate the prompt for the AI to determine the necessary packages
-        prompt = f"Given the following Python solution components:\n\n"
-        for component in python_components:
-            prompt += f"Component: {component.name}\n\Content:\n{component.content}\n\n"
-        prompt += f"Solution Result Description:\n{solution.result_description}\n\n"
-        prompt += "Please provide a list of the necessary Python packages that need to be installed via pip in order to run this Solution.\n"
-        prompt += "IMPORTANT 1: Provide only the required package names, one per line, without any additional text or explanations. \n"
-        prompt += "IMPORTANT 2: Do not forget to include the version of all packages.\n"
-        prompt += "IMPORTANT 3: Be careful to provide packages that are mutually compatible. Deal with versions to avoid incompatibilities.\n\n"
-        prompt += "Example of answer (a list of package names, one per line):\n\n"
-        prompt += "aiohttp==3.9.4\n"
-        prompt += "aiosignal==1.3.1\n"
-        prompt += "async-timeout==4.0.3\n"
-        prompt += "attrs==23.2.0\n"
-
-        # Send the prompt to the AI using the AIConnector and get the response
-        response = self.ai_connector.send_prompt_ensemble(instructions, prompt)
-
-        print(f"{Fore.CYAN}\n\nAI's response:\n")
-        print(f"{response}")
-
-        # Parse the AI's response to extract the package names
-        packages = response.strip().split("\n")
-        print(f"{Fore.GREEN}\n\nThese are the required packages: {packages}")
+        # Infer the packages from the component imports; the AI is only asked about names that cannot be resolved locally
+        packages, sources = self.dependency_resolver.resolve(solution)
+        for module, source in sources.items():
+            print(f"{Fore.CYAN}- import {module}: resolved from {source}")
+        unresolved = [module for module, source in sources.items() if source == "unresolved"]
+        if unresolved:
+            print(f"{Fore.YELLOW}Not found locally{' or in the wheelhouse' if self.wheelhouse else ''}: {', '.join(unresolved)}")
+        elif not any(source == "ai" for source in sources.values()):
+            print(f"{Fore.CYAN}All imports resolved locally, no AI call needed.")
 
-        # Remove markers, duplicates, and invalid package names from the package list
-        packages = [package.strip() for package in packages if "==" in package]
-        packages = list(set(packages))
+        print(f"{Fore.GREEN}\n\nThese are the required packages: {packages}")
 
         # Write the packages to the requirements.txt file
         with open(requirements_file_path, 'w') as req_file:
@@ -81,81 +72,52 @@ class InstallationScriptGenerator:
                 req_file.write(package + '\n')
 
         # Ask the user to select the installation method
-        while True:
+        while installation_method is None:
             installation_method = input(f"{Fore.BLUE}Select the installation method (pip/conda/quit): ")
-            if installation_method.lower() in ['pip', 'conda', 'quit']:
-                break
-            else:
+            if installation_method.lower() not in ['pip', 'conda', 'quit']:
                 print(f"{Fore.RED}Invalid installation method. Please enter 'pip', 'conda', or 'quit'.")
+                installation_method = None
 
         if installation_method.lower() == 'quit':
             print(f"{Fore.RED}Installation process aborted.")
-            return
+            return None
 
         if installation_method.lower() == 'pip':
-            venv_directory = os.path.join(solution_directory, "venv")
-
-            # Attempt to remove the existing venv directory if it exists
-            if os.path.exists(venv_directory):
-                print(f"{Fore.YELLOW}Removing existing virtual environment: {venv_directory}{Style.RESET_ALL}")
-                try:
-                    # Use shutil.rmtree for robust directory removal
-                    import shutil
-                    shutil.rmtree(venv_directory)
-                    print(f"{Fore.GREEN}Successfully removed existing virtual environment.{Style.RESET_ALL}")
-                except Exception as e:
-                    print(f"{Fore.RED}Error removing existing virtual environment: {e}{Style.RESET_ALL}")
-                    # Optionally, decide if you want to proceed or stop if removal fails
-
-            # Create a fresh virtual environment
-            print(f"{Fore.CYAN}Creating new virtual environment: {venv_directory}{Style.RESET_ALL}")
-            create_venv_result = subprocess.run(["python", "-m", "venv", venv_directory], capture_output=True, text=True)
-            if create_venv_result.returncode != 0:
-                 print(f"{Fore.RED}Failed to create virtual environment.{Style.RESET_ALL}")
-                 print(f"{Fore.RED}Stderr: {create_venv_result.stderr}{Style.RESET_ALL}")
-                 return # Stop if venv creation fails
-
-            # Install the packages using pip within the virtual environment
-            if os.name == 'nt':  # Windows
-                pip_executable = os.path.join(venv_directory, "Scripts", "pip.exe")
-                # Create a clean environment for the subprocess
-                clean_env = os.environ.copy()
-                # Remove PYTHONPATH if it exists to prevent interference
-                clean_env.pop('PYTHONPATH', None)
-                # Run pip install with the cleaned environment, forcing reinstall and disabling cache
-                # Capture output for debugging
-                print(f"{Fore.YELLOW}Running pip install command: {[pip_executable, 'install', '--force-reinstall', '--no-cache-dir', '-r', requirements_file_path]}{Style.RESET_ALL}")
-                result = subprocess.run([pip_executable, "install", "--force-reinstall", "--no-cache-dir", "-r", requirements_file_path], env=clean_env, check=False, capture_output=True, text=True)
-                print(f"{Fore.CYAN}--- pip install stdout ---{Style.RESET_ALL}")
-                print(result.stdout)
-                print(f"{Fore.CYAN}--- pip install stderr ---{Style.RESET_ALL}")
-                print(result.stderr)
-                print(f"{Fore.CYAN}--- End pip install output ---{Style.RESET_ALL}")
-                if result.returncode == 0:
-                    print(f"{Fore.GREEN}\n\nPackages installed using pip in {venv_directory}\n\n")
-                else:
-                    print(f"{Fore.RED}\n\npip install failed with return code {result.returncode}\n\n")
-            else:  # Unix-based systems
-                activate_script = os.path.join(venv_directory, "bin", "activate")
-                pip_executable = os.path.join(venv_directory, "bin", "pip")
-
-                # Activate the virtual environment and install the packages using pip
-                subprocess.run(f"source {activate_script} && {pip_executable} install -r {requirements_file_path}", shell=True, executable="/bin/bash")
-
-                print(f"{Fore.GREEN}\n\nPackages installed using pip in {venv_directory}\n\n")
+            return self.install_shared_environment(solution_directory, packages)
         else:
             # Check if conda is installed
             try:
                 subprocess.run(["conda", "--version"], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                # Create a Conda environment within the solution directory
-                subprocess.run(["conda", "create", "--prefix", os.path.join(solution_directory, "conda_env"), "--file", requirements_file_path, "-y"])
-                print(f"{Fore.GREEN}\n\nConda environment created and packages installed in {os.path.join(solution_directory, 'conda_env')}\n\n")
+                # Create the Conda environment within the solution directory, or only apply the changed packages
+                conda_prefix = os.path.join(solution_directory, "conda_env")
+                sync_conda_environment(conda_prefix, requirements_file_path, packages)
+                print(f"{Fore.GREEN}\n\nConda environment created and packages installed in {conda_prefix}\n\n")
+                return conda_prefix
             except FileNotFoundError:
                 print(f"{Fore.RED}Conda is not installed. Falling back to using pip.")
-                # Create a virtual environment within the solution directory
-                venv_directory = os.path.join(solution_directory, "venv")
-                subprocess.run(["python", "-m", "venv", venv_directory])
+                return self.install_shared_environment(solution_directory, packages)
+
+    def install_shared_environment(self, solution_directory, packages):
+        """
+        Links the solution venv to the shared environment for its requirements,
+        creating or extending one in the environment store only when needed.
 
-                # Install the packages using pip within the virtual environment
-                subprocess.run([os.path.join(venv_directory, "bin", "pip"), "install", "-r", requirements_file_path])
-                print(f"{Fore.GREEN}\n\nPackages installed using pip in {venv_directory}\n\n")
+        Returns:
+            str | None: Path of the shared environment, or None if it could not be prepared.
+        """
+        venv_directory = os.path.join(solution_directory, "venv")
+        if self.wheelhouse is not None:
+            # Fail before touching any environment if the offline install cannot succeed
+            ok, problem = self.wheelhouse.verify(packages)
+            if not ok:
+                print(f"{Fore.RED}Cannot install from the wheelhouse {self.wheelhouse.folder}: {problem}{Style.RESET_ALL}")
+                print(f"{Fore.YELLOW}Populate it on a machine with network access: python wheelhouse.py populate <solutions folder> --wheelhouse <folder>{Style.RESET_ALL}")
+                return None
+        try:
+            env_path = self.environment_store.ensure(packages)
+            link_type = self.environment_store.link(solution_directory, env_path)
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"{Fore.RED}Failed to prepare the virtual environment: {e}{Style.RESET_ALL}")
+            return None
+        print(f"{Fore.GREEN}\n\nPackages installed using pip in {venv_directory} ({link_type} to {env_path})\n\n")
+        return env_path
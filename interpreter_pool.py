@@ -0,0 +1,171 @@
+# interpreter_pool.py
+
+import atexit
+import json
+import os
+import subprocess
+import threading
+import time
+from colorama import Style
+from dependency_resolver import third_party_imports
+from run_cache import environment_fingerprint
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pool_worker.py")
+
+
+def venv_python(venv_path):
+    """
+    Returns the interpreter path inside a virtual environment.
+    """
+    if os.name == 'nt':
+        return os.path.join(venv_path, "Scripts", "python.exe")
+    return os.path.join(venv_path, "bin", "python")
+
+
+def venv_environment(venv_path):
+    """
+    Returns a copy of os.environ equivalent to sourcing the venv activate script.
+    """
+    env = os.environ.copy()
+    env.pop("PYTHONHOME", None)
+    env["VIRTUAL_ENV"] = venv_path
+    bin_folder = os.path.dirname(venv_python(venv_path))
+    env["PATH"] = bin_folder + os.pathsep + env.get("PATH", "")
+    return env
+
+
+def components_fingerprint(solution):
+    """
+    Returns a value that changes whenever a component file of the solution changes on disk.
+    """
+    fingerprint = []
+    for component in solution.components:
+        file_path = os.path.join(solution.folder, f"{component.name}.{component.extension}")
+        try:
+            stat = os.stat(file_path)
+            fingerprint.append((file_path, stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            fingerprint.append((file_path, None, None))
+    return tuple(fingerprint)
+
+
+class _Worker:
+    """
+    One warm parent interpreter running pool_worker.py inside a venv.
+    """
+
+    def __init__(self, venv_path, preload_modules, fingerprint):
+        self.venv_path = venv_path
+        self.fingerprint = fingerprint
+        self.lock = threading.Lock()
+        self.process = subprocess.Popen(
+            [venv_python(venv_path), WORKER_SCRIPT, "--preload", ",".join(preload_modules)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, bufsize=1, env=venv_environment(venv_path),
+        )
+        ready = json.loads(self.process.stdout.readline() or "{}")
+        if not ready.get("ready"):
+            self.close()
+            raise RuntimeError(f"Warm interpreter failed to start for {venv_path}")
+        self.preloaded = ready.get("preloaded", [])
+        self.failed = ready.get("failed", [])
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def run(self, script, cwd, timeout=None):
+        with self.lock:
+            self.process.stdin.write(json.dumps({"script": script, "cwd": cwd, "timeout": timeout}) + "\n")
+            self.process.stdin.flush()
+            line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError("Warm interpreter exited unexpectedly.")
+        return json.loads(line)
+
+    def close(self):
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+
+
+class InterpreterPool:
+    """
+    Per-venv pool of warm interpreters that fork a fresh child for every solution run.
+
+    Each worker imports the solution's third-party modules once; runs then only pay for a
+    fork instead of interpreter startup plus heavy imports. A worker is replaced when the
+    component files of its solution change, so edited code and new imports are picked up,
+    and when its venv changes (relinked to another shared environment, reinstalled).
+    Fork is only available on POSIX; on Windows callers should fall back to subprocess.
+    """
+
+    def __init__(self, preload=True):
+        self.preload = preload
+        self.workers = {}  # (real venv path, solution folder) -> _Worker
+        self.lock = threading.Lock()
+        atexit.register(self.close)
+
+    @staticmethod
+    def supported():
+        return hasattr(os, "fork")
+
+    def _worker_for(self, solution, venv_path):
+        # The real path: a venv symlink can be pointed at another environment store entry
+        key = (os.path.realpath(venv_path), os.path.abspath(solution.folder))
+        fingerprint = (components_fingerprint(solution), environment_fingerprint(key[0]))
+        with self.lock:
+            worker = self.workers.get(key)
+            if worker is not None and (worker.fingerprint != fingerprint or not worker.alive()):
+                # Component files or installed packages changed since the worker started: recycle it
+                worker.close()
+                worker = None
+            if worker is None:
+                modules = third_party_imports(solution) if self.preload else []
+                worker = _Worker(os.path.abspath(venv_path), modules, fingerprint)
+                if worker.preloaded:
+                    print(Style.DIM + f"Warm interpreter preloaded: {', '.join(worker.preloaded)}" + Style.RESET_ALL)
+                self.workers[key] = worker
+            return worker
+
+    def run(self, solution, venv_path, script, timeout=None, capture=None, run_folder=None):
+        """
+        Runs a script of the solution in a child forked from the warm interpreter.
+
+        When an OutputCapture is given, the output files are streamed through it instead of
+        being read into memory.
+
+        Returns:
+            subprocess.CompletedProcess | CaptureResult: With text stdout and stderr.
+        """
+        worker = self._worker_for(solution, venv_path)
+        start = time.monotonic()
+        # Same working directory as a direct run of the venv interpreter: the caller's
+        reply = worker.run(script, os.getcwd(), timeout)
+        if capture is not None:
+            try:
+                return capture.replay_files(
+                    [venv_python(venv_path), script], reply["returncode"], reply["stdout_path"], reply["stderr_path"],
+                    "wall-clock" if reply.get("timed_out") else None, run_folder, time.monotonic() - start,
+                    reply.get("usage"),
+                )
+            finally:
+                for key in ("stdout_path", "stderr_path"):
+                    os.remove(reply[key])
+        outputs = []
+        for key in ("stdout_path", "stderr_path"):
+            with open(reply[key], "r", encoding="utf-8", errors="replace") as file:
+                outputs.append(file.read())
+            os.remove(reply[key])
+        stderr = outputs[1]
+        if reply.get("timed_out"):
+            stderr += f"\nProcess killed after exceeding the {timeout}s timeout.\n"
+        return subprocess.CompletedProcess([venv_python(venv_path), script], reply["returncode"], outputs[0], stderr)
+
+    def close(self):
+        with self.lock:
+            for worker in self.workers.values():
+                worker.close()
+            self.workers.clear()
@@ -0,0 +1,501 @@
+# log_index.py
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+LOG_DIR = "logs"
+INDEX_FILE = ".log_index.sqlite"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S,%f"
+SCAN_BLOCK_SIZE = 1024 * 1024
+
+LOG_KINDS = {"tester": "tester_run_", "main": "AIPyCraft_main_"}
+RUN_ID_PATTERN = re.compile(r"_run(\d+)\.log$")
+LOOP_PATTERN = re.compile(r"--- Starting Correction Loop Iteration (\d+)/(\d+) ---")
+ANSI_ESCAPE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+TIMESTAMP_PATTERN = re.compile(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3})")
+SUCCESS_STATUS_LINE = "Solution completed with status: SUCCESS"
+ERROR_STATUS_LINE = "Solution completed with status: ERROR"
+OUTPUT_START_MARKER = "This is the output of the solution main.py run:"
+ERROR_END_MARKER = re.compile(r"^Solution '(.*)' completed with status: ERROR$")
+# Saved scanner states of another version are indexed again from the start
+SCANNER_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    run_id INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    head TEXT NOT NULL,
+    watermark INTEGER NOT NULL,
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    path TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    iteration INTEGER,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS events_path ON events (path, kind, line);
+"""
+
+
+class LogScanner:
+    """
+    Incremental parser of one log file, fed line by line. Its state is a plain dict, saved
+    in the index with the byte offset it has consumed up to, so a later scan continues from
+    there instead of reading the file again.
+
+    It extracts, with the same rules the analysis scripts used on whole files:
+    - loop: '--- Starting Correction Loop Iteration i/n ---' markers;
+    - status: lines ending (ANSI codes removed) with 'Solution completed with status: SUCCESS'
+      or '... ERROR', with the loop iteration they happened in;
+    - error: the first non-blank line of the main.py output of each run ending with
+      "Solution '<name>' completed with status: ERROR" (value: JSON [name, line text]). As in
+      result.py, a block is only closed by the end marker of the solution looked for, so the
+      end marker of another solution leaves it open: a block gets one event per solution name
+      whose end marker follows it before the next start marker;
+    - the first line timestamp and the last timestamped line.
+
+    A last line without a newline is not consumed, as more may be appended to it: scan()
+    keeps it in the state as 'tail', and complete_state() applies it when the index is queried.
+    """
+
+    def __init__(self, state=None):
+        self.state = state or {
+            "version": SCANNER_VERSION,
+            "lines": 0, "iteration": -1, "block": 0, "block_line": -1, "block_text": None, "block_closed": [],
+            "first_timestamp": None, "first_checked": False, "last_timestamp": None,
+            "last_status": None, "last_status_line": -1, "last_status_iteration": -1, "tail": None,
+        }
+        self.events = []
+
+    def feed(self, line):
+        state = self.state
+        state["lines"] += 1
+        line_num = state["lines"]
+
+        match = TIMESTAMP_PATTERN.match(line) if line[:1].isdigit() else None
+        if not state["first_checked"]:
+            state["first_checked"] = True
+            state["first_timestamp"] = match.group(1) if match else None
+        if match:
+            state["last_timestamp"] = match.group(1)
+
+        loop_match = LOOP_PATTERN.search(line) if "--- Starting Correction Loop" in line else None
+        if loop_match:
+            state["iteration"] = int(loop_match.group(1))
+            self.events.append((line_num, "loop", state["iteration"], loop_match.group(2)))
+
+        if "status" in line:
+            cleaned_line = ANSI_ESCAPE.sub('', line).strip()
+            status = "SUCCESS" if cleaned_line.endswith(SUCCESS_STATUS_LINE) else \
+                "ERROR" if cleaned_line.endswith(ERROR_STATUS_LINE) else None
+            if status:
+                state.update(last_status=status, last_status_line=line_num, last_status_iteration=state["iteration"])
+                self.events.append((line_num, "status", state["iteration"], status))
+
+        # Error blocks: start marker, first non-blank line, end marker (as result.py)
+        if state["block"] == 0:
+            if OUTPUT_START_MARKER in line and line.strip() == OUTPUT_START_MARKER:
+                state.update(block=1, block_line=-1, block_text=None, block_closed=[])
+        elif state["block"] == 1:
+            line_strip = line.strip()
+            if line_strip:
+                state.update(block=2, block_line=line_num, block_text=line_strip)
+        elif "Solution '" in line or OUTPUT_START_MARKER in line:
+            line_strip = line.strip()
+            end_match = ERROR_END_MARKER.match(line_strip)
+            # Closed for that solution only: the block stays open for the others
+            if end_match and end_match.group(1) not in state["block_closed"]:
+                self.events.append((state["block_line"], "error", state["iteration"],
+                                    json.dumps([end_match.group(1), state["block_text"]])))
+                state["block_closed"].append(end_match.group(1))
+            elif line_strip == OUTPUT_START_MARKER:
+                state.update(block=1, block_line=-1, block_text=None, block_closed=[])
+
+    def scan(self, file, watermark, flush=None):
+        """
+        Feeds the complete lines of a binary file from `watermark`. `flush`, if given, is
+        called with the events extracted from each block read, which are then dropped.
+        A last line without a newline is kept as the state's 'tail'.
+
+        Returns:
+            tuple[int, int]: The new watermark (after the last complete line) and the bytes read.
+        """
+        file.seek(watermark)
+        read = 0
+        partial = b""
+        state = self.state
+        while True:
+            block = file.read(SCAN_BLOCK_SIZE)
+            if not block:
+                break
+            data = partial + block
+            end = data.rfind(b"\n") + 1
+            partial = data[end:]  # Partial last line: picked up once it is complete
+            if not end:
+                continue
+            watermark += end
+            read += end
+            # Whole lines only, so a multi-byte character is never cut
+            lines = data[:end].decode("utf-8", errors="replace").split("\n")
+            lines.pop()
+            for line in lines:
+                # Most lines are solution output none of the patterns can match: only count them
+                if state["block"] == 1 or not state["first_checked"] or line[:1].isdigit() \
+                        or "--- Starting Correction Loop" in line or "status" in line \
+                        or OUTPUT_START_MARKER in line or "Solution '" in line:
+                    self.feed(line)
+                else:
+                    state["lines"] += 1
+            if flush is not None:
+                flush(self.events)
+                self.events = []
+        state["tail"] = partial.decode("utf-8", errors="replace") if partial else None
+        return watermark, read
+
+
+def complete_state(state):
+    """
+    Applies the last line without a newline (the 'tail') of a scanner state, as the parsers
+    reading a whole file do, without changing the state the next scan continues from.
+
+    Returns:
+        tuple[dict | None, list]: The completed state and the events of the tail line.
+    """
+    if not state or not state.get("tail"):
+        return state, []
+    scanner = LogScanner(json.loads(json.dumps(state)))
+    scanner.state["tail"] = None
+    scanner.feed(state["tail"])
+    return scanner.state, scanner.events
+
+
+def scan_log(log_filepath, state=None, watermark=0):
+    """
+    Scans a log from `watermark` (worker of the parallel index update).
+
+    Returns:
+        tuple: New watermark, bytes read, scanner state and extracted events.
+    """
+    scanner = LogScanner(state)
+    with open(log_filepath, "rb") as file:
+        watermark, read = scanner.scan(file, watermark)
+    return watermark, read, scanner.state, scanner.events
+
+
+def chunk_size(items, jobs):
+    # A few work units per process: fewer round trips than one file per task, still balanced
+    return max(1, len(items) // (jobs * 4))
+
+
+def parse_in_parallel(function, log_paths, jobs=1, *args):
+    """
+    Returns [function(path, *args) for path in log_paths], computed in `jobs` processes when
+    jobs > 1. The results are in the order of log_paths whatever the order the processes finish
+    in, and the throughput (log size over time) is printed.
+    """
+    start = time.perf_counter()
+    if jobs > 1 and len(log_paths) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(function, log_paths, *[[arg] * len(log_paths) for arg in args],
+                                        chunksize=chunk_size(log_paths, jobs)))
+    else:
+        results = [function(path, *args) for path in log_paths]
+    total_bytes = sum(os.path.getsize(path) for path in log_paths if os.path.exists(path))
+    report_throughput("Parsed", len(log_paths), total_bytes, time.perf_counter() - start, jobs)
+    return results
+
+
+def report_throughput(action, files, total_bytes, seconds, jobs):
+    megabytes = total_bytes / 1e6
+    rate = f", {megabytes / seconds:.1f} MB/s" if seconds > 0 and total_bytes else ""
+    print(f"{action} {files} log file(s): {megabytes:.1f} MB in {seconds:.2f}s{rate} ({jobs} job(s)).")
+
+
+def log_kind(file_name):
+    for kind, prefix in LOG_KINDS.items():
+        if file_name.startswith(prefix) and RUN_ID_PATTERN.search(file_name):
+            return kind
+    return None
+
+
+def latest_log_files(log_dir, prefix):
+    """
+    Returns {run id: path} with the latest `<prefix>*_run<id>.log` of each run id, without
+    the index (the timestamp in the name orders the files of a run id).
+    """
+    latest = {}
+    for entry in os.scandir(log_dir) if os.path.isdir(log_dir) else []:
+        match = RUN_ID_PATTERN.search(entry.name)
+        if match and entry.name.startswith(prefix):
+            run_id = int(match.group(1))
+            path = os.path.join(log_dir, entry.name)
+            if run_id not in latest or path > latest[run_id]:
+                latest[run_id] = path
+    return latest
+
+
+def parse_timestamp(value):
+    # Values always match TIMESTAMP_PATTERN: slicing the fields is much faster than strptime
+    # (TIMESTAMP_FORMAT) and rejects the same invalid dates
+    try:
+        return datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]), int(value[11:13]), int(value[14:16]),
+                        int(value[17:19]), int(value[20:23]) * 1000) if value else None
+    except ValueError:
+        return None
+
+
+def outcome_from_state(path, state):
+    """
+    Iterations to success of a tester log from its scanner state (see LogIndex.tester_outcome).
+    """
+    if state is None:
+        return (-1, f"Log file not found: {path}")
+    if state["last_status"] == "SUCCESS":
+        return (max(0, state["last_status_iteration"]), None)
+    if state["last_status"] == "ERROR":
+        return (-1, "Completed with status: ERROR")
+    return (-1, "SUCCESS/ERROR status not found")
+
+
+def duration_from_state(path, state):
+    """
+    Duration of a main log from its scanner state (see LogIndex.duration).
+    """
+    if state is None:
+        print(f"Warning: Log file not found: {path}")
+        return -1.0
+    first, last = parse_timestamp(state["first_timestamp"]), parse_timestamp(state["last_timestamp"])
+    if first is None:
+        print(f"Warning: Could not find timestamp in first line of {path}")
+        return -1.0
+    if last is None:
+        print(f"Warning: Could not find timestamp in last lines of {path}")
+        return -1.0
+    return (last - first).total_seconds()
+
+
+class LogIndex:
+    """
+    SQLite index of the tester and main.py logs of a log folder (logs/.log_index.sqlite).
+
+    update() reads only what was appended to each log since the previous update: every file
+    has a byte-offset watermark and the saved scanner state. A file that shrank or whose first
+    bytes changed was rewritten and is indexed again from the start. result.py and the plot
+    scripts query the index instead of parsing the logs themselves.
+    """
+
+    def __init__(self, log_dir=LOG_DIR, index_path=None):
+        self.log_dir = log_dir
+        self.index_path = index_path or os.path.join(log_dir, INDEX_FILE)
+        os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.index_path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def discover(self):
+        """
+        Returns {path: (kind, run id, stat)} of the log files of the folder.
+        """
+        found = {}
+        try:
+            entries = list(os.scandir(self.log_dir))
+        except FileNotFoundError:
+            return found
+        for entry in entries:
+            kind = log_kind(entry.name) if entry.is_file() else None
+            if kind:
+                run_id = int(RUN_ID_PATTERN.search(entry.name).group(1))
+                found[os.path.join(self.log_dir, entry.name)] = (kind, run_id, entry.stat())
+        return found
+
+    @staticmethod
+    def read_head(path, size=256):
+        with open(path, "rb") as file:
+            return file.read(size).hex()
+
+    def update(self, rebuild=False, jobs=1):
+        """
+        Brings the index up to date with the log folder. With jobs > 1, the files to read are
+        scanned in that many processes; the index is written in file name order either way.
+
+        Returns:
+            dict: Number of files, files read, bytes read and scan time.
+        """
+        start = time.perf_counter()
+        known = {row[0]: row[1:] for row in self.conn.execute("SELECT path, size, mtime_ns, head, watermark, state FROM files")}
+        found = self.discover()
+        stats = {"files": len(found), "scanned": 0, "bytes": 0, "jobs": jobs}
+        with self.conn:
+            for path in set(known) - set(found):
+                self.forget(path)
+            work = []
+            for path, (kind, run_id, stat) in sorted(found.items()):
+                previous = known.get(path)
+                if previous and json.loads(previous[4]).get("version") != SCANNER_VERSION:
+                    previous = None  # Indexed by an older scanner
+                if previous and not rebuild and previous[0] == stat.st_size and previous[1] == stat.st_mtime_ns:
+                    continue
+                head = self.read_head(path)
+                state, watermark = None, 0
+                # Appended to since the last update: same first bytes and not shorter than the watermark
+                if previous and not rebuild and stat.st_size >= previous[3] and head.startswith(previous[2]):
+                    state, watermark = json.loads(previous[4]), previous[3]
+                else:
+                    self.forget(path)
+                work.append((path, kind, run_id, stat, head, state, watermark))
+
+            if jobs > 1 and len(work) > 1:
+                executor = ProcessPoolExecutor(max_workers=jobs)
+                # map() returns the results in submission order, so the merge is deterministic
+                scans = executor.map(scan_log, *zip(*[(w[0], w[5], w[6]) for w in work]), chunksize=chunk_size(work, jobs))
+            else:
+                executor = None
+                scans = (self._scan_into_index(w[0], w[5], w[6]) for w in work)
+            try:
+                for (path, kind, run_id, stat, head, _, _), (watermark, read, state, events) in zip(work, scans):
+                    self._insert_events(path, events)
+                    self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                      (path, kind, run_id, stat.st_size, stat.st_mtime_ns, head, watermark,
+                                       json.dumps(state)))
+                    stats["scanned"] += 1
+                    stats["bytes"] += read
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+        stats["seconds"] = time.perf_counter() - start
+        return stats
+
+    def _insert_events(self, path, events):
+        self.conn.executemany("INSERT INTO events (path, line, kind, iteration, value) VALUES (?, ?, ?, ?, ?)",
+                              [(path, *event) for event in events])
+
+    def _scan_into_index(self, path, state, watermark):
+        # In-process scan: events are inserted block by block instead of kept in memory
+        scanner = LogScanner(state)
+        with open(path, "rb") as file:
+            watermark, read = scanner.scan(file, watermark, lambda events: self._insert_events(path, events))
+        return watermark, read, scanner.state, scanner.events
+
+    def forget(self, path):
+        self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+        self.conn.execute("DELETE FROM events WHERE path = ?", (path,))
+
+    def latest_logs(self, kind):
+        """
+        Returns {run id: path} with the latest log of each run id (by file name, as the
+        timestamp is in the name).
+        """
+        latest = {}
+        for path, run_id in self.conn.execute("SELECT path, run_id FROM files WHERE kind = ? ORDER BY path", (kind,)):
+            latest[run_id] = path
+        return latest
+
+    def state(self, path):
+        """
+        Returns the scanner state of a log, including its last line without a newline.
+        """
+        row = self.conn.execute("SELECT state FROM files WHERE path = ?", (path,)).fetchone()
+        return complete_state(json.loads(row[0]))[0] if row else None
+
+    def states(self, kind):
+        """
+        Returns {path: scanner state} of every log of a kind, in one query.
+        """
+        rows = self.conn.execute("SELECT path, state FROM files WHERE kind = ?", (kind,))
+        return {path: complete_state(json.loads(state))[0] for path, state in rows}
+
+    def all_errors(self, solution_name):
+        """
+        Returns {path: [(first line, line number), ...]} of every log, as errors() per path, in one query.
+        """
+        rows = list(self.conn.execute("SELECT path, line, value FROM events WHERE kind = 'error'"))
+        for path, state in self.conn.execute("SELECT path, state FROM files"):
+            rows += [(path, line, value) for line, kind, _, value in complete_state(json.loads(state))[1] if kind == "error"]
+        errors = {}
+        for path, line, value in sorted(rows):
+            name, text = json.loads(value)
+            if name == solution_name:
+                errors.setdefault(path, []).append((text, line))
+        return errors
+
+    def events(self, path, kind=None):
+        """
+        Returns (line, kind, iteration, value) of the events of a log, including those of its
+        last line without a newline.
+        """
+        query = "SELECT line, kind, iteration, value FROM events WHERE path = ?"
+        params = [path]
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        rows = self.conn.execute(query, params).fetchall()
+        row = self.conn.execute("SELECT state FROM files WHERE path = ?", (path,)).fetchone()
+        if row:
+            rows += [event for event in complete_state(json.loads(row[0]))[1] if not kind or event[1] == kind]
+        return sorted(rows, key=lambda event: event[0])
+
+    def tester_outcome(self, path):
+        """
+        Iterations to success of a tester log, from its last status line.
+
+        Returns:
+            tuple[int, str | None]: Same as parse_log_file of the plot scripts: (iterations, None)
+            when the last status is SUCCESS, (-1, reason) otherwise.
+        """
+        return outcome_from_state(path, self.state(path))
+
+    def errors(self, path, solution_name):
+        """
+        Returns (first line, line number) of each run output of `solution_name` ending with status ERROR.
+        """
+        errors = []
+        for line, _, _, value in self.events(path, "error"):
+            name, text = json.loads(value)
+            if name == solution_name:
+                errors.append((text, line))
+        return errors
+
+    def duration(self, path):
+        """
+        Seconds between the first line timestamp and the last timestamped line, -1.0 if either is missing.
+        """
+        return duration_from_state(path, self.state(path))
+
+
+def open_index(log_dir=LOG_DIR, rebuild=False, jobs=1):
+    """
+    Opens the index of a log folder and brings it up to date.
+    """
+    index = LogIndex(log_dir)
+    stats = index.update(rebuild=rebuild, jobs=jobs)
+    print(f"Log index: {stats['files']} log file(s), {stats['scanned']} scanned.")
+    report_throughput("Indexed", stats["scanned"], stats["bytes"], stats["seconds"], jobs)
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update the index of the tester and main.py logs and summarize it.")
+    parser.add_argument("--log-dir", default=LOG_DIR, help=f"Log folder (default: {LOG_DIR}).")
+    parser.add_argument("--rebuild", action="store_true", help="Index every log again from the start.")
+    parser.add_argument("--jobs", type=int, default=1, help="Processes scanning the logs (default: 1).")
+    args = parser.parse_args()
+
+    index = open_index(args.log_dir, args.rebuild, args.jobs)
+    for run_id, path in sorted(index.latest_logs("tester").items()):
+        iterations, error_msg = index.tester_outcome(path)
+        outcome = f"SUCCESS after {iterations} iteration(s)" if iterations >= 0 else f"FAILURE ({error_msg})"
+        print(f"Run {run_id}: {os.path.basename(path)}: {outcome}, {len(index.events(path, 'error'))} error run(s)")
+    index.close()
@@ -0,0 +1,54 @@
+# log_reader.py
+
+import os
+
+BLOCK_SIZE = 64 * 1024
+
+
+def _split_lines(data):
+    # Universal newlines, like reading in text mode: \n, \r\n and a lone \r end a line
+    return data.replace(b"\r\n", b"\n").replace(b"\r", b"\n").split(b"\n")
+
+
+def reverse_lines(log_filepath, block_size=BLOCK_SIZE, encoding="utf-8"):
+    """
+    Yields the lines of a file from the last to the first, reading fixed-size blocks backwards
+    from the end, so answering "last occurrence" questions reads only the tail of a log.
+
+    Lines are yielded without their line ending; a trailing line ending does not produce an
+    empty last line (as with readlines()).
+    """
+    with open(log_filepath, "rb") as file:
+        position = file.seek(0, os.SEEK_END)
+        remainder = b""  # Start of the line that continues into the blocks read so far
+        first = True
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            file.seek(position)
+            data = file.read(read_size) + remainder
+            # A \r\n split across two blocks: keep the \r with the line it ends
+            if position > 0 and data.startswith(b"\n"):
+                file.seek(position - 1)
+                if file.read(1) == b"\r":
+                    position -= 1
+                    data = b"\r" + data
+            lines = _split_lines(data)
+            remainder = lines.pop(0)
+            if first:
+                first = False
+                if lines and lines[-1] == b"":
+                    lines.pop()
+            for line in reversed(lines):
+                yield line.decode(encoding, errors="replace")
+        if not first:
+            yield remainder.decode(encoding, errors="replace")
+
+
+def first_line(log_filepath, encoding="utf-8"):
+    """
+    Returns the first line of a file (without its line ending), or None if the file is empty.
+    """
+    with open(log_filepath, "r", encoding=encoding, errors="replace") as file:
+        line = file.readline()
+    return line.rstrip("\r\n") if line else None
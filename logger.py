@@ -38,14 +38,16 @@ logger.setLevel(logging.INFO) # Set level here
 _stream_handler = None
 _file_handler = None
 
-def setup_logging(run_id=None):
-    """Configures logging handlers and formatters. Call this early."""
+def setup_logging(run_id=None, console=None):
+    """Configures logging handlers and formatters. Call this early.
+
+    console is the stream of the console handler (stdout by default); JSON output modes pass stderr."""
     global _stream_handler, _file_handler
 
     # --- Stream Handler (Console Output) ---
     # Add stream handler only if it doesn't exist
     if _stream_handler is None and not any(isinstance(h, logging.StreamHandler) for h in logger.handlers):
-        _stream_handler = logging.StreamHandler(sys.stdout)
+        _stream_handler = logging.StreamHandler(console or sys.stdout)
         color_formatter = ColorFormatter("%(asctime)s [%(levelname)s] %(message)s")
         _stream_handler.setFormatter(color_formatter)
         logger.addHandler(_stream_handler)
@@ -79,5 +81,12 @@ def setup_logging(run_id=None):
     # Use the logger instance directly now
     logger.info(f"AIPyCraft logging configured. Log file: {log_path}")
 
+def log_to_file(message, level=logging.INFO):
+    """Writes a message to the log file only, e.g. solution output already echoed to the console."""
+    if _file_handler is None:
+        return
+    record = logger.makeRecord(logger.name, level, __file__, 0, message, None, None)
+    _file_handler.handle(record)
+
 # Note: No initial logging setup here anymore.
 # main.py MUST call setup_logging().
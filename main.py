@@ -4,7 +4,11 @@ import json
 import threading
 import os
 import shutil
+import sqlite3
 import argparse # Import argparse
+import sys
+import contextlib
+from dataclasses import asdict
 from dotenv import load_dotenv
 from colorama import init, Fore, Style
 # Import the setup function AND the logger instance
@@ -21,6 +25,11 @@ from solution_feature_adding import SolutionFeatureAdding
 from solution_importer import SolutionImporter
 from solution_updater import SolutionUpdater
 from component_corrector import ComponentCorrector # Added import
+from solution_catalog import SolutionCatalog
+from interpreter_pool import InterpreterPool
+from multi_runner import MultiSolutionRunner, parse_selection
+from session import Session, SessionError
+import event_stream
 
 # Load environment variables from .env file
 load_dotenv()
@@ -32,16 +41,79 @@ init(autoreset=True)
 # Use a distinct name for the parser to avoid conflicts if other modules use argparse
 main_parser = argparse.ArgumentParser(description="AIPyCraft Main Application")
 main_parser.add_argument("--run-id", type=int, default=None, help="Optional unique ID for this specific run (used for log filename).")
+main_parser.add_argument("--warm-pool", action="store_true", help="Run solutions by forking from warm per-venv interpreters (POSIX only).")
+main_parser.add_argument("--run-timeout", type=float, default=0, help="Kill a running solution after this many seconds (default: 0, disabled).")
+main_parser.add_argument("--idle-timeout", type=float, default=0, help="Kill a running solution that prints nothing for this many seconds (0 disables).")
+main_parser.add_argument("--sample-memory", type=float, default=0, help="Sample the RSS of running solutions every N seconds (0 disables).")
+main_parser.add_argument("--no-run-cache", action="store_true", help="Always execute solutions, even when nothing changed since a cached run.")
+main_parser.add_argument("--run-workers", type=int, default=None, help="Number of solutions run concurrently when running several at once (option 4 with 'all' or '1,3').")
+main_parser.add_argument("--wheelhouse", default=None, help="Install solution environments offline from this wheel folder (default: $AIPYCRAFT_WHEELHOUSE).")
+main_parser.add_argument("--events-fd", type=int, default=None, help="Write JSON-lines events (operations, status, tokens, component changes) to this inherited file descriptor.")
+main_parser.add_argument("--events-socket", default=None, help="Write JSON-lines events to this socket ('host:port' or a Unix socket path).")
+main_parser.add_argument("--events-file", default=None, help="Append JSON-lines events to this file.")
+# Headless commands (see session.py): python main.py run --solutions-folder <folder> --solution toml1 --json
+command_parsers = main_parser.add_subparsers(dest="command", help="Run one operation without the interactive menu.")
+for command_name, command_help in [("load", "Load a solution."), ("run", "Run a solution."),
+                                   ("correct", "Correct a single component with the AI."),
+                                   ("install", "Install the environment of a solution."), ("export", "Export a solution to TOML.")]:
+    command_parser = command_parsers.add_parser(command_name, help=command_help)
+    command_parser.add_argument("--solutions-folder", required=True, help="Path to the solutions folder.")
+    command_parser.add_argument("--solution", required=True, help="Name of the solution.")
+    command_parser.add_argument("--json", action="store_true", help="Print the result as JSON on stdout (other output goes to stderr).")
+    if command_name == "correct":
+        command_parser.add_argument("--component", required=True, help="Component file to correct (e.g. config.toml).")
+        command_parser.add_argument("--prompt", default="", help="Instructions for the AI.")
+    elif command_name == "install":
+        command_parser.add_argument("--method", choices=["pip", "conda"], default="pip", help="Installation method.")
+    elif command_name == "export":
+        command_parser.add_argument("--output-dir", default="exports", help="Folder of the exported TOML file.")
 # Use parse_known_args() in case other args are passed unexpectedly
 main_args, unknown_args = main_parser.parse_known_args()
+json_output = getattr(main_args, "json", False)
 
 # --- Configure Logging ---
 # Call this *before* the first log message. Pass the parsed run_id.
-setup_logging(run_id=main_args.run_id)
+setup_logging(run_id=main_args.run_id, console=sys.stderr if json_output else None)
 # Now it's safe to log the program start
 logger.info("AIPyCraft program started.")
 if unknown_args:
     logger.warning(f"Unknown arguments received by main.py: {unknown_args}")
+if main_args.events_fd is not None or main_args.events_socket or main_args.events_file:
+    event_stream.configure(main_args.events_fd, main_args.events_socket, main_args.events_file)
+
+
+def runner_options():
+    return {
+        "interpreter_pool": InterpreterPool() if main_args.warm_pool else None,
+        "timeout": main_args.run_timeout,
+        "idle_timeout": main_args.idle_timeout,
+        "sample_interval": main_args.sample_memory,
+        "use_run_cache": not main_args.no_run_cache,
+    }
+
+
+def run_command(args):
+    """
+    Runs one headless command through a Session.
+
+    Returns:
+        dict: The typed result of the operation as a dict.
+    """
+    session = Session(args.solutions_folder, runner_options(), main_args.wheelhouse)
+    try:
+        if args.command == "load":
+            result = session.load(args.solution)
+        elif args.command == "run":
+            result = session.run(args.solution)
+        elif args.command == "correct":
+            result = session.correct_component(args.solution, args.component, args.prompt)
+        elif args.command == "install":
+            result = session.install(args.solution, args.method)
+        else:
+            result = session.export(args.solution, args.output_dir)
+    finally:
+        session.close()
+    return asdict(result)
 
 
 class Dispatcher:
@@ -50,14 +122,30 @@ class Dispatcher:
         self.solutions = []
         self.current_solution = None
         self.solution_loader = SolutionLoader(solutions_folder)
-        self.solution_runner = SolutionRunner()
+        self.runner_options = runner_options()
+        self.solution_runner = SolutionRunner(**self.runner_options)
         self.solution_displayer = SolutionDisplayer(self.solutions)
-        self.script_generator = InstallationScriptGenerator(solutions_folder)
+        self.script_generator = InstallationScriptGenerator(solutions_folder, main_args.wheelhouse)
         self.solution_correcting = SolutionCorrecting()
         self.solution_feature_adding = SolutionFeatureAdding()
         self.solution_importer = SolutionImporter(solutions_folder)
         self.solution_updater = SolutionUpdater()
         self.component_corrector = ComponentCorrector() # Added instance
+        self.catalog = None # SolutionCatalog, opened on first use (see catalog_call)
+
+    def catalog_call(self, method, *args, **kwargs):
+        """
+        Calls a SolutionCatalog method, opening the catalog on first use. A missing or locked
+        catalog prints an error and returns None instead of leaving the menu.
+        """
+        try:
+            if self.catalog is None:
+                self.catalog = SolutionCatalog(self.solutions_folder)
+            return getattr(self.catalog, method)(*args, **kwargs)
+        except (sqlite3.Error, OSError) as e:
+            print(Fore.RED + f"Solution catalog error: {e}")
+            logger.error(f"Solution catalog error ({method}): {e}")
+            return None
 
     def run(self):
         logger.info("Main menu started.")
@@ -77,20 +165,24 @@ class Dispatcher:
             print(Fore.LIGHTWHITE_EX + "13. Export current solution to TOML") # Renumbered
             print(Fore.BLUE + "14. List existing projects") # Renumbered
             print(Fore.RED + "15. Exit") # Renumbered
+            event_stream.emit("prompt", name="menu")
             choice = input("Enter your choice (1-15): ") # Updated range
 
             logger.info(f"User selected option: {choice}")
 
             if choice == '1':
                 solution_to_be_loaded = input("Enter the name of the solution to be loaded: ")
-                file_path = os.path.join(self.solutions_folder, solution_to_be_loaded)
-                solution = self.solution_loader.load_solution(solution_to_be_loaded, file_path)
-                if solution:
-                    logger.info(f"Solution loaded: {solution_to_be_loaded}")
-                    self.solutions.append(solution)
-                    self.current_solution = solution
-                else:
-                    logger.warning(f"Failed to load solution: {solution_to_be_loaded}")
+                with event_stream.operation("load", solution=solution_to_be_loaded) as op:
+                    # Resolve the folder from the catalog, falling back to the default layout
+                    file_path = self.catalog_call("find", solution_to_be_loaded) or os.path.join(self.solutions_folder, solution_to_be_loaded)
+                    solution = self.solution_loader.load_solution(solution_to_be_loaded, file_path)
+                    if solution:
+                        logger.info(f"Solution loaded: {solution_to_be_loaded}")
+                        self.solutions.append(solution)
+                        self.current_solution = solution
+                    else:
+                        logger.warning(f"Failed to load solution: {solution_to_be_loaded}")
+                        op.update(status="ERROR", reason=f"Solution could not be loaded from {file_path}")
 
             elif choice == '2':
                 solution_creator = SolutionCreator(self.solutions_folder)
@@ -114,7 +206,9 @@ class Dispatcher:
                             if 0 <= index < len(self.solutions):
                                 selected_solution = self.solutions[index]
                                 logger.info(f"Installing environment for: {selected_solution.name}")
-                                self.script_generator.generate_installation_scripts(selected_solution)
+                                with event_stream.operation("install", solution=selected_solution.name) as op:
+                                    environment = self.script_generator.generate_installation_scripts(selected_solution)
+                                    op.update(status="SUCCESS" if environment else "ERROR", environment=environment)
                                 break
                         except ValueError:
                             pass
@@ -125,16 +219,33 @@ class Dispatcher:
                 else:
                     for i, solution in enumerate(self.solutions, start=1):
                         print(Fore.YELLOW + f"{i}. {solution.name}")
+                    print(Style.DIM + "Enter 'all' or a list such as 1,3 or 2-4 to run several solutions concurrently.")
                     while True:
                         choice = input("Enter the number of the solution to run (or 'q' to quit): ")
                         if choice.lower() == 'q':
                             break
+                        selection = parse_selection(choice, len(self.solutions))
+                        if selection is not None:
+                            selected_solutions = [self.solutions[index] for index in selection]
+                            logger.info(f"Running solutions concurrently: {', '.join(s.name for s in selected_solutions)}")
+                            with event_stream.operation("run_many", solutions=[s.name for s in selected_solutions]) as op:
+                                multi_runner = MultiSolutionRunner(self.solutions_folder, main_args.run_workers, **self.runner_options)
+                                report = multi_runner.run(selected_solutions)
+                                for selected_solution in selected_solutions:
+                                    self.catalog_call("record_run", selected_solution)
+                                op.update(status="SUCCESS" if all(s.status == 'SUCCESS' for s in selected_solutions) else "ERROR",
+                                          report=report['report_path'])
+                            logger.info(f"Concurrent run finished, report: {report['report_path']}")
+                            break
                         try:
                             index = int(choice) - 1
                             if 0 <= index < len(self.solutions):
                                 selected_solution = self.solutions[index]
                                 logger.info(f"Running solution: {selected_solution.name}")
-                                self.solution_runner.run_solution(selected_solution)
+                                with event_stream.operation("run", solution=selected_solution.name) as op:
+                                    self.solution_runner.run_solution(selected_solution)
+                                    self.catalog_call("record_run", selected_solution)
+                                    op.update(self.solution_runner.run_summary(selected_solution))
                                 break
                         except ValueError:
                             pass
@@ -166,7 +277,8 @@ class Dispatcher:
                         if 0 <= index < len(self.solutions):
                             selected_solution = self.solutions[index]
                             logger.info(f"Correcting solution: {selected_solution.name}")
-                            self.solution_correcting.correct_solution(selected_solution)
+                            with event_stream.operation("correct_solution", solution=selected_solution.name):
+                                self.solution_correcting.correct_solution(selected_solution)
                             break
                     except ValueError:
                         pass
@@ -183,7 +295,8 @@ class Dispatcher:
                         if 0 <= index < len(self.solutions):
                             selected_solution = self.solutions[index]
                             logger.info(f"Applying alternative correction: {selected_solution.name}")
-                            self.solution_updater.update_solution(selected_solution)
+                            with event_stream.operation("alternative_correction", solution=selected_solution.name):
+                                self.solution_updater.update_solution(selected_solution)
                             break
                     except ValueError:
                         pass
@@ -200,7 +313,8 @@ class Dispatcher:
                         if 0 <= index < len(self.solutions):
                             selected_solution = self.solutions[index]
                             logger.info(f"Adding feature to solution: {selected_solution.name}")
-                            self.solution_feature_adding.add_feature_to_solution(selected_solution)
+                            with event_stream.operation("add_feature", solution=selected_solution.name):
+                                self.solution_feature_adding.add_feature_to_solution(selected_solution)
                             break
                     except ValueError:
                         pass
@@ -223,7 +337,8 @@ class Dispatcher:
                                 if any(f"{c.name}.{c.extension}" == component_name for c in selected_solution.components):
                                     user_prompt = input("Enter any specific instructions for the AI (or leave blank): ") # Ask for user prompt
                                     logger.info(f"Correcting component '{component_name}' in solution: {selected_solution.name} with user prompt: '{user_prompt}'")
-                                    self.component_corrector.update_solution(selected_solution, component_name, user_prompt) # Pass user_prompt
+                                    with event_stream.operation("correct_component", solution=selected_solution.name, component=component_name) as op:
+                                        op["changed"] = self.component_corrector.update_solution(selected_solution, component_name, user_prompt) # Pass user_prompt
                                 else:
                                     print(Fore.RED + f"Component '{component_name}' not found in solution '{selected_solution.name}'.")
                                 break # Exit inner loop after attempting correction or finding component invalid
@@ -264,7 +379,8 @@ class Dispatcher:
 
             elif choice == '13': # Renumbered
                 if self.current_solution:
-                    path = self.current_solution.export_solution_to_toml()
+                    with event_stream.operation("export", solution=self.current_solution.name) as op:
+                        path = op["path"] = self.current_solution.export_solution_to_toml()
                     logger.info(f"Solution exported to TOML at: {path}")
                     print(Fore.GREEN + Style.BRIGHT + f"TOML file saved: {path}")
                 else:
@@ -275,14 +391,18 @@ class Dispatcher:
                 logger.info("Listing existing projects with model.txt.")
                 print(Fore.BLUE + "\n--- Existing Projects (with model.txt) ---")
                 try:
-                    projects = [
-                        d for d in os.listdir(self.solutions_folder)
-                        if os.path.isdir(os.path.join(self.solutions_folder, d)) and
-                           os.path.isfile(os.path.join(self.solutions_folder, d, 'model.txt'))
-                    ]
+                    # Incremental refresh: only folders whose mtime changed are rescanned
+                    if self.catalog is None:
+                        self.catalog = SolutionCatalog(self.solutions_folder)
+                    self.catalog.refresh()
+                    search = input("Filter by name or status (leave blank for all): ").strip()
+                    if search.upper() in ('SUCCESS', 'ERROR', 'PENDING', 'PARTIAL'):
+                        projects = self.catalog.list(status=search)
+                    else:
+                        projects = self.catalog.list(search=search or None)
                     if projects:
                         for project in projects:
-                            print(Fore.YELLOW + f"- {project}")
+                            print(Fore.YELLOW + SolutionCatalog.format_row(project))
                     else:
                         print(Fore.YELLOW + "No projects with model.txt found in the solutions folder.")
                 except FileNotFoundError:
@@ -302,6 +422,23 @@ class Dispatcher:
 
 
 if __name__ == '__main__':
+    if main_args.command:
+        real_stdout = sys.stdout
+        # In JSON mode everything but the result goes to stderr, so stdout stays parseable
+        with contextlib.redirect_stdout(sys.stderr) if json_output else contextlib.nullcontext():
+            try:
+                command_result = run_command(main_args)
+            except SessionError as e:
+                logger.error(str(e))
+                command_result = {"error": str(e)}
+        if json_output:
+            print(json.dumps(command_result, indent=2), file=real_stdout)
+        else:
+            for key, value in command_result.items():
+                print(f"{key}: {value}")
+        logger.info("Program ended.")
+        sys.exit(1 if "error" in command_result else 0)
+
     api_config = {}
     solutions_folder = input("Enter the solutions folder path:")
     os.makedirs(solutions_folder, exist_ok=True)
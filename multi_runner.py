@@ -0,0 +1,169 @@
+# multi_runner.py
+
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from colorama import Fore, Style
+from solution_runner import SolutionRunner
+
+REPORTS_FOLDER = ".aipycraft_reports"
+
+_STATE_COLORS = {
+    "QUEUED": Style.DIM,
+    "RUNNING": Fore.LIGHTCYAN_EX,
+    "SUCCESS": Fore.GREEN,
+    "ERROR": Fore.LIGHTRED_EX,
+}
+
+
+def parse_selection(text, count):
+    """
+    Parses a multi-solution selection such as 'all', '1,3' or '2-4' into 0-based indexes.
+
+    Returns:
+        list[int] | None: Sorted indexes, or None if the text is not a multi selection.
+    """
+    text = text.strip().lower()
+    if text == "all":
+        return list(range(count))
+    if "," not in text and "-" not in text:
+        return None
+    indexes = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        try:
+            first, last = int(start), int(end or start)
+        except ValueError:
+            return None
+        if not (1 <= first <= last <= count):
+            return None
+        indexes.update(range(first - 1, last))
+    return sorted(indexes) or None
+
+
+class MultiSolutionRunner:
+    """
+    Runs several solutions concurrently with a bounded number of workers.
+
+    Each solution runs through a quiet SolutionRunner, so it keeps its own venv, process
+    group, timeouts, run cache and history. A status table is redrawn while the runs are
+    in progress and a JSON summary report is written to the solutions folder.
+    """
+
+    def __init__(self, solutions_folder, workers=None, refresh_interval=1.0, **runner_options):
+        self.solutions_folder = solutions_folder
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.refresh_interval = refresh_interval
+        runner_options["quiet"] = True
+        self.runner_options = runner_options
+        self._lock = threading.Lock()
+        self._states = {}
+
+    def _set_state(self, solution, state, **fields):
+        with self._lock:
+            self._states[solution.name].update(state=state, **fields)
+
+    def _run_one(self, solution):
+        self._set_state(solution, "RUNNING", started=time.monotonic())
+        try:
+            SolutionRunner(**self.runner_options).run_solution(solution)
+            state = solution.status if solution.status in ("SUCCESS", "ERROR") else "ERROR"
+        except Exception as e:
+            solution.status = "ERROR"
+            solution.result_description = f"Runner failed: {e}"
+            state = "ERROR"
+        self._set_state(solution, state, finished=time.monotonic())
+
+    def _table(self):
+        now = time.monotonic()
+        lines = []
+        with self._lock:
+            for name, info in self._states.items():
+                started, finished = info.get("started"), info.get("finished")
+                elapsed = (finished or now) - started if started else 0.0
+                color = _STATE_COLORS.get(info["state"], "")
+                lines.append(color + f"  {name:<40} {info['state']:<8} {elapsed:8.1f}s" + Style.RESET_ALL)
+            done = sum(1 for info in self._states.values() if info.get("finished"))
+        lines.append(Style.DIM + f"  {done}/{len(self._states)} finished" + Style.RESET_ALL)
+        return lines
+
+    def _render(self, stop):
+        # Redraw in place on a terminal; print only the final table when output is piped
+        interactive = sys.stdout.isatty()
+        drawn = 0
+        while not stop.wait(self.refresh_interval):
+            if not interactive:
+                continue
+            lines = self._table()
+            if drawn:
+                sys.stdout.write(f"\033[{drawn}F")
+            sys.stdout.write("\n".join(line + "\033[K" for line in lines) + "\n")
+            sys.stdout.flush()
+            drawn = len(lines)
+        if drawn:
+            sys.stdout.write(f"\033[{drawn}F")
+        print("\n".join(self._table()))
+
+    def run(self, solutions):
+        """
+        Runs the given solutions and returns the summary report.
+
+        Returns:
+            dict: Start time, total wall time and one entry per solution.
+        """
+        started_at = datetime.now()
+        start = time.monotonic()
+        with self._lock:
+            self._states = {solution.name: {"state": "QUEUED"} for solution in solutions}
+
+        print(Fore.LIGHTBLUE_EX + f"\nRunning {len(solutions)} solution(s) with {self.workers} worker(s)...\n" + Style.RESET_ALL)
+        stop = threading.Event()
+        renderer = threading.Thread(target=self._render, args=(stop,), daemon=True)
+        renderer.start()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(self._run_one, solutions))
+        stop.set()
+        renderer.join()
+
+        report = {
+            "started_at": started_at.isoformat(timespec="seconds"),
+            "wall_time": round(time.monotonic() - start, 3),
+            "workers": self.workers,
+            "solutions": [
+                {
+                    "name": solution.name,
+                    "status": solution.status,
+                    "execution_time": solution.execution_time,
+                    "resource_usage": solution.resource_usage,
+                }
+                for solution in solutions
+            ],
+        }
+        report["report_path"] = self.write_report(report)
+        self.print_summary(report)
+        return report
+
+    def write_report(self, report):
+        reports_folder = os.path.join(self.solutions_folder, REPORTS_FOLDER)
+        os.makedirs(reports_folder, exist_ok=True)
+        report_path = os.path.join(reports_folder, f"run_all_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        with open(report_path, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        return report_path
+
+    @staticmethod
+    def print_summary(report):
+        entries = report["solutions"]
+        succeeded = sum(1 for entry in entries if entry["status"] == "SUCCESS")
+        print(Fore.LIGHTMAGENTA_EX + f"\n{succeeded}/{len(entries)} solution(s) succeeded in {report['wall_time']:.1f}s." + Style.RESET_ALL)
+        for entry in entries:
+            color = Fore.GREEN if entry["status"] == "SUCCESS" else Fore.LIGHTRED_EX
+            print(color + f"- {entry['name']}: {entry['status']} ({entry['execution_time'] or 0:.2f}s)" + Style.RESET_ALL)
+        print(Style.DIM + f"Summary report: {report['report_path']}" + Style.RESET_ALL)
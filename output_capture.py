@@ -0,0 +1,299 @@
+# output_capture.py
+
+import codecs
+import gzip
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from colorama import Fore, Style
+from run_metrics import MemorySampler, rusage_to_dict
+
+RUNS_FOLDER = os.path.join(".aipycraft", "runs")
+KEEP_RUNS = 20
+CHUNK_SIZE = 64 * 1024
+
+
+class BoundedBuffer:
+    """
+    Keeps the first head_limit and the last tail_limit bytes written to it.
+    """
+
+    def __init__(self, head_limit=64 * 1024, tail_limit=64 * 1024):
+        self.head_limit = head_limit
+        self.tail_limit = tail_limit
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+
+    def write(self, data):
+        self.total += len(data)
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if data:
+            self.tail += data
+            # Trim lazily so the buffer is not shifted on every chunk
+            if len(self.tail) > 2 * self.tail_limit:
+                del self.tail[:-self.tail_limit]
+
+    @property
+    def truncated(self):
+        return self.total > len(self.head) + min(len(self.tail), self.tail_limit)
+
+    def text(self):
+        tail = bytes(self.tail[-self.tail_limit:]) if self.tail_limit else b""
+        if not self.truncated:
+            return (bytes(self.head) + tail).decode("utf-8", errors="replace")
+        omitted = self.total - len(self.head) - len(tail)
+        return (bytes(self.head).decode("utf-8", errors="replace")
+                + f"\n... [{omitted} bytes omitted, full output in the run folder] ...\n"
+                + tail.decode("utf-8", errors="replace"))
+
+
+class StreamCapture:
+    """
+    Consumer for one output stream: bounded buffer, gzip spill file and optional live tee.
+    """
+
+    def __init__(self, name, spill_path=None, tee=None, color="", log=None, head_limit=64 * 1024, tail_limit=64 * 1024):
+        self.name = name
+        self.buffer = BoundedBuffer(head_limit, tail_limit)
+        self.spill_path = spill_path
+        self.spill = gzip.open(spill_path, "wb", compresslevel=6) if spill_path else None
+        self.tee = tee
+        self.color = color
+        self.log = log
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial_line = ""
+
+    def feed(self, data):
+        self.buffer.write(data)
+        if self.spill is not None:
+            self.spill.write(data)
+        if self.tee is None and self.log is None:
+            return
+        text = self._decoder.decode(data)
+        if self.tee is not None and text:
+            self.tee.write(self.color + text + (Style.RESET_ALL if self.color else ""))
+            self.tee.flush()
+        if self.log is not None:
+            lines = (self._partial_line + text).split("\n")
+            self._partial_line = lines.pop()
+            for line in lines:
+                self.log(f"[{self.name}] {line.rstrip()}")
+
+    def close(self):
+        if self.log is not None and self._partial_line:
+            self.log(f"[{self.name}] {self._partial_line.rstrip()}")
+            self._partial_line = ""
+        if self.spill is not None:
+            self.spill.close()
+            self.spill = None
+
+
+class CaptureResult:
+    """
+    Outcome of a captured process run, shaped like subprocess.CompletedProcess.
+    """
+
+    def __init__(self, args, returncode, stdout, stderr, timed_out=None, stdout_bytes=0, stderr_bytes=0,
+                 truncated=False, run_folder=None, duration=0.0, usage=None, rss_samples=None):
+        self.args = args
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.timed_out = timed_out  # None, 'wall-clock' or 'idle'
+        self.stdout_bytes = stdout_bytes
+        self.stderr_bytes = stderr_bytes
+        self.truncated = truncated
+        self.run_folder = run_folder
+        self.duration = duration
+        self.usage = usage or {}  # CPU time, peak RSS and block I/O from rusage
+        self.rss_samples = rss_samples or []  # (seconds, RSS in KB) from MemorySampler
+
+
+def create_run_folder(solution_folder, keep=KEEP_RUNS):
+    """
+    Creates .aipycraft/runs/<timestamp> inside a solution folder and prunes the oldest runs.
+    """
+    runs_folder = os.path.join(solution_folder, RUNS_FOLDER)
+    os.makedirs(runs_folder, exist_ok=True)
+    run_folder = os.path.join(runs_folder, f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{os.getpid()}")
+    os.makedirs(run_folder)
+    runs = sorted(entry for entry in os.listdir(runs_folder) if os.path.isdir(os.path.join(runs_folder, entry)))
+    for old_run in runs[:-keep]:
+        shutil.rmtree(os.path.join(runs_folder, old_run), ignore_errors=True)
+    return run_folder
+
+
+def kill_process_group(process, force=False):
+    """
+    Signals a process and everything it started: SIGTERM first, SIGKILL when force is set.
+    """
+    if process.returncode is not None:
+        return
+    if os.name == 'nt':
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL if force else signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+
+
+def reap(process):
+    """
+    Non-blocking wait that also collects the resource usage of the child.
+
+    Popen.poll() would reap the child without its rusage, so on POSIX os.wait4() is used
+    and the exit code is stored on the Popen object.
+
+    Returns:
+        resource.struct_rusage | None: Usage of the exited child, or None.
+    """
+    if process.returncode is not None:
+        return None
+    if not hasattr(os, "wait4"):
+        process.poll()
+        return None
+    try:
+        pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+    except ChildProcessError:
+        process.poll()
+        return None
+    if pid == 0:
+        return None
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return rusage
+
+
+class OutputCapture:
+    """
+    Runs a process while pumping stdout and stderr concurrently.
+
+    Memory use is bounded: only the first and last head/tail bytes of each stream are kept,
+    the complete output is spilled to gzip files in the run folder. Output can be echoed live
+    to the console and to a log callback. The process runs in its own process group, which
+    is killed when the wall-clock timeout or the idle timeout (no output) expires.
+    """
+
+    def __init__(self, timeout=None, idle_timeout=None, head_limit=64 * 1024, tail_limit=64 * 1024, tee=True, log=None,
+                 sample_interval=None):
+        self.timeout = timeout or None
+        self.idle_timeout = idle_timeout or None
+        # Seconds between RSS samples of the running process; None disables sampling
+        self.sample_interval = sample_interval or None
+        self.head_limit = head_limit
+        self.tail_limit = tail_limit
+        self.tee = tee
+        self.log = log
+
+    def streams(self, run_folder=None):
+        """
+        Returns fresh (stdout, stderr) StreamCapture objects configured like this capture.
+        """
+        def spill(name):
+            return os.path.join(run_folder, f"{name}.log.gz") if run_folder else None
+        return (
+            StreamCapture("stdout", spill("stdout"), sys.stdout if self.tee else None, Fore.WHITE, self.log,
+                          self.head_limit, self.tail_limit),
+            StreamCapture("stderr", spill("stderr"), sys.stdout if self.tee else None, Fore.LIGHTRED_EX, self.log,
+                          self.head_limit, self.tail_limit),
+        )
+
+    @staticmethod
+    def result(args, returncode, stdout, stderr, timed_out=None, run_folder=None, duration=0.0, usage=None, rss_samples=None):
+        stdout.close()
+        stderr.close()
+        return CaptureResult(
+            args, returncode, stdout.buffer.text(), stderr.buffer.text(), timed_out,
+            stdout.buffer.total, stderr.buffer.total, stdout.buffer.truncated or stderr.buffer.truncated,
+            run_folder, duration, usage, rss_samples,
+        )
+
+    def run(self, command, cwd=None, env=None, run_folder=None):
+        """
+        Runs a command and captures its output.
+
+        Args:
+            command (list[str]): Program and arguments.
+            cwd (str): Working directory.
+            env (dict): Environment of the process.
+            run_folder (str): Folder receiving stdout.log.gz and stderr.log.gz, or None.
+
+        Returns:
+            CaptureResult: Exit code, bounded stdout/stderr text and timeout information.
+        """
+        stdout, stderr = self.streams(run_folder)
+        popen_args = {}
+        if os.name == 'nt':
+            popen_args["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            popen_args["start_new_session"] = True
+
+        start = time.monotonic()
+        process = subprocess.Popen(command, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **popen_args)
+        last_activity = [start]
+        tee_lock = threading.Lock()
+
+        def pump(pipe, capture):
+            with pipe:
+                for chunk in iter(lambda: pipe.read1(CHUNK_SIZE), b""):
+                    last_activity[0] = time.monotonic()
+                    with tee_lock:
+                        capture.feed(chunk)
+
+        pumps = [threading.Thread(target=pump, args=(process.stdout, stdout), daemon=True),
+                 threading.Thread(target=pump, args=(process.stderr, stderr), daemon=True)]
+        for thread in pumps:
+            thread.start()
+        sampler = MemorySampler(process.pid, self.sample_interval).start() if self.sample_interval else None
+
+        timed_out = None
+        kill_deadline = None
+        rusage = None
+        while True:
+            rusage = reap(process)
+            if process.returncode is not None:
+                break
+            now = time.monotonic()
+            if timed_out is None:
+                if self.timeout and now - start > self.timeout:
+                    timed_out = "wall-clock"
+                elif self.idle_timeout and now - last_activity[0] > self.idle_timeout:
+                    timed_out = "idle"
+                if timed_out:
+                    kill_process_group(process)
+                    kill_deadline = now + 2
+            elif kill_deadline is not None and now > kill_deadline:
+                # Still alive after SIGTERM
+                kill_process_group(process, force=True)
+                kill_deadline = None
+            time.sleep(0.05)
+        duration = time.monotonic() - start
+        if sampler is not None:
+            sampler.stop()
+
+        for thread in pumps:
+            # Orphans that escaped the process group could keep the pipes open
+            thread.join(timeout=5)
+        return self.result(command, process.returncode, stdout, stderr, timed_out, run_folder, duration,
+                           rusage_to_dict(rusage), sampler.samples if sampler else None)
+
+    def replay_files(self, args, returncode, stdout_path, stderr_path, timed_out=None, run_folder=None, duration=0.0, usage=None):
+        """
+        Captures output a process already wrote to files (used by the warm interpreter pool).
+        """
+        stdout, stderr = self.streams(run_folder)
+        for path, capture in ((stdout_path, stdout), (stderr_path, stderr)):
+            with open(path, "rb") as file:
+                for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+                    capture.feed(chunk)
+        return self.result(args, returncode, stdout, stderr, timed_out, run_folder, duration, usage)
@@ -4,13 +4,15 @@ import argparse
 import statistics
 import matplotlib.pyplot as plt
 import matplotlib.ticker as ticker # Import ticker
-import glob
 from collections import Counter
 import numpy as np # Import numpy
-from scipy import stats # Import scipy.stats
+from cumulative_stats import cumulative_mean_ci, CI_METHODS, BOOTSTRAP_RESAMPLES
+from log_index import open_index, latest_log_files, parse_in_parallel
+from log_reader import reverse_lines
 
 LOG_DIR = "logs"
 PLOT_DIR = "plots" # Define the output directory for plots
+MAX_TRIAL_MARKERS = 30 # Above this many plotted trials: CI band instead of error bars, automatic x-ticks
 
 def parse_log_file(log_filepath, solution_name, max_loops):
     """
@@ -29,6 +31,9 @@ def parse_log_file(log_filepath, solution_name, max_loops):
             - str | None: Error message "Completed with status: ERROR" if that specific
                           status line is found and success wasn't, otherwise None or
                           another error message (file not found, parse error, status unknown).
+
+    Only the tail of the log is read, from the end back to the last status line (and the loop
+    marker before it), in fixed-size blocks: memory use does not depend on the log size.
     """
     # Compile patterns
     loop_pattern = re.compile(r"--- Starting Correction Loop Iteration (\d+)/(\d+) ---")
@@ -36,53 +41,37 @@ def parse_log_file(log_filepath, solution_name, max_loops):
     error_pattern_string = "Solution completed with status: ERROR"
     ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
 
-    last_success_index = -1
-    last_error_index = -1
-
     try:
-        with open(log_filepath, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-
-        # Find the index of the LAST relevant status line using endswith
-        for idx, line in enumerate(lines):
+        # Read the log backwards from its end: the first status line met is the LAST one (using endswith)
+        lines = reverse_lines(log_filepath)
+        for line in lines:
             cleaned_line = ansi_escape.sub('', line).strip()
             if cleaned_line.endswith(success_pattern_string):
-                last_success_index = idx
-            elif cleaned_line.endswith(error_pattern_string):
-                last_error_index = idx
-
-        # Determine outcome based on which status appeared last
-        if last_success_index > last_error_index:
-            # Success is the final status. Find the iteration number before this line.
-            final_success_iter = -1
-            # Search backwards starting strictly *before* the success line index
-            for i in range(last_success_index - 1, -1, -1):
-                # Match loop pattern on the raw line content
-                loop_match = loop_pattern.search(lines[i]) # Search raw line for loop marker
-                if loop_match:
-                    final_success_iter = int(loop_match.group(1))
-                    break
-            # If success happened before loop 1 (or no loop marker found before it), iteration is 0
-            return (max(0, final_success_iter), None)
-
-        elif last_error_index > last_success_index:
-            # Error is the final status
-            return (-1, "Completed with status: ERROR")
-        elif last_error_index != -1:
-             # Only error was found, and it wasn't preceded by a later success
-             return (-1, "Completed with status: ERROR")
-        else:
-            # Neither SUCCESS nor ERROR status found in the log
-            return (-1, "SUCCESS/ERROR status not found")
+                # Success is the final status. Find the iteration number before this line
+                # by continuing backwards, strictly *before* the success line.
+                for previous_line in lines:
+                    loop_match = loop_pattern.search(previous_line) # Search raw line for loop marker
+                    if loop_match:
+                        return (max(0, int(loop_match.group(1))), None)
+                # If success happened before loop 1 (no loop marker found before it), iteration is 0
+                return (0, None)
+            if cleaned_line.endswith(error_pattern_string):
+                # Error is the final status
+                return (-1, "Completed with status: ERROR")
+        # Neither SUCCESS nor ERROR status found in the log
+        return (-1, "SUCCESS/ERROR status not found")
 
     except FileNotFoundError:
         return (-1, f"Log file not found: {log_filepath}")
     except Exception as e:
         return (-1, f"Error parsing log file {log_filepath}: {e}")
 
-def main(trials, loops_value, solution_name):
+def main(trials, loops_value, solution_name, use_index=True, jobs=1, ci_method="t", resamples=BOOTSTRAP_RESAMPLES):
     """
     Main function to analyze logs and generate plot.
+    The trial outcomes come from the log index (see log_index.py) unless use_index is False.
+    Logs are indexed or parsed in `jobs` processes.
+    Confidence intervals are Student t intervals, or bootstrap intervals with ci_method="bootstrap".
     """
     print(f"Analyzing logs for solution '{solution_name}' across {trials} trials (max loops per trial: {loops_value}).")
 
@@ -91,20 +80,13 @@ def main(trials, loops_value, solution_name):
     trial_results = {}
     parse_errors = 0
 
-    # Find relevant log files
-    log_pattern = os.path.join(LOG_DIR, f"tester_run_*_run*.log")
-    all_log_files = glob.glob(log_pattern)
-
-    run_id_to_log = {}
-    # Extract run_id and find the latest log for each run_id (if multiple exist)
-    for log_file in all_log_files:
-        match = re.search(r"_run(\d+)\.log$", log_file)
-        if match:
-            run_id = int(match.group(1))
-            # Keep only the latest log file if multiple exist for the same run_id
-            # (based on filename timestamp implicitly)
-            if run_id not in run_id_to_log or log_file > run_id_to_log[run_id]:
-                 run_id_to_log[run_id] = log_file
+    # Latest log for each run_id (based on filename timestamp implicitly)
+    index = open_index(LOG_DIR, jobs=jobs) if use_index else None
+    run_id_to_log = index.latest_logs("tester") if index else latest_log_files(LOG_DIR, "tester_run_")
+    if not index:
+        # Parse all the trial logs up front (in parallel with --jobs), results in trial order
+        trial_logs = [run_id_to_log[i] for i in range(1, trials + 1) if i in run_id_to_log]
+        parsed_outcomes = dict(zip(trial_logs, parse_in_parallel(parse_log_file, trial_logs, jobs, solution_name, loops_value)))
 
     # Process logs for the requested number of trials
     processed_trials_count = 0
@@ -114,7 +96,10 @@ def main(trials, loops_value, solution_name):
             processed_trials_count += 1
             print(f"Processing Trial {i}: {log_filepath}")
             # --- Modified to handle tuple return ---
-            iterations, error_msg = parse_log_file(log_filepath, solution_name, loops_value)
+            if index:
+                iterations, error_msg = index.tester_outcome(log_filepath)
+            else:
+                iterations, error_msg = parsed_outcomes[log_filepath]
             # Treat iteration 0 as success as well
             if iterations >= 0:
                 print(f"  -> Trial {i} Result: SUCCESS (Iterations: {iterations})")
@@ -130,6 +115,8 @@ def main(trials, loops_value, solution_name):
             parse_errors += 1 # Count missing files as errors
             trial_results[i] = -1 # Store -1 for missing log file
             parse_errors += 1 # Count missing files as errors
+    if index:
+        index.close()
 
     # --- Statistics ---
     # Success is now iterations >= 0
@@ -151,56 +138,28 @@ def main(trials, loops_value, solution_name):
          return # Exit if no data
 
     # --- Calculate Cumulative Statistics ---
-    trial_numbers_processed = sorted(trial_results.keys())
-    cumulative_trial_numbers_for_plot = []
-    cumulative_means = []
-    cumulative_ci_lowers = []
-    cumulative_ci_uppers = []
-    current_successful_iterations = []
-
-    for k in trial_numbers_processed: # Iterate through the processed trials in order
-        # CORRECTED: Include trials succeeding at iteration 0 (>= 0)
-        if trial_results[k] >= 0: # Consider successful trials (including 0 iterations)
-            current_successful_iterations.append(trial_results[k])
-
-        # Calculate stats if we have successful iterations
-        if current_successful_iterations:
-             mean_k = np.mean(current_successful_iterations)
-             cumulative_trial_numbers_for_plot.append(k) # Add trial number regardless of CI calc
-             cumulative_means.append(mean_k)
-
-             # Calculate CI only if we have at least 2 points
-             if len(current_successful_iterations) >= 2:
-                 sem_k = stats.sem(current_successful_iterations)
-                 df_k = len(current_successful_iterations) - 1
-                 confidence_level = 0.95
-                 # Calculate confidence interval using t-distribution
-                 # Handle potential division by zero or invalid df if sem is 0
-                 if sem_k > 0 and df_k > 0:
-                      ci_margin_k = sem_k * stats.t.ppf((1 + confidence_level) / 2., df_k)
-                      ci_lower_k = mean_k - ci_margin_k
-                      ci_upper_k = mean_k + ci_margin_k
-                 else: # If SEM is 0 (all values identical), CI is just the mean
-                      ci_lower_k = mean_k
-                      ci_upper_k = mean_k
-                 cumulative_ci_lowers.append(ci_lower_k)
-                 cumulative_ci_uppers.append(ci_upper_k)
-             else: # Only 1 point, append NaN for CI
-                 cumulative_ci_lowers.append(np.nan)
-                 cumulative_ci_uppers.append(np.nan)
-        # If trial_results[k] was < 0, we don't add to cumulative stats for this k,
-        # but the loop continues to the next trial number k.
+    # Running mean and 95% CI (NaN with a single success) of the successful iterations, all
+    # prefixes at once from cumulative sums (see cumulative_stats.py)
+    trial_numbers_processed = np.array(sorted(trial_results.keys()))
+    results_np = np.array([trial_results[k] for k in trial_numbers_processed])
+    successful = results_np >= 0 # Successful trials (including 0 iterations)
+    success_means, success_ci_lowers, success_ci_uppers = cumulative_mean_ci(
+        results_np[successful], method=ci_method, resamples=resamples)
+    # Every trial from the first success is plotted; a failed trial repeats the statistics
+    # of the successes before it
+    successes_so_far = np.cumsum(successful) - 1
+    plotted = successes_so_far >= 0
+    x_values = trial_numbers_processed[plotted]
 
     # --- Plotting ---
     # Make figure square
     plt.figure(figsize=(5, 3)) # Square figure
 
     # Prepare data for error bar plot
-    if cumulative_trial_numbers_for_plot:
-        x_values = np.array(cumulative_trial_numbers_for_plot)
-        means_np = np.array(cumulative_means)
-        ci_lowers_np = np.array(cumulative_ci_lowers)
-        ci_uppers_np = np.array(cumulative_ci_uppers)
+    if len(x_values) > 0:
+        means_np = success_means[successes_so_far[plotted]]
+        ci_lowers_np = success_ci_lowers[successes_so_far[plotted]]
+        ci_uppers_np = success_ci_uppers[successes_so_far[plotted]]
 
         # Calculate asymmetric error bars
         lower_error = np.where(np.isnan(ci_lowers_np), np.nan, means_np - ci_lowers_np)
@@ -215,13 +174,19 @@ def main(trials, loops_value, solution_name):
         means_valid = means_np[valid_indices]
         y_err_valid = y_err[:, valid_indices]
 
-        if len(x_values_valid) > 0:
+        ci_label = f'Mean Iterations (95% {"bootstrap " if ci_method == "bootstrap" else ""}CI)' # Adjusted label for this script
+        if 0 < len(x_values_valid) <= MAX_TRIAL_MARKERS:
             # Use plt.errorbar to plot mean markers and error bars (no connecting line)
             plt.errorbar(x_values_valid, means_valid, yerr=y_err_valid,
                          fmt='o', color='dodgerblue', # Circle markers only, blue color
                          ecolor='black', capsize=5, # Black error bars with caps
                          markersize=4, # Reduced marker size
-                         label='Mean Iterations (95% CI)') # Adjusted label for this script
+                         label=ci_label)
+        elif len(x_values_valid) > 0:
+            # Long experiments: mean line in a CI band (thousands of error bars are unreadable and slow to render)
+            plt.fill_between(x_values_valid, means_valid - y_err_valid[0], means_valid + y_err_valid[1],
+                             color='dodgerblue', alpha=0.3, linewidth=0)
+            plt.plot(x_values_valid, means_valid, color='dodgerblue', linewidth=1, label=ci_label)
         else:
              print("No valid data points with confidence intervals to plot.")
 
@@ -229,13 +194,16 @@ def main(trials, loops_value, solution_name):
     plt.xlabel("Trial Number", fontsize=12) # Font size from plot_total_test_time.py
     plt.ylabel("Iterations to Success", fontsize=12) # Font size from plot_total_test_time.py
     # Set x-ticks to only successful, valid trial numbers used in the cumulative plot
-    plt.xticks(cumulative_trial_numbers_for_plot)
+    if len(x_values) <= MAX_TRIAL_MARKERS:
+        plt.xticks(x_values)
+    else: # One tick per trial is unreadable (and slow to render) for long experiments
+        plt.gca().xaxis.set_major_locator(ticker.MaxNLocator(integer=True))
     plt.tick_params(axis='x', labelsize=11, rotation=45) # Font size from plot_total_test_time.py
     plt.tick_params(axis='y', labelsize=11) # Font size from plot_total_test_time.py
     plt.gca().yaxis.set_major_formatter(ticker.FormatStrFormatter('%.1f')) # Format Y-axis to 1 decimal place
     plt.grid(axis='y', linestyle='--', alpha=0.7)
     plt.ylim(bottom=0)
-    if cumulative_trial_numbers_for_plot and len(x_values_valid) > 0:
+    if len(x_values) > 0 and len(x_values_valid) > 0:
         plt.legend(fontsize=11) # Font size from plot_total_test_time.py
 
     # Add text for failure count
@@ -251,7 +219,7 @@ def main(trials, loops_value, solution_name):
     plot_filename = f"cumulativeinteractions-{solution_name}.pdf" # Changed filename format
     plot_filepath = os.path.join(PLOT_DIR, plot_filename) # Construct full path
 
-    plt.savefig(plot_filepath, format='pdf') # Save as PDF
+    plt.gcf().savefig(plot_filepath, format='pdf') # Save as PDF (Figure.savefig: without the extra canvas draw of plt.savefig)
     print(f"\nCumulative iterations plot saved to: {plot_filepath}")
     # plt.show() # Uncomment to display the plot interactively
 
@@ -272,6 +240,11 @@ if __name__ == "__main__":
     parser.add_argument("-Trials", type=int, required=True, help="The total number of trials (log files) to analyze.")
     parser.add_argument("-LoopsValue", type=int, required=True, help="The max number of loops per trial (used to indicate failure).")
     parser.add_argument("-SolutionName", type=str, required=True, help="The name of the solution analyzed.")
+    parser.add_argument("--no-index", action="store_true", help="Parse every log file instead of using the log index.")
+    parser.add_argument("--jobs", type=int, default=1, help="Processes indexing or parsing the logs (default: 1).")
+    parser.add_argument("--ci", choices=CI_METHODS, default="t", help="Confidence interval method: Student t (default) or percentile bootstrap.")
+    parser.add_argument("--bootstrap-resamples", type=int, default=BOOTSTRAP_RESAMPLES, help=f"Resamples of the bootstrap intervals (default: {BOOTSTRAP_RESAMPLES}).")
     args = parser.parse_args()
 
-    main(args.Trials, args.LoopsValue, args.SolutionName)
+    main(args.Trials, args.LoopsValue, args.SolutionName, use_index=not args.no_index, jobs=args.jobs,
+         ci_method=args.ci, resamples=args.bootstrap_resamples)
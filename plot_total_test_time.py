@@ -3,14 +3,17 @@ import re
 import argparse
 import statistics
 import matplotlib.pyplot as plt
-import glob
+import matplotlib.ticker as ticker
 from datetime import datetime
 import numpy as np
-from scipy import stats
+from cumulative_stats import cumulative_mean_ci, CI_METHODS, BOOTSTRAP_RESAMPLES
+from log_index import open_index, latest_log_files, parse_in_parallel
+from log_reader import reverse_lines, first_line
 
 LOG_DIR = "logs"
 PLOT_DIR = "plots" # Define the output directory for plots
 TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S,%f" # Format including milliseconds
+MAX_TRIAL_MARKERS = 30 # Above this many plotted trials: CI band instead of error bars, automatic x-ticks
 
 # --- Removed old check_trial_success function ---
 
@@ -32,6 +35,9 @@ def parse_log_file(log_filepath, solution_name, max_loops):
             - str | None: Error message "Completed with status: ERROR" if that specific
                           status line is found and success wasn't, otherwise None or
                           another error message (file not found, parse error, status unknown).
+
+    Only the tail of the log is read, from the end back to the last status line (and the loop
+    marker before it), in fixed-size blocks: memory use does not depend on the log size.
     """
     # Compile patterns
     loop_pattern = re.compile(r"--- Starting Correction Loop Iteration (\d+)/(\d+) ---")
@@ -39,44 +45,25 @@ def parse_log_file(log_filepath, solution_name, max_loops):
     error_pattern_string = "Solution completed with status: ERROR"
     ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
 
-    last_success_index = -1
-    last_error_index = -1
-
     try:
-        with open(log_filepath, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-
-        # Find the index of the LAST relevant status line using endswith
-        for idx, line in enumerate(lines):
+        # Read the log backwards from its end: the first status line met is the LAST one (using endswith)
+        lines = reverse_lines(log_filepath)
+        for line in lines:
             cleaned_line = ansi_escape.sub('', line).strip()
             if cleaned_line.endswith(success_pattern_string):
-                last_success_index = idx
-            elif cleaned_line.endswith(error_pattern_string):
-                last_error_index = idx
-
-        # Determine outcome based on which status appeared last
-        if last_success_index > last_error_index:
-            # Success is the final status. Find the iteration number before this line.
-            final_success_iter = -1
-            # Search backwards starting strictly *before* the success line index
-            for i in range(last_success_index - 1, -1, -1):
-                # Match loop pattern on the raw line content
-                loop_match = loop_pattern.search(lines[i]) # Search raw line for loop marker
-                if loop_match:
-                    final_success_iter = int(loop_match.group(1))
-                    break
-            # If success happened before loop 1 (or no loop marker found before it), iteration is 0
-            return (max(0, final_success_iter), None)
-
-        elif last_error_index > last_success_index:
-            # Error is the final status
-            return (-1, "Completed with status: ERROR")
-        elif last_error_index != -1:
-             # Only error was found, and it wasn't preceded by a later success
-             return (-1, "Completed with status: ERROR")
-        else:
-            # Neither SUCCESS nor ERROR status found in the log
-            return (-1, "SUCCESS/ERROR status not found")
+                # Success is the final status. Find the iteration number before this line
+                # by continuing backwards, strictly *before* the success line.
+                for previous_line in lines:
+                    loop_match = loop_pattern.search(previous_line) # Search raw line for loop marker
+                    if loop_match:
+                        return (max(0, int(loop_match.group(1))), None)
+                # If success happened before loop 1 (no loop marker found before it), iteration is 0
+                return (0, None)
+            if cleaned_line.endswith(error_pattern_string):
+                # Error is the final status
+                return (-1, "Completed with status: ERROR")
+        # Neither SUCCESS nor ERROR status found in the log
+        return (-1, "SUCCESS/ERROR status not found")
 
     except FileNotFoundError:
         return (-1, f"Log file not found: {log_filepath}")
@@ -94,62 +81,50 @@ def parse_log_for_duration(log_filepath):
 
     Returns:
         float: Total duration in seconds if successful, -1.0 otherwise.
+
+    Reads the first line and then the file backwards from its end up to the last timestamped
+    line, so memory use does not depend on the log size.
     """
     first_timestamp = None
     last_timestamp = None
 
     try:
-        with open(log_filepath, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            if not lines:
-                print(f"Warning: Log file is empty: {log_filepath}")
+        log_first_line = first_line(log_filepath)
+        if log_first_line is None:
+            print(f"Warning: Log file is empty: {log_filepath}")
+            return -1.0
+
+        # Extract timestamp from the first line
+        match_first = re.match(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3})", log_first_line)
+        if match_first:
+            try:
+                first_timestamp = datetime.strptime(match_first.group(1), TIMESTAMP_FORMAT)
+            except ValueError as e:
+                print(f"Warning: Could not parse timestamp in first line of {log_filepath}: {e}")
                 return -1.0
+        else:
+            print(f"Warning: Could not find timestamp in first line of {log_filepath}")
+            return -1.0
 
-            # Extract timestamp from the first line
-            first_line = lines[0]
-            match_first = re.match(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3})", first_line)
-            if match_first:
+        # Extract timestamp from the last line, searching backwards if it doesn't match immediately
+        for line_num, line in enumerate(reverse_lines(log_filepath)):
+            match_last = re.match(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3})", line)
+            if match_last:
                 try:
-                    first_timestamp = datetime.strptime(match_first.group(1), TIMESTAMP_FORMAT)
+                    last_timestamp = datetime.strptime(match_last.group(1), TIMESTAMP_FORMAT)
+                    break # Found the last timestamp
                 except ValueError as e:
-                    print(f"Warning: Could not parse timestamp in first line of {log_filepath}: {e}")
-                    return -1.0
-            else:
-                print(f"Warning: Could not find timestamp in first line of {log_filepath}")
-                return -1.0
-
-            # Extract timestamp from the last line
-            last_line = lines[-1]
-            match_last = re.match(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3})", last_line)
-            if match_last:
-                 try:
-                    # Handle potential trailing newline characters before parsing
-                    timestamp_str = match_last.group(1).strip()
-                    last_timestamp = datetime.strptime(timestamp_str, TIMESTAMP_FORMAT)
-                 except ValueError as e:
-                    print(f"Warning: Could not parse timestamp in last line of {log_filepath}: {e}")
-                    return -1.0 # Indicate parsing error
-            else:
-                # Fallback: search backwards if the last line doesn't match immediately
-                for line in reversed(lines):
-                    match_last_fallback = re.match(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3})", line)
-                    if match_last_fallback:
-                        try:
-                            last_timestamp = datetime.strptime(match_last_fallback.group(1), TIMESTAMP_FORMAT)
-                            break # Found the last timestamp
-                        except ValueError as e:
-                            continue # Try previous line if parse error
-                if not last_timestamp:
-                    print(f"Warning: Could not find timestamp in last lines of {log_filepath}")
-                    return -1.0 # Indicate failure to find last timestamp
-
-            # Calculate duration
-            if first_timestamp and last_timestamp:
-                duration = last_timestamp - first_timestamp
-                return duration.total_seconds()
-            else:
-                # This case should ideally not be reached due to earlier checks
-                return -1.0
+                    if line_num == 0:
+                        print(f"Warning: Could not parse timestamp in last line of {log_filepath}: {e}")
+                        return -1.0 # Indicate parsing error
+                    continue # Try previous line if parse error
+        if not last_timestamp:
+            print(f"Warning: Could not find timestamp in last lines of {log_filepath}")
+            return -1.0 # Indicate failure to find last timestamp
+
+        # Calculate duration
+        duration = last_timestamp - first_timestamp
+        return duration.total_seconds()
 
     except FileNotFoundError:
         print(f"Warning: Log file not found: {log_filepath}")
@@ -158,10 +133,13 @@ def parse_log_for_duration(log_filepath):
         print(f"Warning: Error parsing duration log file {log_filepath}: {e}")
         return -1.0 # Indicate general parsing error
 
-def main(trials, loops_value, solution_name):
+def main(trials, loops_value, solution_name, use_index=True, jobs=1, ci_method="t", resamples=BOOTSTRAP_RESAMPLES):
     """
     Main function to analyze logs and generate plot for total test time,
     considering only successful trials.
+    Outcomes and durations come from the log index (see log_index.py) unless use_index is False.
+    Logs are indexed or parsed in `jobs` processes.
+    Confidence intervals are Student t intervals, or bootstrap intervals with ci_method="bootstrap".
     """
     print(f"Analyzing total test time from logs for solution '{solution_name}' across {trials} trials (max loops: {loops_value}).")
 
@@ -172,30 +150,22 @@ def main(trials, loops_value, solution_name):
     skipped_failed_trials = 0
     processed_trials_count = 0
 
-    # Find relevant log files (AIPyCraft_main and tester logs)
-    main_log_pattern = os.path.join(LOG_DIR, f"AIPyCraft_main_*_run*.log")
-    tester_log_pattern = os.path.join(LOG_DIR, f"tester_run_*_run*.log")
-    all_main_logs = glob.glob(main_log_pattern)
-    all_tester_logs = glob.glob(tester_log_pattern)
-
-    main_run_id_to_log = {}
-    tester_run_id_to_log = {}
-
-    # Map run IDs to latest main logs
-    for log_file in all_main_logs:
-        match = re.search(r"_run(\d+)\.log$", log_file)
-        if match:
-            run_id = int(match.group(1))
-            if run_id not in main_run_id_to_log or log_file > main_run_id_to_log[run_id]:
-                 main_run_id_to_log[run_id] = log_file
-
-    # Map run IDs to latest tester logs
-    for log_file in all_tester_logs:
-        match = re.search(r"_run(\d+)\.log$", log_file)
-        if match:
-            run_id = int(match.group(1))
-            if run_id not in tester_run_id_to_log or log_file > tester_run_id_to_log[run_id]:
-                 tester_run_id_to_log[run_id] = log_file
+    # Map run IDs to the latest main and tester logs (AIPyCraft_main and tester logs)
+    index = open_index(LOG_DIR, jobs=jobs) if use_index else None
+    if index:
+        main_run_id_to_log = index.latest_logs("main")
+        tester_run_id_to_log = index.latest_logs("tester")
+    else:
+        main_run_id_to_log = latest_log_files(LOG_DIR, "AIPyCraft_main_")
+        tester_run_id_to_log = latest_log_files(LOG_DIR, "tester_run_")
+        # Parse the logs up front (in parallel with --jobs): outcomes first, then the durations
+        # of the successful trials, results in trial order
+        trial_numbers = [i for i in range(1, trials + 1) if i in tester_run_id_to_log]
+        tester_logs = [tester_run_id_to_log[i] for i in trial_numbers]
+        parsed_outcomes = dict(zip(tester_logs, parse_in_parallel(parse_log_file, tester_logs, jobs, solution_name, loops_value)))
+        main_logs = [main_run_id_to_log[i] for i in trial_numbers
+                     if parsed_outcomes[tester_run_id_to_log[i]][0] >= 0 and i in main_run_id_to_log]
+        parsed_durations = dict(zip(main_logs, parse_in_parallel(parse_log_for_duration, main_logs, jobs)))
 
     # Process logs for the requested number of trials
     for i in range(1, trials + 1):
@@ -208,7 +178,10 @@ def main(trials, loops_value, solution_name):
             continue # Skip this trial
 
         # Check if the trial was successful using the tester log (using parse_log_file now)
-        iterations, error_msg = parse_log_file(tester_log_filepath, solution_name, loops_value)
+        if index:
+            iterations, error_msg = index.tester_outcome(tester_log_filepath)
+        else:
+            iterations, error_msg = parsed_outcomes[tester_log_filepath]
 
         # Determine success based on iterations >= 0
         if iterations < 0:
@@ -221,7 +194,7 @@ def main(trials, loops_value, solution_name):
         processed_trials_count += 1 # Count only trials checked for duration
         if main_log_filepath:
             print(f"Processing Successful Trial {i} for duration: {main_log_filepath}")
-            duration = parse_log_for_duration(main_log_filepath)
+            duration = index.duration(main_log_filepath) if index else parsed_durations[main_log_filepath]
             trial_durations[i] = duration # Store duration or -1.0 for error
             if duration < 0:
                 duration_parse_errors += 1
@@ -229,6 +202,8 @@ def main(trials, loops_value, solution_name):
             print(f"Warning: Main log for successful Trial {i} not found. Cannot calculate duration.")
             trial_durations[i] = -1.0 # Mark as error if main log is missing for a successful trial
             duration_parse_errors += 1
+    if index:
+        index.close()
 
     # --- Statistics ---
     # Filter results to include only successful trials with valid durations
@@ -247,49 +222,18 @@ def main(trials, loops_value, solution_name):
          return # Exit if no data # Corrected indentation
 
     # --- Calculate Cumulative Statistics (based on successful trials with valid durations) ---
-    valid_trial_numbers_sorted = sorted(valid_durations.keys())
-    cumulative_trial_numbers_for_plot = []
-    cumulative_means = []
-    cumulative_ci_lowers = []
-    cumulative_ci_uppers = []
-    current_successful_valid_durations = []
-
-    for k in valid_trial_numbers_sorted: # Iterate through the successful trials with valid durations
-        current_successful_valid_durations.append(valid_durations[k])
-
-        # Calculate mean regardless of CI calculation
-        mean_k = np.mean(current_successful_valid_durations)
-        cumulative_trial_numbers_for_plot.append(k)
-        cumulative_means.append(mean_k)
-
-        # Calculate CI only if we have at least 2 points
-        if len(current_successful_valid_durations) >= 2:
-            sem_k = stats.sem(current_successful_valid_durations)
-            df_k = len(current_successful_valid_durations) - 1
-            confidence_level = 0.95
-            if sem_k > 0 and df_k > 0:
-                 ci_margin_k = sem_k * stats.t.ppf((1 + confidence_level) / 2., df_k)
-                 ci_lower_k = mean_k - ci_margin_k
-                 ci_upper_k = mean_k + ci_margin_k
-            else: # If SEM is 0 (all values identical), CI is just the mean
-                 ci_lower_k = mean_k
-                 ci_upper_k = mean_k
-            cumulative_ci_lowers.append(ci_lower_k)
-            cumulative_ci_uppers.append(ci_upper_k)
-        else: # Only 1 point, append NaN for CI
-             cumulative_ci_lowers.append(np.nan)
-             cumulative_ci_uppers.append(np.nan)
+    # Running mean and 95% CI (NaN for the first trial), all prefixes at once from cumulative
+    # sums (see cumulative_stats.py)
+    x_values = np.array(sorted(valid_durations.keys()))
+    means_np, ci_lowers_np, ci_uppers_np = cumulative_mean_ci(
+        [valid_durations[k] for k in x_values], method=ci_method, resamples=resamples)
 
     # --- Plotting ---
     # Make figure square
     plt.figure(figsize=(5, 3)) # Square figure
 
     # Prepare data for error bar plot
-    if cumulative_trial_numbers_for_plot:
-        x_values = np.array(cumulative_trial_numbers_for_plot)
-        means_np = np.array(cumulative_means)
-        ci_lowers_np = np.array(cumulative_ci_lowers)
-        ci_uppers_np = np.array(cumulative_ci_uppers)
+    if len(x_values) > 0:
 
         # Calculate asymmetric error bars
         lower_error = np.where(np.isnan(ci_lowers_np), np.nan, means_np - ci_lowers_np)
@@ -304,13 +248,19 @@ def main(trials, loops_value, solution_name):
         means_valid = means_np[valid_indices]
         y_err_valid = y_err[:, valid_indices]
 
-        if len(x_values_valid) > 0:
+        ci_label = f'Mean Duration (95% {"bootstrap " if ci_method == "bootstrap" else ""}CI)'
+        if 0 < len(x_values_valid) <= MAX_TRIAL_MARKERS:
             # Use plt.errorbar to plot mean markers and error bars (no connecting line)
             plt.errorbar(x_values_valid, means_valid, yerr=y_err_valid,
                          fmt='o', color='dodgerblue', # Circle markers only, blue color
                          ecolor='black', capsize=5, # Black error bars with caps
                          markersize=4, # Reduced marker size
-                         label='Mean Duration (95% CI)')
+                         label=ci_label)
+        elif len(x_values_valid) > 0:
+            # Long experiments: mean line in a CI band (thousands of error bars are unreadable and slow to render)
+            plt.fill_between(x_values_valid, means_valid - y_err_valid[0], means_valid + y_err_valid[1],
+                             color='dodgerblue', alpha=0.3, linewidth=0)
+            plt.plot(x_values_valid, means_valid, color='dodgerblue', linewidth=1, label=ci_label)
         else:
              print("No valid data points with confidence intervals to plot.")
 
@@ -318,12 +268,15 @@ def main(trials, loops_value, solution_name):
     plt.xlabel("Trial Number", fontsize=12) # Reduced font size
     plt.ylabel("Total Test Duration (s)", fontsize=12) # Reduced font size, Adjusted label
     # Set x-ticks to only successful, valid trial numbers used in the cumulative plot
-    plt.xticks(cumulative_trial_numbers_for_plot)
+    if len(x_values) <= MAX_TRIAL_MARKERS:
+        plt.xticks(x_values)
+    else: # One tick per trial is unreadable (and slow to render) for long experiments
+        plt.gca().xaxis.set_major_locator(ticker.MaxNLocator(integer=True))
     plt.tick_params(axis='x', labelsize=11, rotation=45) # Reduced font size
     plt.tick_params(axis='y', labelsize=11) # Reduced font size
     plt.grid(axis='y', linestyle='--', alpha=0.7)
     plt.ylim(bottom=0)
-    if cumulative_trial_numbers_for_plot and len(x_values_valid) > 0:
+    if len(x_values) > 0 and len(x_values_valid) > 0:
         plt.legend(fontsize=11) # Reduced font size
 
     # Add text for skipped/failed trial count
@@ -339,7 +292,7 @@ def main(trials, loops_value, solution_name):
     plot_filename = f"time-{solution_name}.pdf" # Changed filename format (already done in previous step, confirming)
     plot_filepath = os.path.join(PLOT_DIR, plot_filename)
 
-    plt.savefig(plot_filepath, format='pdf') # Save as PDF
+    plt.gcf().savefig(plot_filepath, format='pdf') # Save as PDF (Figure.savefig: without the extra canvas draw of plt.savefig)
     print(f"\nCumulative total time plot saved to: {plot_filepath}")
     # plt.show()
 
@@ -362,6 +315,11 @@ if __name__ == "__main__":
     # Add LoopsValue argument needed for success check
     parser.add_argument("-LoopsValue", type=int, required=True, help="The max number of loops per trial (used for success check).")
     parser.add_argument("-SolutionName", type=str, required=True, help="The name of the solution analyzed.")
+    parser.add_argument("--no-index", action="store_true", help="Parse every log file instead of using the log index.")
+    parser.add_argument("--jobs", type=int, default=1, help="Processes indexing or parsing the logs (default: 1).")
+    parser.add_argument("--ci", choices=CI_METHODS, default="t", help="Confidence interval method: Student t (default) or percentile bootstrap.")
+    parser.add_argument("--bootstrap-resamples", type=int, default=BOOTSTRAP_RESAMPLES, help=f"Resamples of the bootstrap intervals (default: {BOOTSTRAP_RESAMPLES}).")
     args = parser.parse_args()
 
-    main(args.Trials, args.LoopsValue, args.SolutionName)
+    main(args.Trials, args.LoopsValue, args.SolutionName, use_index=not args.no_index, jobs=args.jobs,
+         ci_method=args.ci, resamples=args.bootstrap_resamples)
@@ -0,0 +1,139 @@
+# pool_worker.py
+#
+# Warm parent process started by interpreter_pool.py with a solution's venv interpreter.
+# It must only depend on the standard library, because it runs inside the solution venv.
+#
+# Protocol (one JSON object per line):
+#   worker -> client  {"ready": true, "preloaded": [...], "failed": [...]}
+#   client -> worker  {"script": path, "cwd": caller working directory, "timeout": seconds or null}
+#   worker -> client  {"returncode": int, "stdout_path": path, "stderr_path": path, "timed_out": bool, "usage": {...}}
+
+import argparse
+import importlib
+import json
+import os
+import runpy
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+
+def preload(modules):
+    preloaded, failed = [], []
+    for module in modules:
+        try:
+            importlib.import_module(module)
+            preloaded.append(module)
+        except BaseException:
+            failed.append(module)
+    return preloaded, failed
+
+
+def run_child(script, cwd, stdout_fd, stderr_fd, protocol_fds):
+    # Runs in the forked child: detach from the protocol pipes and execute the script
+    os.setsid()
+    for fd in protocol_fds:
+        os.close(fd)
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.dup2(stdout_fd, 1)
+    os.dup2(stderr_fd, 2)
+    exit_code = 0
+    try:
+        os.chdir(cwd)
+        sys.path[0] = os.path.dirname(os.path.abspath(script))
+        sys.argv = [script]
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            exit_code = 0
+        elif isinstance(e.code, int):
+            exit_code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException:
+        traceback.print_exc()
+        exit_code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(exit_code)
+
+
+def serve(channel_in, channel_out):
+    for line in channel_in:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        stdout_fd, stdout_path = tempfile.mkstemp(prefix="aipycraft-stdout-")
+        stderr_fd, stderr_path = tempfile.mkstemp(prefix="aipycraft-stderr-")
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        pid = os.fork()
+        if pid == 0:
+            run_child(request["script"], request["cwd"], stdout_fd, stderr_fd,
+                      (channel_in.fileno(), channel_out.fileno()))
+
+        os.close(stdout_fd)
+        os.close(stderr_fd)
+        timeout = request.get("timeout")
+        deadline = time.monotonic() + timeout if timeout else None
+        timed_out = False
+        while True:
+            waited_pid, status, rusage = os.wait4(pid, os.WNOHANG)
+            if waited_pid == pid:
+                break
+            if deadline is not None and time.monotonic() > deadline:
+                timed_out = True
+                try:
+                    os.killpg(pid, signal.SIGKILL)
+                except OSError:
+                    pass
+                _, status, rusage = os.wait4(pid, 0)
+                break
+            time.sleep(0.01)
+        # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+        max_rss_kb = rusage.ru_maxrss // 1024 if sys.platform == "darwin" else rusage.ru_maxrss
+
+        channel_out.write(json.dumps({
+            "returncode": os.waitstatus_to_exitcode(status),
+            "stdout_path": stdout_path,
+            "stderr_path": stderr_path,
+            "timed_out": timed_out,
+            "usage": {
+                "user_time": round(rusage.ru_utime, 4),
+                "sys_time": round(rusage.ru_stime, 4),
+                "max_rss_kb": max_rss_kb,
+                "read_blocks": rusage.ru_inblock,
+                "write_blocks": rusage.ru_oublock,
+            },
+        }) + "\n")
+        channel_out.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm interpreter for AIPyCraft solution runs.")
+    parser.add_argument("--preload", default="", help="Comma separated modules to import before serving.")
+    args = parser.parse_args()
+
+    # Keep the protocol on private descriptors so preloaded modules printing to stdout cannot corrupt it
+    channel_in = os.fdopen(os.dup(0), "r")
+    channel_out = os.fdopen(os.dup(1), "w")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+
+    preloaded, failed = preload([m for m in args.preload.split(",") if m])
+    channel_out.write(json.dumps({"ready": True, "preloaded": preloaded, "failed": failed}) + "\n")
+    channel_out.flush()
+    serve(channel_in, channel_out)
+
+
+if __name__ == "__main__":
+    main()
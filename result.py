@@ -1,7 +1,6 @@
 import os
-import re
 import argparse
-import glob
+from log_index import open_index, latest_log_files, parse_in_parallel
 
 LOG_DIR = "logs"
 OUTPUT_FILE = "results.txt"
@@ -76,9 +75,11 @@ def extract_errors_from_log(log_filepath, solution_name):
 
     # No need for the extra return statement here anymore
 
-def main(trials, loops_value, solution_name):
+def main(trials, loops_value, solution_name, use_index=True, jobs=1):
     """
     Main function to find logs, extract errors, and write to results file.
+    The errors come from the log index (see log_index.py) unless use_index is False.
+    Logs are indexed or parsed in `jobs` processes.
     """
     print(f"Searching for runtime errors in logs for solution '{solution_name}' across {trials} trials.")
     print(f"(LoopsValue: {loops_value} - not directly used for error extraction but kept for consistency)")
@@ -87,19 +88,13 @@ def main(trials, loops_value, solution_name):
     processed_files_count = 0
     log_files_not_found = 0
 
-    # Find relevant log files using glob and then filter by run_id
-    log_pattern = os.path.join(LOG_DIR, f"tester_run_*_run*.log")
-    all_log_files = glob.glob(log_pattern)
-
-    run_id_to_log = {}
-    # Extract run_id and find the latest log for each run_id
-    for log_file in all_log_files:
-        match = re.search(r"_run(\d+)\.log$", log_file)
-        if match:
-            run_id = int(match.group(1))
-            # Keep only the latest log file if multiple exist for the same run_id
-            if run_id not in run_id_to_log or log_file > run_id_to_log[run_id]:
-                 run_id_to_log[run_id] = log_file
+    # Latest log for each run_id, from the index (updated with what was appended since the last analysis)
+    index = open_index(LOG_DIR, jobs=jobs) if use_index else None
+    run_id_to_log = index.latest_logs("tester") if index else latest_log_files(LOG_DIR, "tester_run_")
+    if not index:
+        # Parse all the trial logs up front (in parallel with --jobs), results in trial order
+        trial_logs = [run_id_to_log[i] for i in range(1, trials + 1) if i in run_id_to_log]
+        parsed_errors = dict(zip(trial_logs, parse_in_parallel(extract_errors_from_log, trial_logs, jobs, solution_name)))
 
     # Process logs for the requested number of trials
     for i in range(1, trials + 1):
@@ -107,7 +102,10 @@ def main(trials, loops_value, solution_name):
         if log_filepath:
             print(f"Processing Trial {i}: {log_filepath}")
             # errors_list now contains tuples of (line_content, line_number)
-            errors_list = extract_errors_from_log(log_filepath, solution_name)
+            if index:
+                errors_list = index.errors(log_filepath, solution_name)
+            else:
+                errors_list = parsed_errors[log_filepath]
             if errors_list:
                 print(f"  -> Found {len(errors_list)} relevant error line(s) in Trial {i}.")
                 # Add context and line number to each error before adding to the main list
@@ -119,6 +117,8 @@ def main(trials, loops_value, solution_name):
         else:
             print(f"Warning: Log file for Trial {i} not found.")
             log_files_not_found += 1
+    if index:
+        index.close()
 
     print(f"\n--- Extraction Summary ---")
     print(f"Total trials requested: {trials}")
@@ -145,6 +145,8 @@ if __name__ == "__main__":
     parser.add_argument("-Trials", type=int, required=True, help="The total number of trials (log files) to analyze.")
     parser.add_argument("-LoopsValue", type=int, required=True, help="The max number of loops per trial (parameter consistency).")
     parser.add_argument("-SolutionName", type=str, required=True, help="The name of the solution analyzed (parameter consistency).")
+    parser.add_argument("--no-index", action="store_true", help="Parse every log file instead of using the log index.")
+    parser.add_argument("--jobs", type=int, default=1, help="Processes indexing or parsing the logs (default: 1).")
     args = parser.parse_args()
 
-    main(args.Trials, args.LoopsValue, args.SolutionName)
+    main(args.Trials, args.LoopsValue, args.SolutionName, use_index=not args.no_index, jobs=args.jobs)
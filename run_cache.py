@@ -0,0 +1,159 @@
+# run_cache.py
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from colorama import Fore, Style
+from file_utils import atomic_write, sha256_bytes
+
+CACHE_FILE = os.path.join(".aipycraft", "run_cache.json")
+MAX_ENTRIES = 16
+
+
+def site_packages_folders(venv_path):
+    """
+    Returns the site-packages folders of a virtual environment (POSIX and Windows layouts).
+    """
+    folders = glob.glob(os.path.join(venv_path, "lib", "python*", "site-packages"))
+    folders += glob.glob(os.path.join(venv_path, "Lib", "site-packages"))
+    return sorted(folders)
+
+
+def environment_fingerprint(venv_path):
+    """
+    Hashes the interpreter of a venv and the set of distributions installed in it.
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(os.path.join(venv_path, "pyvenv.cfg"), "rb") as file:
+            digest.update(file.read())
+    except OSError:
+        pass
+    for folder in site_packages_folders(venv_path):
+        try:
+            names = sorted(name for name in os.listdir(folder) if name.endswith((".dist-info", ".egg-info", ".pth")))
+        except OSError:
+            continue
+        for name in names:
+            digest.update(name.encode("utf-8") + b"\0")
+    return digest.hexdigest()
+
+
+def solution_fingerprint(solution):
+    """
+    Merkle-style fingerprint of the component files of a solution.
+
+    Every component file on disk is a leaf hashed with its name; the root hashes the
+    sorted leaves, so it changes when any component is edited, added or removed.
+    Components missing on disk fall back to their in-memory content.
+    """
+    leaves = []
+    for component in solution.components:
+        file_name = f"{component.name}.{component.extension}"
+        try:
+            with open(os.path.join(solution.folder, file_name), "rb") as file:
+                data = file.read()
+        except OSError:
+            data = component.content.encode("utf-8")
+        leaves.append(sha256_bytes(file_name.encode("utf-8") + b"\0" + data))
+    return sha256_bytes("\n".join(sorted(leaves)).encode("ascii"))
+
+
+class RunCache:
+    """
+    Results of previous runs of a solution, keyed by the component fingerprint and the
+    environment fingerprint, stored in .aipycraft/run_cache.json.
+
+    Only deterministic solutions are served from the cache; a solution whose output
+    depends on time, randomness, the network or user input can be marked
+    nondeterministic with `python run_cache.py <solution folder> --nondeterministic`.
+    """
+
+    def __init__(self, solution_folder, max_entries=MAX_ENTRIES):
+        self.solution_folder = solution_folder
+        self.cache_path = os.path.join(solution_folder, CACHE_FILE)
+        self.max_entries = max_entries
+        self.data = self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            data = {}
+        data.setdefault("deterministic", True)
+        data.setdefault("entries", {})
+        return data
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        atomic_write(self.cache_path, json.dumps(self.data, indent=2).encode("utf-8"), fsync=False)
+
+    @property
+    def deterministic(self):
+        return self.data["deterministic"]
+
+    def set_deterministic(self, deterministic):
+        self.data["deterministic"] = deterministic
+        if not deterministic:
+            self.data["entries"] = {}
+        self.save()
+
+    @staticmethod
+    def key(solution, venv_path):
+        return f"{solution_fingerprint(solution)}:{environment_fingerprint(venv_path)}"
+
+    def lookup(self, key):
+        """
+        Returns the cached run for a key, or None.
+        """
+        if not self.deterministic:
+            return None
+        return self.data["entries"].get(key)
+
+    def store(self, key, status, returncode, stdout, stderr, resource_usage):
+        """
+        Records the result of a run, keeping only the most recent entries.
+        """
+        if not self.deterministic:
+            return
+        entries = self.data["entries"]
+        entries.pop(key, None)
+        entries[key] = {
+            "status": status,
+            "returncode": returncode,
+            "stdout": stdout,
+            "stderr": stderr,
+            "resource_usage": resource_usage,
+            "recorded_at": time.time(),
+        }
+        for old_key in list(entries)[:-self.max_entries]:
+            del entries[old_key]
+        self.save()
+
+    def clear(self):
+        self.data["entries"] = {}
+        self.save()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or configure the run cache of a solution.")
+    parser.add_argument("solution_folder", help="Path to the solution folder.")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--nondeterministic", action="store_true", help="Never serve runs of this solution from the cache.")
+    group.add_argument("--deterministic", action="store_true", help="Allow cached runs for this solution again.")
+    group.add_argument("--clear", action="store_true", help="Remove all cached runs.")
+    args = parser.parse_args()
+
+    cache = RunCache(args.solution_folder)
+    if args.nondeterministic or args.deterministic:
+        cache.set_deterministic(args.deterministic)
+    elif args.clear:
+        cache.clear()
+    print(Fore.YELLOW + f"Deterministic: {cache.deterministic}, cached runs: {len(cache.data['entries'])}" + Style.RESET_ALL)
+    for key, entry in cache.data["entries"].items():
+        recorded = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["recorded_at"]))
+        print(Style.DIM + f"- {key[:12]}... {entry['status']} (exit {entry['returncode']}), recorded {recorded}" + Style.RESET_ALL)
@@ -0,0 +1,184 @@
+# run_metrics.py
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from colorama import Fore, Style
+
+HISTORY_FILE = os.path.join(".aipycraft", "run_history.jsonl")
+
+
+def rusage_to_dict(rusage):
+    """
+    Converts a resource.struct_rusage of a child process to the fields kept per run.
+    """
+    if rusage is None:
+        return {}
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+    max_rss_kb = rusage.ru_maxrss // 1024 if sys.platform == "darwin" else rusage.ru_maxrss
+    return {
+        "user_time": round(rusage.ru_utime, 4),
+        "sys_time": round(rusage.ru_stime, 4),
+        "max_rss_kb": max_rss_kb,
+        "read_blocks": rusage.ru_inblock,
+        "write_blocks": rusage.ru_oublock,
+    }
+
+
+def components_digest(solution):
+    """
+    Returns a short hash of the component contents, so runs can be matched to code revisions.
+    """
+    digest = hashlib.sha256()
+    for component in sorted(solution.components, key=lambda c: c.name):
+        digest.update(f"{component.name}.{component.extension}\0{component.content}\0".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class MemorySampler:
+    """
+    Samples the resident set size of a process from /proc while it runs.
+
+    rusage only reports the peak RSS once the process has exited; the samples also show
+    how memory evolves. Sampling is a no-op where /proc is not available.
+    """
+
+    def __init__(self, pid, interval=0.2):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []  # (seconds since start, rss in KB)
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def supported():
+        return os.path.isdir("/proc/self")
+
+    def _read_rss_kb(self):
+        try:
+            with open(f"/proc/{self.pid}/status", "r") as file:
+                for line in file:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1])
+        except (OSError, ValueError, IndexError):
+            pass
+        return None
+
+    def _run(self):
+        start = time.monotonic()
+        while not self._stop.is_set():
+            rss = self._read_rss_kb()
+            if rss is not None:
+                self.samples.append((round(time.monotonic() - start, 3), rss))
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self.supported():
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    @property
+    def peak_kb(self):
+        return max((rss for _, rss in self.samples), default=None)
+
+
+class RunHistory:
+    """
+    Append-only history of the runs of one solution, stored as JSON lines in
+    .aipycraft/run_history.jsonl inside the solution folder.
+    """
+
+    def __init__(self, solution_folder):
+        self.history_path = os.path.join(solution_folder, HISTORY_FILE)
+
+    def append(self, record):
+        os.makedirs(os.path.dirname(self.history_path), exist_ok=True)
+        with open(self.history_path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record) + "\n")
+
+    def load(self, limit=None):
+        """
+        Returns the recorded runs, oldest first (only the last `limit` when given).
+        """
+        records = []
+        try:
+            with open(self.history_path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue  # Partially written line from an interrupted run
+        except OSError:
+            pass
+        return records[-limit:] if limit else records
+
+    @staticmethod
+    def build_record(solution, result, samples=None):
+        """
+        Creates the history record of one run from a CaptureResult.
+        """
+        record = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "status": solution.status,
+            "returncode": result.returncode,
+            "timed_out": result.timed_out,
+            "components": components_digest(solution),
+            "wall_time": round(result.duration, 4),
+            "stdout_bytes": result.stdout_bytes,
+            "stderr_bytes": result.stderr_bytes,
+        }
+        record.update(result.usage or {})
+        if samples:
+            record["sampled_peak_rss_kb"] = max(rss for _, rss in samples)
+            record["rss_samples"] = samples
+        return record
+
+    @staticmethod
+    def format_record(record, previous=None):
+        """
+        Returns a one line summary of a run, with changes relative to the previous run.
+        """
+        def delta(key, unit, scale=1.0):
+            value = record.get(key)
+            if value is None:
+                return None
+            text = f"{value * scale:.2f}{unit}" if isinstance(value, float) else f"{value}{unit}"
+            before = (previous or {}).get(key)
+            if before:
+                text += f" ({(value - before) / before * 100:+.0f}%)"
+            return text
+
+        parts = [f"wall {delta('wall_time', 's')}"]
+        for label, key, unit in (("user", "user_time", "s"), ("sys", "sys_time", "s"), ("peak RSS", "max_rss_kb", " KB"),
+                                 ("read blocks", "read_blocks", ""), ("write blocks", "write_blocks", "")):
+            text = delta(key, unit)
+            if text is not None:
+                parts.append(f"{label} {text}")
+        return ", ".join(parts)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the run history of a solution.")
+    parser.add_argument("solution_folder", help="Path to the solution folder.")
+    parser.add_argument("--last", type=int, default=20, help="Number of runs to show.")
+    args = parser.parse_args()
+
+    records = RunHistory(args.solution_folder).load()
+    shown = records[-args.last:]
+    offset = len(records) - len(shown)
+    for i, record in enumerate(shown):
+        previous = records[offset + i - 1] if offset + i > 0 else None
+        color = Fore.GREEN if record.get("status") == "SUCCESS" else Fore.LIGHTRED_EX
+        print(color + f"{record['timestamp']} [{record.get('status')}] {record.get('components')}: "
+              + RunHistory.format_record(record, previous) + Style.RESET_ALL)
@@ -0,0 +1,441 @@
+# scenario_runner.py
+
+import argparse
+import datetime
+import glob
+import os
+import re
+import sys
+import time
+import toml
+from colorama import Fore, Style, init
+from adaptive_timeout import AdaptiveTimeouts
+from logger import setup_logging, logger
+
+try:
+    import yaml  # Optional: only needed for .yaml/.yml scenarios
+except ImportError:
+    yaml = None
+
+init(autoreset=True)
+
+ACTIONS = {"load", "run", "correct", "install", "export", "loop_until_success"}
+SUCCESS_STATUS = "SUCCESS"
+ANSI_ESCAPE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+STATUS_PATTERN = re.compile(r"Solution completed with status: (\w+)")
+
+# main.py prompts driven by the pexpect backend (same as tester.py)
+PROMPT_FOLDER = r"Enter the solutions folder path:\s*"
+PROMPT_CHOICE = r"Enter your choice \(1-15\):\s*"
+PROMPT_LOAD_NAME = r"Enter the name of the solution to be loaded:\s*"
+PROMPT_INSTALL_SELECT = r"Enter the number of the solution to install the environment for \(or 'q' to quit\):\s*"
+PROMPT_INSTALL_METHOD = r"Select the installation method \(pip/conda/quit\):\s*"
+PROMPT_RUN_SELECT = r"Enter the number of the solution to run \(or 'q' to quit\):\s*"
+PROMPT_CORRECT_SELECT_SOLUTION = r"Enter the number of the solution containing the component to correct \(or 'q' to quit\):\s*"
+PROMPT_CORRECT_COMPONENT_NAME = r"Enter the name of the component to correct in '.*?' \(e.g., main.py\):\s*"
+PROMPT_CORRECT_INSTRUCTIONS = r"Enter any specific instructions for the AI \(or leave blank\):\s*"
+
+DEFAULT_TIMEOUTS = {"prompt": 60, "run": 70, "correct": 80, "install": 900}
+# Scenario step -> operation name of the duration history (adaptive_timeout.py) and main.py events
+OPERATIONS = {"run": "run", "correct": "correct_component", "install": "install"}
+# Printed by SolutionRunner instead of running the solution when its result is cached
+CACHED_RUN_MESSAGE = "using its cached result"
+
+
+class ScenarioError(Exception):
+    """
+    Raised for invalid scenario files and steps that cannot be performed.
+    """
+
+
+def validate_steps(steps, where="steps"):
+    if not isinstance(steps, list) or not steps:
+        raise ScenarioError(f"'{where}' must be a non-empty list of steps")
+    for number, step in enumerate(steps, start=1):
+        action = step.get("action") if isinstance(step, dict) else None
+        if action not in ACTIONS:
+            raise ScenarioError(f"{where}[{number}]: unknown action {action!r} (expected one of {', '.join(sorted(ACTIONS))})")
+        if action == "correct" and not step.get("component"):
+            raise ScenarioError(f"{where}[{number}]: 'correct' needs a component")
+        if action == "loop_until_success":
+            if int(step.get("max_iterations", 0)) < 1:
+                raise ScenarioError(f"{where}[{number}]: 'loop_until_success' needs max_iterations >= 1")
+            validate_steps(step.get("steps"), f"{where}[{number}].steps")
+
+
+def load_scenario(path):
+    """
+    Reads a scenario from a TOML or YAML file.
+
+    Returns:
+        dict: {"name", "solution", "steps", optional "solutions_folder", "timeouts", "path"}.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise ScenarioError("PyYAML is not installed; use a TOML scenario or pip install pyyaml")
+            data = yaml.safe_load(file)
+        else:
+            data = toml.load(file)
+    scenario = dict(data.get("scenario", {}))
+    scenario["steps"] = data.get("steps")
+    scenario.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    if not scenario.get("solution"):
+        raise ScenarioError(f"{path}: [scenario] needs a solution")
+    validate_steps(scenario["steps"])
+    scenario["path"] = os.path.abspath(path)
+    return scenario
+
+
+def tester_scenario(solution_name, correction_prompt, loops):
+    """
+    The sequence tester.py runs: load, run, correct config.toml, run, then correct with
+    Correcting.txt and run until the solution succeeds or `loops` iterations are done.
+    """
+    return {
+        "name": f"tester-{solution_name}",
+        "solution": solution_name,
+        "steps": [
+            {"action": "load"},
+            {"action": "run"},
+            {"action": "correct", "component": "config.toml", "prompt": correction_prompt},
+            {"action": "run"},
+            {"action": "loop_until_success", "max_iterations": loops, "steps": [
+                {"action": "correct", "component": "config.toml", "prompt_file": "Correcting.txt"},
+                {"action": "run"},
+            ]},
+        ],
+    }
+
+
+class TeeStream:
+    """
+    Writes console output to the current scenario log as well. The log target is switched
+    per scenario, so logging handlers created on the first scenario keep working.
+    """
+    def __init__(self, console):
+        self.console = console
+        self.log_file = None
+
+    def write(self, data):
+        self.console.write(data)
+        if self.log_file is not None:
+            self.log_file.write(data)
+        return len(data)
+
+    def flush(self):
+        self.console.flush()
+        if self.log_file is not None:
+            self.log_file.flush()
+
+
+class SessionBackend:
+    """
+    Performs the steps in-process through the Session API.
+    """
+    name = "session"
+
+    def __init__(self, solutions_folder, log_file=None, run_id=None, timeouts=None, adaptive=None, run_timeout=None):
+        from session import Session
+        self.session = Session(solutions_folder, {"timeout": run_timeout})
+        self.adaptive = adaptive
+
+    def _timed(self, step, call, *args):
+        # Nothing to time out in-process, but the durations feed the adaptive timeouts
+        start = time.monotonic()
+        result = call(*args)
+        # A run replayed from the run cache takes no time: it says nothing about a real run
+        if self.adaptive is not None and not getattr(result, "cached", False):
+            self.adaptive.record(OPERATIONS[step], time.monotonic() - start)
+        return result
+
+    def load(self, solution_name):
+        self.session.load(solution_name)
+
+    def run(self, solution_name):
+        result = self._timed("run", self.session.run, solution_name)
+        return result.status, self.session.runner.failure_reason(result.result_description)
+
+    def correct(self, solution_name, component, prompt):
+        return self._timed("correct", self.session.correct_component, solution_name, component, prompt).changed
+
+    def install(self, solution_name, method):
+        return self._timed("install", self.session.install, solution_name, method).installed
+
+    def export(self, solution_name):
+        return self.session.export(solution_name).path
+
+    def close(self):
+        self.session.close()
+
+
+class PexpectBackend:
+    """
+    Performs the steps by driving the main.py menu, like tester.py. Menu indexes are
+    derived from the order the solutions were loaded in.
+
+    The run, correct and install steps wait for the adaptive timeout of their operation,
+    unless the scenario sets a fixed one in [timeouts] or no AdaptiveTimeouts is given.
+    """
+    name = "pexpect"
+
+    def __init__(self, solutions_folder, log_file, run_id=None, timeouts=None, adaptive=None, run_timeout=None):
+        import pexpect
+        import pexpect.popen_spawn
+        self.pexpect = pexpect
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.fixed = set(timeouts or {})
+        self.adaptive = adaptive
+        self.context = f"scenario run {run_id}"
+        command = f"{sys.executable} main.py" + (f" --run-id {run_id}" if run_id is not None else "")
+        if run_timeout:
+            command += f" --run-timeout {run_timeout}"
+        self.child = pexpect.popen_spawn.PopenSpawn(command, encoding='utf-8', timeout=self.timeouts["prompt"], logfile=log_file)
+        self.loaded = []
+        self.child.expect(PROMPT_FOLDER)
+        self.child.sendline(solutions_folder)
+        self.child.expect(PROMPT_CHOICE)
+
+    def _menu(self, option, *exchanges, step=None):
+        """
+        Selects a menu option, answers each (prompt, reply) and returns the output printed
+        before the menu comes back, without ANSI codes. For a timed `step`, the time until
+        the menu comes back is added to the duration history.
+        """
+        timeout = self.timeouts[step or "prompt"]
+        if step and self.adaptive is not None and step not in self.fixed:
+            timeout = self.adaptive.timeout(OPERATIONS[step], context=self.context)
+        self.child.sendline(option)
+        for prompt, reply in exchanges:
+            self.child.expect(prompt)
+            self.child.sendline(reply)
+        start = time.monotonic()
+        try:
+            self.child.expect(PROMPT_CHOICE, timeout=timeout)
+        except self.pexpect.TIMEOUT:
+            if step and self.adaptive is not None:
+                self.adaptive.record(OPERATIONS[step], timeout, "TIMEOUT")
+            raise
+        output = ANSI_ESCAPE.sub('', self.child.before)
+        # Runs replayed from the run cache (see solution_runner.py) are not recorded either
+        if step and self.adaptive is not None and CACHED_RUN_MESSAGE not in output:
+            self.adaptive.record(OPERATIONS[step], time.monotonic() - start)
+        return output
+
+    def _index(self, solution_name):
+        if solution_name not in self.loaded:
+            raise ScenarioError(f"Solution '{solution_name}' must be loaded before this step")
+        return str(self.loaded.index(solution_name) + 1)
+
+    def load(self, solution_name):
+        output = self._menu("1", (PROMPT_LOAD_NAME, solution_name))
+        if "loaded successfully" not in output:
+            raise ScenarioError(f"Solution '{solution_name}' could not be loaded")
+        if solution_name not in self.loaded:
+            self.loaded.append(solution_name)
+
+    def run(self, solution_name):
+        output = self._menu("4", (PROMPT_RUN_SELECT, self._index(solution_name)), step="run")
+        statuses = STATUS_PATTERN.findall(output)
+        return (statuses[-1] if statuses else "ERROR"), None if statuses else "Status line not found in the output"
+
+    def correct(self, solution_name, component, prompt):
+        output = self._menu("10", (PROMPT_CORRECT_SELECT_SOLUTION, self._index(solution_name)),
+                            (PROMPT_CORRECT_COMPONENT_NAME, component), (PROMPT_CORRECT_INSTRUCTIONS, prompt),
+                            step="correct")
+        return "successfully" in output
+
+    def install(self, solution_name, method):
+        output = self._menu("3", (PROMPT_INSTALL_SELECT, self._index(solution_name)), (PROMPT_INSTALL_METHOD, method),
+                            step="install")
+        return "Packages installed" in output or "Conda environment created" in output
+
+    def export(self, solution_name):
+        # Option 13 exports the current solution, which is the last one loaded
+        if not self.loaded or self.loaded[-1] != solution_name:
+            raise ScenarioError("The pexpect backend can only export the last loaded solution")
+        self._menu("13")
+
+    def close(self):
+        try:
+            self.child.sendline("15")
+            self.child.expect(self.pexpect.EOF, timeout=self.timeouts["prompt"])
+        except (self.pexpect.TIMEOUT, self.pexpect.EOF, OSError):
+            pass
+        if self.child.proc.poll() is None:
+            self.child.proc.terminate()
+
+
+class ScenarioRunner:
+    """
+    Runs scenarios and writes one tester_run_<timestamp>_run<id>.log per scenario, in the
+    format of tester.py logs (loop markers and status lines), so result.py and the plot
+    scripts read them unchanged.
+
+    With the session backend, a suite of scenarios runs in this process and reuses the
+    loaded modules and Session of a solutions folder across scenarios.
+
+    `timeouts` (an AdaptiveTimeouts) decides the pexpect step timeouts and records the step
+    durations of both backends; None keeps the fixed timeouts. `run_timeout` limits each
+    solution run (seconds, None for no limit).
+    """
+
+    def __init__(self, solutions_folder, backend="session", log_dir="logs", timeouts=None, run_timeout=None):
+        self.solutions_folder = solutions_folder
+        self.backend_name = backend
+        self.log_dir = log_dir
+        self.timeouts = timeouts
+        self.run_timeout = run_timeout
+        self._session_backends = {}
+        self._tee = None
+
+    def _backend(self, solutions_folder, log_file, run_id, timeouts):
+        if self.backend_name == "pexpect":
+            return PexpectBackend(solutions_folder, log_file, run_id, timeouts, self.timeouts, self.run_timeout)
+        if solutions_folder not in self._session_backends:
+            self._session_backends[solutions_folder] = SessionBackend(solutions_folder, adaptive=self.timeouts,
+                                                                      run_timeout=self.run_timeout)
+        return self._session_backends[solutions_folder]
+
+    def resolve_prompt(self, scenario, step, solutions_folder):
+        if "prompt_file" not in step:
+            return step.get("prompt", "")
+        candidates = [os.path.join(solutions_folder, scenario["solution"], step["prompt_file"])]
+        if scenario.get("path"):
+            candidates.append(os.path.join(os.path.dirname(scenario["path"]), step["prompt_file"]))
+        for candidate in candidates:
+            if os.path.isfile(candidate):
+                with open(candidate, "r", encoding="utf-8") as file:
+                    return file.read().strip()
+        raise ScenarioError(f"Prompt file '{step['prompt_file']}' not found in {', '.join(candidates)}")
+
+    def execute(self, scenario, steps, backend, log_file, solutions_folder, outcome):
+        solution_name = scenario["solution"]
+        for step in steps:
+            action = step["action"]
+            target = step.get("solution", solution_name)
+            print(Fore.CYAN + f"\nSTEP: {action} {target}" + (f" ({step['component']})" if step.get("component") else ""))
+            if action == "load":
+                backend.load(target)
+            elif action == "run":
+                status, reason = backend.run(target)
+                outcome["status"], outcome["reason"] = status, reason
+                outcome["runs"] += 1
+            elif action == "correct":
+                backend.correct(target, step["component"], self.resolve_prompt(scenario, step, solutions_folder))
+                outcome["corrections"] += 1
+            elif action == "install":
+                if not backend.install(target, step.get("method", "pip")):
+                    raise ScenarioError(f"Installation of '{target}' failed")
+            elif action == "export":
+                backend.export(target)
+            else:
+                max_iterations = int(step["max_iterations"])
+                for iteration in range(1, max_iterations + 1):
+                    log_file.write(f"\n--- Starting Correction Loop Iteration {iteration}/{max_iterations} ---\n")
+                    outcome["iterations"] = iteration
+                    self.execute(scenario, step["steps"], backend, log_file, solutions_folder, outcome)
+                    if outcome["status"] == SUCCESS_STATUS:
+                        print(Fore.GREEN + f"\nSUCCESS: Solution '{target}' completed with status SUCCESS. Stopping loop.")
+                        log_file.write(f"\n--- Solution '{target}' completed successfully (status: SUCCESS). Stopping loop. ---\n")
+                        break
+                    print(Fore.BLUE + f"\n--- Finished Loop Iteration {iteration}/{max_iterations} ---")
+
+    def run(self, scenario, run_id=None):
+        """
+        Runs one scenario.
+
+        Returns:
+            dict: Scenario name, final status and failure reason, loop iterations, number of
+            runs and corrections, duration, log path and error (None unless the scenario aborted).
+        """
+        solutions_folder = scenario.get("solutions_folder") or self.solutions_folder
+        os.makedirs(self.log_dir, exist_ok=True)
+        timestamp_str = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        run_id_str = f"_run{run_id}" if run_id is not None else ""
+        log_filepath = os.path.join(self.log_dir, f"tester_run_{timestamp_str}{run_id_str}.log")
+        print(Fore.LIGHTBLACK_EX + f"Scenario '{scenario['name']}' ({self.backend_name}), logging output to: {log_filepath}")
+
+        outcome = {"scenario": scenario["name"], "status": None, "reason": None, "iterations": 0, "runs": 0,
+                   "corrections": 0, "log": log_filepath, "error": None}
+        start = time.perf_counter()
+        log_file = open(log_filepath, 'w', encoding='utf-8')
+        backend = None
+        if self.backend_name == "session":
+            # Console output (and the logger console handler) also goes to the scenario log
+            if self._tee is None:
+                self._tee = TeeStream(sys.stdout)
+                sys.stdout = self._tee
+            self._tee.log_file = log_file
+            setup_logging(run_id=run_id)
+            logger.info(f"Scenario '{scenario['name']}' started.")
+        try:
+            backend = self._backend(solutions_folder, log_file, run_id, scenario.get("timeouts"))
+            self.execute(scenario, scenario["steps"], backend, log_file, solutions_folder, outcome)
+        except Exception as e:  # Session errors, pexpect timeouts and EOF, scenario errors
+            outcome["error"] = f"{type(e).__name__}: {e}"
+            print(Fore.RED + f"\nScenario '{scenario['name']}' aborted: {outcome['error']}")
+        finally:
+            if backend is not None and self.backend_name == "pexpect":
+                backend.close()
+            if self.backend_name == "session":
+                logger.info("Program ended.")
+                self._tee.log_file = None
+            log_file.close()
+        outcome["duration"] = round(time.perf_counter() - start, 3)
+        return outcome
+
+    def run_suite(self, scenarios, first_run_id=None):
+        """
+        Runs scenarios one after another; scenario n gets run id first_run_id + n - 1.
+        """
+        results = []
+        try:
+            for number, scenario in enumerate(scenarios):
+                run_id = first_run_id + number if first_run_id is not None else None
+                results.append(self.run(scenario, run_id))
+        finally:
+            self.close()
+        return results
+
+    def close(self):
+        for backend in self._session_backends.values():
+            backend.close()
+        self._session_backends = {}
+        if self._tee is not None:
+            sys.stdout = self._tee.console
+            self._tee = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run declarative test scenarios (TOML or YAML) against AIPyCraft.")
+    parser.add_argument("scenarios", nargs="+", help="Scenario files or folders containing *.toml / *.yaml scenarios.")
+    parser.add_argument("--solutions-base-path", required=True, help="Directory containing the solution folders (a scenario can override it).")
+    parser.add_argument("--backend", choices=["session", "pexpect"], default="session", help="Run the steps in-process or through the main.py menu.")
+    parser.add_argument("--run-id", type=int, default=None, help="Run id of the first scenario; the next ones get consecutive ids.")
+    parser.add_argument("--fixed-timeouts", action="store_true", help="Do not learn the step timeouts from past durations (see adaptive_timeout.py).")
+    parser.add_argument("--run-timeout", type=float, default=600, help="Kill a solution run after this many seconds (0 disables, default: 600).")
+    args = parser.parse_args()
+
+    paths = []
+    for path in args.scenarios:
+        if os.path.isdir(path):
+            paths += sorted(glob.glob(os.path.join(path, "*.toml")) + glob.glob(os.path.join(path, "*.y*ml")))
+        else:
+            paths.append(path)
+    try:
+        scenarios = [load_scenario(path) for path in paths]
+    except (OSError, ScenarioError, toml.TomlDecodeError) as e:
+        print(Fore.RED + f"Error: {e}")
+        sys.exit(2)
+
+    timeouts = None if args.fixed_timeouts else AdaptiveTimeouts()
+    results = ScenarioRunner(args.solutions_base_path, args.backend, timeouts=timeouts,
+                             run_timeout=args.run_timeout or None).run_suite(scenarios, args.run_id)
+    print(Style.BRIGHT + "\nScenario results:")
+    for result in results:
+        color = Fore.GREEN if result["status"] == SUCCESS_STATUS and not result["error"] else Fore.LIGHTRED_EX
+        detail = result["error"] or result["reason"] or ""
+        print(color + f"- {result['scenario']}: {result['status']} after {result['iterations']} loop iteration(s), "
+              f"{result['runs']} run(s), {result['duration']:.1f}s {detail}".rstrip())
+    sys.exit(0 if all(r["status"] == SUCCESS_STATUS and not r["error"] for r in results) else 1)
@@ -0,0 +1,154 @@
+# session.py
+
+import os
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from solution_loader import SolutionLoader
+from solution_runner import SolutionRunner
+from solution_catalog import SolutionCatalog
+from environment_store import read_requirements
+import event_stream
+
+
+class SessionError(Exception):
+    """
+    Raised when a session operation cannot be performed (unknown solution, component, ...).
+    """
+
+
+@dataclass
+class LoadResult:
+    name: str
+    folder: str
+    status: str
+    components: List[str] = field(default_factory=list)
+
+
+@dataclass
+class RunResult:
+    name: str
+    status: str
+    execution_time: float
+    cached: bool
+    result_description: str
+    resource_usage: Dict = field(default_factory=dict)
+
+
+@dataclass
+class CorrectionResult:
+    name: str
+    component: str
+    changed: bool
+
+
+@dataclass
+class InstallResult:
+    name: str
+    method: str
+    installed: bool
+    environment: Optional[str]
+    requirements: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ExportResult:
+    name: str
+    path: str
+
+
+class Session:
+    """
+    In-process API over the Dispatcher operations, for scripts and tests that should not
+    drive the interactive menu.
+
+    Operations take solution names, never ask for input and return typed results.
+    Modules that need the AI connector are only imported by the operations using them,
+    so loading and running solutions works without AI credentials.
+    """
+
+    def __init__(self, solutions_folder, runner_options=None, wheelhouse=None):
+        self.solutions_folder = solutions_folder
+        os.makedirs(solutions_folder, exist_ok=True)
+        self.solutions = {}
+        self.loader = SolutionLoader(solutions_folder)
+        self.runner = SolutionRunner(**(runner_options or {}))
+        self.catalog = None  # SolutionCatalog, opened on first use (see catalog_call)
+        self.wheelhouse = wheelhouse
+        self._component_corrector = None
+        self._script_generator = None
+
+    def close(self):
+        if self.catalog is not None:
+            self.catalog.close()
+
+    def catalog_call(self, method, *args, **kwargs):
+        """
+        Calls a SolutionCatalog method, opening the catalog on first use. As in main.py, a
+        missing, locked or corrupt catalog does not fail the operation: the error is reported
+        as a catalog_error event and None is returned.
+        """
+        try:
+            if self.catalog is None:
+                self.catalog = SolutionCatalog(self.solutions_folder)
+            return getattr(self.catalog, method)(*args, **kwargs)
+        except (sqlite3.Error, OSError) as e:
+            event_stream.emit("catalog_error", method=method, reason=str(e))
+            return None
+
+    def solution(self, name):
+        """
+        Returns a loaded solution, loading it on first use.
+        """
+        if name not in self.solutions:
+            self.load(name)
+        return self.solutions[name]
+
+    def load(self, name):
+        with event_stream.operation("load", solution=name):
+            folder = self.catalog_call("find", name) or os.path.join(self.solutions_folder, name)
+            solution = self.loader.load_solution(name, folder)
+            if solution is None:
+                raise SessionError(f"Solution '{name}' could not be loaded from {folder}.")
+        self.solutions[name] = solution
+        return LoadResult(solution.name, solution.folder, solution.status,
+                          [f"{c.name}.{c.extension}" for c in solution.components])
+
+    def run(self, name):
+        solution = self.solution(name)
+        with event_stream.operation("run", solution=name) as op:
+            self.runner.run_solution(solution)
+            self.catalog_call("record_run", solution)
+            op.update(self.runner.run_summary(solution))
+        return RunResult(solution.name, solution.status, solution.execution_time, self.runner.last_run_cached,
+                         solution.result_description, dict(solution.resource_usage))
+
+    def correct_component(self, name, component_name, user_prompt=""):
+        solution = self.solution(name)
+        if not any(f"{c.name}.{c.extension}" == component_name for c in solution.components):
+            raise SessionError(f"Component '{component_name}' not found in solution '{name}'.")
+        if self._component_corrector is None:
+            from component_corrector import ComponentCorrector
+            self._component_corrector = ComponentCorrector()
+        with event_stream.operation("correct_component", solution=name, component=component_name) as op:
+            changed = op["changed"] = self._component_corrector.update_solution(solution, component_name, user_prompt)
+        return CorrectionResult(solution.name, component_name, changed)
+
+    def install(self, name, method="pip"):
+        if method not in ("pip", "conda"):
+            raise SessionError(f"Unknown installation method '{method}'.")
+        solution = self.solution(name)
+        if self._script_generator is None:
+            from installation_script_generator import InstallationScriptGenerator
+            self._script_generator = InstallationScriptGenerator(self.solutions_folder, self.wheelhouse)
+        with event_stream.operation("install", solution=name, method=method) as op:
+            environment = self._script_generator.generate_installation_scripts(solution, installation_method=method)
+            op.update(status="SUCCESS" if environment else "ERROR", environment=environment)
+        requirements = read_requirements(os.path.join(solution.folder, "requirements.txt"))
+        return InstallResult(solution.name, method, environment is not None, environment, requirements)
+
+    def export(self, name, output_dir="exports"):
+        solution = self.solution(name)
+        with event_stream.operation("export", solution=name) as op:
+            path = op["path"] = solution.export_solution_to_toml(output_dir)
+        return ExportResult(solution.name, path)
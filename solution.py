@@ -2,6 +2,7 @@ import os
 import toml
 from datetime import datetime
 from component import Component
+from execution_engine import ExecutionEngine
 
 class Solution:
     def __init__(self, name, components=None, execution_time=0):
@@ -10,19 +11,25 @@ class Solution:
         self.semantic_description = ""
         self.components = components or []
         self.execution_time = execution_time
+        # Wall time, CPU time, peak RSS and block I/O of the latest run (see run_metrics.py)
+        self.resource_usage = {}
         self.status = 'PENDING'
         self.result_description = ""
         self.folder = ""
 
-    def execute(self):
+    def execute(self, engine=None):
         """
         Executes all Python components in the solution.
         Non-Python components are skipped automatically.
+        Components run in order, each in its own namespace inside a worker process.
         """
         try:
             start_time = datetime.now()
-            for component in self.components:
-                component.execute()
+            engine = engine or ExecutionEngine.default()
+            cache_folder = os.path.join(self.folder, ".aipycraft", "bytecode") if self.folder else None
+            results = engine.run(self.components, self.folder or None, cache_folder)
+            for component, (status, error) in zip(self.components, results):
+                component.apply_result(status, error)
 
             # Update solution status based on component statuses
             if all(component.status == 'SUCCESS' for component in self.components if component.language == "python"):
@@ -50,6 +57,7 @@ class Solution:
             'semantic_description': self.semantic_description,
             'components': [component.to_dict() for component in self.components],
             'execution_time': self.execution_time,
+            'resource_usage': self.resource_usage,
             'status': self.status,
             'result_description': self.result_description,
             'folder': self.folder
@@ -67,6 +75,7 @@ class Solution:
         solution = cls(name, components, execution_time)
         solution.model = data.get('model', '')
         solution.semantic_description = data.get('semantic_description', '')
+        solution.resource_usage = data.get('resource_usage', {})
         solution.status = data.get('status', 'PENDING')
         solution.result_description = data.get('result_description', '')
         solution.folder = data.get('folder', '')
@@ -0,0 +1,185 @@
+# solution_catalog.py
+
+import argparse
+import os
+import re
+import sqlite3
+import time
+from colorama import Fore, Style
+from solution_snapshot import SolutionSnapshot
+
+CATALOG_FILE = ".aipycraft_catalog.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS solutions (
+    name TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    dir_mtime_ns INTEGER NOT NULL,
+    has_model INTEGER NOT NULL,
+    component_count INTEGER NOT NULL DEFAULT 0,
+    last_status TEXT,
+    last_run_time REAL,
+    execution_time REAL,
+    size_bytes INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+)
+"""
+_FILE_LINE = re.compile(r"^\s*File \d+\s*:", re.MULTILINE)
+
+
+class SolutionCatalog:
+    """
+    SQLite index of the solution folders found in a workspace.
+
+    refresh() walks the workspace with a single os.scandir() and only rescans a solution
+    folder when its directory mtime changed. Component files are written through a
+    temp file and a rename, which updates the directory mtime, so AI edits are picked up
+    as well as added or removed files.
+    """
+
+    def __init__(self, solutions_folder, db_path=None):
+        self.solutions_folder = solutions_folder
+        self.db_path = db_path or os.path.join(solutions_folder, CATALOG_FILE)
+        self.connection = sqlite3.connect(self.db_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute(_SCHEMA)
+        self.connection.commit()
+        self.snapshot = SolutionSnapshot()
+
+    def close(self):
+        self.connection.close()
+
+    def _scan_solution(self, entry):
+        """
+        Collects the catalog fields of one solution folder.
+        """
+        has_model = False
+        size_bytes = 0
+        with os.scandir(entry.path) as children:
+            for child in children:
+                if child.is_file(follow_symlinks=False):
+                    size_bytes += child.stat(follow_symlinks=False).st_size
+                    if child.name == "model.txt":
+                        has_model = True
+
+        component_count = 0
+        last_status = None
+        execution_time = None
+        snapshot = self.snapshot.read(entry.path) if has_model else None
+        if snapshot:
+            solution_data = snapshot[0]
+            component_count = len(solution_data.get("components", []))
+            last_status = solution_data.get("status")
+            execution_time = solution_data.get("execution_time")
+        elif has_model:
+            try:
+                with open(os.path.join(entry.path, "model.txt"), "r", encoding="utf-8", errors="replace") as file:
+                    component_count = len(_FILE_LINE.findall(file.read()))
+            except OSError:
+                pass
+
+        return has_model, component_count, last_status, execution_time, size_bytes
+
+    def refresh(self):
+        """
+        Updates the catalog incrementally.
+
+        Returns:
+            tuple[int, int]: Number of folders rescanned and number of rows removed.
+        """
+        known = {row["name"]: row["dir_mtime_ns"] for row in self.connection.execute("SELECT name, dir_mtime_ns FROM solutions")}
+        seen = set()
+        rescanned = 0
+        with os.scandir(self.solutions_folder) as entries:
+            for entry in entries:
+                if entry.name.startswith(".") or not entry.is_dir(follow_symlinks=False):
+                    continue
+                seen.add(entry.name)
+                mtime_ns = entry.stat(follow_symlinks=False).st_mtime_ns
+                if known.get(entry.name) == mtime_ns:
+                    continue
+                has_model, component_count, last_status, execution_time, size_bytes = self._scan_solution(entry)
+                self.connection.execute(
+                    """
+                    INSERT INTO solutions (name, path, dir_mtime_ns, has_model, component_count, last_status,
+                                           execution_time, size_bytes, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(name) DO UPDATE SET
+                        path = excluded.path,
+                        dir_mtime_ns = excluded.dir_mtime_ns,
+                        has_model = excluded.has_model,
+                        component_count = excluded.component_count,
+                        last_status = COALESCE(excluded.last_status, solutions.last_status),
+                        execution_time = COALESCE(excluded.execution_time, solutions.execution_time),
+                        size_bytes = excluded.size_bytes,
+                        updated_at = excluded.updated_at
+                    """,
+                    (entry.name, entry.path, mtime_ns, int(has_model), component_count, last_status,
+                     execution_time, size_bytes, time.time()),
+                )
+                rescanned += 1
+
+        removed = [name for name in known if name not in seen]
+        self.connection.executemany("DELETE FROM solutions WHERE name = ?", [(name,) for name in removed])
+        self.connection.commit()
+        return rescanned, len(removed)
+
+    def record_run(self, solution):
+        """
+        Stores the status and timing of the latest run of a solution.
+        """
+        query = "UPDATE solutions SET last_status = ?, last_run_time = ?, execution_time = ? WHERE name = ?"
+        parameters = (solution.status, time.time(), solution.execution_time, solution.name)
+        if self.connection.execute(query, parameters).rowcount == 0:
+            # Solution created or imported since the last refresh
+            self.refresh()
+            self.connection.execute(query, parameters)
+        self.connection.commit()
+
+    def list(self, status=None, search=None, with_model=True):
+        """
+        Returns catalog rows ordered by name, optionally filtered by status and name substring.
+        Solutions that were never run (no status yet) count as PENDING.
+        """
+        query = "SELECT * FROM solutions WHERE 1 = 1"
+        parameters = []
+        if with_model:
+            query += " AND has_model = 1"
+        if status and status.upper() == "PENDING":
+            query += " AND (last_status IS NULL OR last_status = 'PENDING')"
+        elif status:
+            query += " AND last_status = ?"
+            parameters.append(status.upper())
+        if search:
+            query += " AND name LIKE ?"
+            parameters.append(f"%{search}%")
+        query += " ORDER BY name"
+        return self.connection.execute(query, parameters).fetchall()
+
+    def find(self, name):
+        """
+        Returns the folder of a cataloged solution with model.txt, or None.
+        """
+        row = self.connection.execute("SELECT path FROM solutions WHERE name = ? AND has_model = 1", (name,)).fetchone()
+        return row["path"] if row else None
+
+    @staticmethod
+    def format_row(row):
+        last_run = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["last_run_time"])) if row["last_run_time"] else "never"
+        return (f"- {row['name']} ({row['component_count']} components, status: {row['last_status'] or 'PENDING'}, "
+                f"last run: {last_run}, {row['size_bytes'] / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List the solutions cataloged in a workspace.")
+    parser.add_argument("solutions_folder", help="Path to the solutions folder.")
+    parser.add_argument("--status", help="Only list solutions whose last status matches (e.g. SUCCESS, ERROR).")
+    parser.add_argument("--search", help="Only list solutions whose name contains this text.")
+    args = parser.parse_args()
+
+    catalog = SolutionCatalog(args.solutions_folder)
+    rescanned, removed = catalog.refresh()
+    print(Style.DIM + f"Catalog refreshed: {rescanned} folder(s) rescanned, {removed} removed." + Style.RESET_ALL)
+    for row in catalog.list(status=args.status, search=args.search):
+        print(Fore.YELLOW + SolutionCatalog.format_row(row) + Style.RESET_ALL)
+    catalog.close()
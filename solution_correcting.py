@@ -4,18 +4,26 @@ import os
 import re
 from colorama import init, Fore, Style
 from ai_connector import AIConnector
+from solution_snapshot import SolutionSnapshot
+from version_store import VersionStore
+from component_persistence import ComponentPersistence
 
 init(autoreset=True)
 
 class SolutionCorrecting:
     def __init__(self):
         self.ai_connector = AIConnector()
+        self.snapshot = SolutionSnapshot()
 
     def correct_solution(self, solution):
         print(Fore.CYAN + f"\nCorrecting solution: {solution.name}\n")
 
         if solution.status == 'ERROR':
             error_message = solution.result_description
+            version_store = VersionStore(solution.folder)
+            version_store.begin_step("correct_solution")
+            persistence = ComponentPersistence(solution.folder, version_store)
+            persistence.begin()
 
             instructions = """Context:
 
@@ -45,51 +53,69 @@ class SolutionCorrecting:
 
         """
 
-            for component in solution.components:
-                prompt = (
-                    f"The Solution {solution.name} created from the following Solution description encountered an error during execution and you need to correct it.\n\n"
-                    f"The solution aim is to: {solution.semantic_description}\n\n"
-                    f"{error_message}\n\nPlease analyze the following Component:\n\n"
-                    f"{component.name}\n\Content:\n{component.content}\n\n"
-                    "IMPORTANT 1: If some corrections are required, send ONLY the complete corrected code of this Component.\n"
-                    "In addition, do not rename the file name. Do nothing else.\n"
-                    "IMPORTANT 2: Do not remove the function if __name__ == \"__main__\" from the main.py file."
-                )
-
-                print(Style.BRIGHT + Fore.GREEN + "\nThis is the prompt being sent to the AI:\n")
-                print(Style.NORMAL + prompt)
-
-                response = self.ai_connector.send_prompt_ensemble(instructions, prompt)
-
-                print(Style.BRIGHT + Fore.GREEN + "\n\nAI's response:\n")
-                print(Style.NORMAL + response)
-
-                # Check if the response is exactly "NO" (case-insensitive check after stripping)
-                cleaned_response = response.strip()
-                if cleaned_response.upper() == "NO":
-                    print(Style.BRIGHT + Fore.CYAN + f"\nNo changes needed for component '{component.name}'.\n")
-                else:
-                    # Try to extract code block only if response is not "NO"
-                    # Use a more general pattern to catch ```python, ```, etc.
-                    content_match = re.search(r"```(?:[a-zA-Z0-9]*)?\s*\n(.*?)\n```", cleaned_response, re.DOTALL)
-                    if content_match:
-                        updated_content = content_match.group(1).strip() # Strip whitespace from extracted code
-                        component_file_path = os.path.join(solution.folder, f"{component.name}.{component.extension}")
-
-                        print(Style.BRIGHT + Fore.CYAN + f"\nSolution Folder: {solution.folder}")
-                        print(Style.BRIGHT + Fore.CYAN + f"Component File Path: {component_file_path}")
-
-                        try:
-                            with open(component_file_path, 'w') as file:
-                                file.write(updated_content)
-                            print(Style.BRIGHT + Fore.CYAN + f"\nComponent '{component.name}' file updated successfully.")
-                            component.content = updated_content # Update component content in memory
-                        except Exception as e:
-                            print(Style.BRIGHT + Fore.RED + f"\nError occurred while updating component '{component.name}' file:")
-                            print(Style.NORMAL + str(e))
+            updated = [] # (component, content) staged until the commit
+            try:
+                for component in solution.components:
+                    prompt = (
+                        f"The Solution {solution.name} created from the following Solution description encountered an error during execution and you need to correct it.\n\n"
+                        f"The solution aim is to: {solution.semantic_description}\n\n"
+                        f"{error_message}\n\nPlease analyze the following Component:\n\n"
+                        f"{component.name}\n\Content:\n{component.content}\n\n"
+                        "IMPORTANT 1: If some corrections are required, send ONLY the complete corrected code of this Component.\n"
+                        "In addition, do not rename the file name. Do nothing else.\n"
+                        "IMPORTANT 2: Do not remove the function if __name__ == \"__main__\" from the main.py file."
+                    )
+
+                    print(Style.BRIGHT + Fore.GREEN + "\nThis is the prompt being sent to the AI:\n")
+                    print(Style.NORMAL + prompt)
+
+                    response = self.ai_connector.send_prompt_ensemble(instructions, prompt)
+
+                    print(Style.BRIGHT + Fore.GREEN + "\n\nAI's response:\n")
+                    print(Style.NORMAL + response)
+
+                    # Check if the response is exactly "NO" (case-insensitive check after stripping)
+                    cleaned_response = response.strip()
+                    if cleaned_response.upper() == "NO":
+                        print(Style.BRIGHT + Fore.CYAN + f"\nNo changes needed for component '{component.name}'.\n")
                     else:
-                        # If it wasn't "NO" but also not a valid code block
-                        print(Style.BRIGHT + Fore.YELLOW + f"\nNo valid correction code block found in the AI's response for component '{component.name}'.\n")
+                        # Try to extract code block only if response is not "NO"
+                        # Use a more general pattern to catch ```python, ```, etc.
+                        content_match = re.search(r"```(?:[a-zA-Z0-9]*)?\s*\n(.*?)\n```", cleaned_response, re.DOTALL)
+                        if content_match:
+                            updated_content = content_match.group(1).strip() # Strip whitespace from extracted code
+                            component_file_path = os.path.join(solution.folder, f"{component.name}.{component.extension}")
+
+                            print(Style.BRIGHT + Fore.CYAN + f"\nSolution Folder: {solution.folder}")
+                            print(Style.BRIGHT + Fore.CYAN + f"Component File Path: {component_file_path}")
+
+                            try:
+                                persistence.write(f"{component.name}.{component.extension}", updated_content)
+                                updated.append((component, updated_content))
+                            except Exception as e:
+                                print(Style.BRIGHT + Fore.RED + f"\nError occurred while updating component '{component.name}' file:")
+                                print(Style.NORMAL + str(e))
+                        else:
+                            # If it wasn't "NO" but also not a valid code block
+                            print(Style.BRIGHT + Fore.YELLOW + f"\nNo valid correction code block found in the AI's response for component '{component.name}'.\n")
+
+                # Commit all corrected components together
+                try:
+                    persistence.commit()
+                except OSError as e:
+                    # The commit restored the files it had replaced: report it like a failed write
+                    print(Style.BRIGHT + Fore.RED + "\nError occurred while writing the corrected component files:")
+                    print(Style.NORMAL + str(e))
+                    updated = []
+            except BaseException:
+                # Nothing is written if an AI call fails
+                persistence.rollback()
+                raise
+            for component, updated_content in updated:
+                component.content = updated_content # Update component content in memory
+                print(Style.BRIGHT + Fore.CYAN + f"\nComponent '{component.name}' file updated successfully.")
+            print(Style.DIM + f"Component files: {persistence.summary()}")
+            self.snapshot.save(solution)
         else:
             print(Fore.CYAN + "The solution does not have an 'ERROR' status. No correction needed.")
 
@@ -4,6 +4,8 @@ from component import Component
 from ai_connector import AIConnector
 from colorama import init, Fore, Style
 from ai_code_parser import AICodeParser
+from solution_snapshot import SolutionSnapshot
+from component_persistence import ComponentPersistence
 
 init(autoreset=True)  # This ensures automatic reset of styles after each print
 
@@ -103,8 +105,7 @@ File 4: main.py
 
             if approval.lower() == "yes":
                 # Save the approved solution model to a file
-                with open(os.path.join(solution_directory, f"model.txt"), "w") as file:
-                    file.write(response)
+                ComponentPersistence(solution_directory).write("model.txt", response)
                 break
             else:
                 # Ask the user for feedback on why they rejected the solution
@@ -121,6 +122,7 @@ File 4: main.py
 
         # Create components recursively
         self.create_components(response, solution_directory, interaction_count)
+        SolutionSnapshot().save(self.solution)
 
         return self.solution
 
@@ -178,8 +180,7 @@ File 4: main.py
 
                     if approval.lower() == "yes":
                         # Save the approved component implementation to a file
-                        file_path = os.path.join(solution_directory, f"{file_name}.{extension}")
-                        self.content_parser.save_content_to_file(content, file_path)
+                        ComponentPersistence(solution_directory).write(f"{file_name}.{extension}", content)
 
                         # Create a Component object with the file name, extension, and component description
                         component = Component(file_name, extension, content, component_description, language="python" if extension == "py" else "other")
@@ -35,6 +35,9 @@ class SolutionDisplayer:
         print(Fore.BLUE + f"\n\nFolder: {solution.folder}" + Style.RESET_ALL)
         print(Fore.BLUE + f"Semantic Descriptor: {solution.semantic_description}" + Style.RESET_ALL)
         print(Fore.BLUE + f"Execution Time: {solution.execution_time}" + Style.RESET_ALL)
+        if solution.resource_usage:
+            usage = ", ".join(f"{key}: {value}" for key, value in solution.resource_usage.items())
+            print(Fore.BLUE + f"Resource Usage: {usage}" + Style.RESET_ALL)
         print(Fore.BLUE + f"Status: {solution.status}" + Style.RESET_ALL)
         print(Fore.BLUE + f"Result Description: {solution.result_description}" + Style.RESET_ALL)
 
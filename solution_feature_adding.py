@@ -4,11 +4,15 @@ import os
 from colorama import init, Fore, Style
 from ai_connector import AIConnector
 from ai_code_parser import AICodeParser
+from solution_snapshot import SolutionSnapshot
+from version_store import VersionStore
+from component_persistence import ComponentPersistence
 
 class SolutionFeatureAdding:
     def __init__(self):
         self.ai_connector = AIConnector()
         self.content_parser = AICodeParser()
+        self.snapshot = SolutionSnapshot()
 
     def add_feature_to_solution(self, solution):
         print(f"\nAdding a new feature to solution: {solution.name}\n")
@@ -30,48 +34,69 @@ class SolutionFeatureAdding:
         
         """
 
-        for component in solution.components:
-            # Generate a prompt for the AI to add the new feature to the component
-            prompt = f"The following solution needs a new feature or improvement:\n\n"
-            prompt += f"Solution: {solution.name}\n"
-            prompt += f"Component: {component.name}.{component.extension}\n"
-            prompt += f"Language: {component.language}\n"
-            prompt += f"Content:\n{component.content}\n\n"
-            prompt += f"Improvement or issue: {feature_description}\n\n"
-            prompt += f"Please improve this component. Provide the updated code for the component, keeping the original file name and language."
+        version_store = VersionStore(solution.folder)
+        version_store.begin_step("add_feature")
+        persistence = ComponentPersistence(solution.folder, version_store)
+        persistence.begin()
 
-            print(Fore.CYAN + "\nAnalyzing component:")
-            print(Fore.CYAN + f"Name: {component.name}.{component.extension}")
-            print(Fore.CYAN + f"Language: {component.language}")
+        updated = [] # (component, content) staged until the commit
+        try:
+            for component in solution.components:
+                # Generate a prompt for the AI to add the new feature to the component
+                prompt = f"The following solution needs a new feature or improvement:\n\n"
+                prompt += f"Solution: {solution.name}\n"
+                prompt += f"Component: {component.name}.{component.extension}\n"
+                prompt += f"Language: {component.language}\n"
+                prompt += f"Content:\n{component.content}\n\n"
+                prompt += f"Improvement or issue: {feature_description}\n\n"
+                prompt += f"Please improve this component. Provide the updated code for the component, keeping the original file name and language."
 
-            # Send the prompt to the AI using the AIConnector and get the response
-            response = self.ai_connector.send_prompt_ensemble(instructions, prompt)
+                print(Fore.CYAN + "\nAnalyzing component:")
+                print(Fore.CYAN + f"Name: {component.name}.{component.extension}")
+                print(Fore.CYAN + f"Language: {component.language}")
 
-            print(Fore.WHITE + "\nAI's response:\n")
-            print(response)
+                # Send the prompt to the AI using the AIConnector and get the response
+                response = self.ai_connector.send_prompt_ensemble(instructions, prompt)
 
-            # Use AICodeParser to extract code from the AI's response
-            updated_content = self.content_parser.parse_content(response)
+                print(Fore.WHITE + "\nAI's response:\n")
+                print(response)
 
-            if updated_content:
-                # Save the updated content to the component file
-                component_file_path = os.path.join(solution.folder, f"{component.name}.{component.extension}")
+                # Use AICodeParser to extract code from the AI's response
+                updated_content = self.content_parser.parse_content(response)
+
+                if updated_content:
+                    # Save the updated content to the component file
+                    component_file_path = os.path.join(solution.folder, f"{component.name}.{component.extension}")
                 
-                print(Fore.YELLOW + f"\nUpdating component file:")
-                print(Fore.YELLOW + f"Path: {component_file_path}")
+                    print(Fore.YELLOW + f"\nUpdating component file:")
+                    print(Fore.YELLOW + f"Path: {component_file_path}")
                 
-                try:
-                    # Use AICodeParser to save the code
-                    if self.content_parser.save_content_to_file(updated_content, component_file_path):
-                        # Update the component content with the AI-generated content
-                        component.content = updated_content
-                        print(Fore.GREEN + f"\nComponent '{component.name}.{component.extension}' successfully updated.")
-                    else:
-                        print(Fore.RED + f"\nFailed to save updated content for component '{component.name}.{component.extension}'.")
-                except Exception as e:
-                    print(Fore.RED + f"\nError updating component file:")
-                    print(Fore.RED + str(e))
-            else:
-                print(Fore.BLUE + f"\nNo changes required for component '{component.name}.{component.extension}'.")
+                    try:
+                        # Record the revision and save the code atomically
+                        persistence.write(f"{component.name}.{component.extension}", updated_content)
+                        updated.append((component, updated_content))
+                    except Exception as e:
+                        print(Fore.RED + f"\nError updating component file:")
+                        print(Fore.RED + str(e))
+                else:
+                    print(Fore.BLUE + f"\nNo changes required for component '{component.name}.{component.extension}'.")
 
+            # Commit all updated components together
+            try:
+                persistence.commit()
+            except OSError as e:
+                # The commit restored the files it had replaced: report it like a failed write
+                print(Fore.RED + f"\nError updating component files:")
+                print(Fore.RED + str(e))
+                updated = []
+        except BaseException:
+            # Nothing is written if an AI call fails
+            persistence.rollback()
+            raise
+        for component, updated_content in updated:
+            # Update the component content with the AI-generated content
+            component.content = updated_content
+            print(Fore.GREEN + f"\nComponent '{component.name}.{component.extension}' successfully updated.")
+        print(Style.DIM + f"Component files: {persistence.summary()}")
+        self.snapshot.save(solution)
         print(Fore.GREEN + "\nFeature addition process completed.")
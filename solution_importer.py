@@ -4,6 +4,8 @@ from colorama import Fore, Style
 from ai_connector import AIConnector
 from solution import Solution
 from component import Component
+from solution_snapshot import SolutionSnapshot
+from component_persistence import ComponentPersistence
 
 class SolutionImporter:
     def __init__(self, solutions_folder):
@@ -142,15 +144,14 @@ class SolutionImporter:
             descriptor_content += f"Component {i}: {component.semantic_description}\n\n"
             descriptor_content += f"File {i}: {component.name}.{component.extension}\n\n"
 
-        # Save the model.txt file
-        with open(os.path.join(solution_folder, "model.txt"), "w", encoding="utf-8") as file:
-            file.write(descriptor_content)
+        # Save the model.txt file and the components' content files in one commit
+        persistence = ComponentPersistence(solution_folder)
+        with persistence.batch():
+            persistence.write("model.txt", descriptor_content)
+            for component in components:
+                persistence.write(f"{component.name}.{component.extension}", component.content)
 
-        # Save the components' content files in the solution folder
-        for component in components:
-            component_file_path = os.path.join(solution_folder, f"{component.name}.{component.extension}")
-            with open(component_file_path, "w", encoding="utf-8") as file:
-                file.write(component.content)
+        SolutionSnapshot().save(solution)
 
         print(Fore.GREEN + Style.BRIGHT + f"\nSolution '{solution_name}' imported successfully." + Style.RESET_ALL)
 
@@ -3,11 +3,13 @@
 import os
 from solution import Solution
 from component import Component
+from solution_snapshot import SolutionSnapshot
 from colorama import Fore, Style
 
 class SolutionLoader:
     def __init__(self, solutions_folder):
         self.solutions_folder = solutions_folder
+        self.snapshot = SolutionSnapshot()
 
     def load_solution(self, solution_name, file_path):
         solution_folder = os.path.join(self.solutions_folder, file_path)
@@ -22,6 +24,12 @@ class SolutionLoader:
             print(f"{Fore.LIGHTYELLOW_EX}\n\nApproved solution file not found for '{solution_name}'.\n\n{Style.RESET_ALL}")
             return None
 
+        # Try the binary snapshot first; model.txt stays the fallback and source of truth
+        solution = self.snapshot.load(solution_name, solution_folder)
+        if solution:
+            print(f"{Fore.LIGHTGREEN_EX}\n\nSolution '{solution_name}' loaded successfully (snapshot).\n\n{Style.RESET_ALL}")
+            return solution
+
         with open(descriptor_file, "r") as file:
             descriptor_content = file.read()
 
@@ -69,5 +77,7 @@ class SolutionLoader:
         solution.folder = solution_folder
         solution.semantic_description = semantic_description
 
+        self.snapshot.save(solution)
+
         print(f"{Fore.LIGHTGREEN_EX}\n\nSolution '{solution_name}' loaded successfully.\n\n{Style.RESET_ALL}")
         return solution
\ No newline at end of file
@@ -1,17 +1,47 @@
 # solution_runner.py
 
-import subprocess
 import traceback
 import os
 from colorama import init, Fore, Style
+from logger import log_to_file
+from solution_snapshot import SolutionSnapshot
+from interpreter_pool import venv_python, venv_environment
+from output_capture import CaptureResult, OutputCapture, create_run_folder
+from run_cache import RunCache
+from run_metrics import RunHistory
 
 class SolutionRunner:
+    def __init__(self, interpreter_pool=None, timeout=None, idle_timeout=None, output_limit=64 * 1024, sample_interval=None,
+                 use_run_cache=True, quiet=False):
+        self.snapshot = SolutionSnapshot()
+        # Optional InterpreterPool; runs fork from a warm venv interpreter when set
+        self.interpreter_pool = interpreter_pool
+        # Wall-clock and idle (no output) timeouts in seconds; None or 0 disables them
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        # Bytes kept from the start and from the end of each output stream
+        self.output_limit = output_limit
+        # Seconds between RSS samples of the running solution; None only records the rusage peak
+        self.sample_interval = sample_interval
+        # Serve unchanged deterministic solutions from their previous result (see run_cache.py)
+        self.use_run_cache = use_run_cache
+        # Quiet runners print nothing and do not tee the solution output
+        self.quiet = quiet
+        # Whether the last run_solution() call replayed a cached result
+        self.last_run_cached = False
+
+    def echo(self, *args, **kwargs):
+        # Console output of a run; silenced for background runs (see multi_runner.py)
+        if not self.quiet:
+            print(*args, **kwargs)
+
     def run_solution(self, solution):
+        self.last_run_cached = False
         if solution is None:
-            print(Fore.LIGHTRED_EX + "No solution selected." + Style.RESET_ALL)
+            self.echo(Fore.LIGHTRED_EX + "No solution selected." + Style.RESET_ALL)
             return
 
-        print(Fore.LIGHTBLUE_EX + f"\n\nRunning solution: {solution.name}" + Style.RESET_ALL)
+        self.echo(Fore.LIGHTBLUE_EX + f"\n\nRunning solution: {solution.name}" + Style.RESET_ALL)
 
         main_component = None
         for component in solution.components:
@@ -20,10 +50,10 @@ class SolutionRunner:
                 break
 
         if main_component is None:
-            print(Fore.LIGHTRED_EX + "No 'main.py' Python component found in the solution." + Style.RESET_ALL)
+            self.echo(Fore.LIGHTRED_EX + "No 'main.py' Python component found in the solution." + Style.RESET_ALL)
             return
 
-        print(Fore.LIGHTCYAN_EX + f"\n\nExecuting component: {main_component.name}.{main_component.extension}\n\n" + Style.RESET_ALL)
+        self.echo(Fore.LIGHTCYAN_EX + f"\n\nExecuting component: {main_component.name}.{main_component.extension}\n\n" + Style.RESET_ALL)
 
         execution_log = ""
 
@@ -34,58 +64,141 @@ class SolutionRunner:
             # Check if the virtual environment exists
             venv_path = os.path.join(solution.folder, "venv")
             if not os.path.exists(venv_path):
-                print(Fore.LIGHTRED_EX + "Virtual environment not found. Please run the installation script first." + Style.RESET_ALL)
+                self.echo(Fore.LIGHTRED_EX + "Virtual environment not found. Please run the installation script first." + Style.RESET_ALL)
                 solution.status = 'ERROR'
                 execution_log += "Virtual environment not found. Please run the installation script first.\n"
                 return
 
-            if os.name == 'nt':  # Windows
-                # Directly execute the python interpreter from the venv
-                python_exe = os.path.join(venv_path, "Scripts", "python.exe")
-                if not os.path.exists(python_exe):
-                     print(Fore.LIGHTRED_EX + f"Python executable not found in venv: {python_exe}" + Style.RESET_ALL)
-                     solution.status = 'ERROR'
-                     execution_log += f"Python executable not found in venv: {python_exe}\n"
-                     return
-                command = [python_exe, main_file_path]
-                # No need for shell=True when executing directly
-                result = subprocess.run(command, capture_output=True, text=True, check=False) # check=False to handle non-zero exit codes manually
-            else:  # Unix-based systems (keep existing logic, though direct execution is also an option here)
-                activate_script = os.path.join(venv_path, "bin", "activate")
-                command = f'source "{activate_script}" && python "{main_file_path}"'
-                result = subprocess.run(command, capture_output=True, text=True, shell=True, executable="/bin/bash")
-
-            # Print the captured output and error streams
-            print(Fore.GREEN + "This is the output of the solution main.py run:" + Style.RESET_ALL)
-            print(Fore.WHITE + result.stdout + Style.RESET_ALL)
-            execution_log += f"Output:\n{result.stdout}\n"
+            python_exe = venv_python(venv_path)
+            if not os.path.exists(python_exe):
+                self.echo(Fore.LIGHTRED_EX + f"Python executable not found in venv: {python_exe}" + Style.RESET_ALL)
+                solution.status = 'ERROR'
+                execution_log += f"Python executable not found in venv: {python_exe}\n"
+                return
 
+            run_cache = RunCache(solution.folder) if self.use_run_cache else None
+            cache_key = RunCache.key(solution, venv_path) if run_cache is not None and run_cache.deterministic else None
+            cached = run_cache.lookup(cache_key) if cache_key else None
+            self.last_run_cached = cached is not None
+
+            result = None
+            if cached is not None:
+                # Same component files and installed packages as a recorded run: replay its result
+                self.echo(Style.DIM + "Components and environment unchanged since a previous run, using its cached result." + Style.RESET_ALL)
+                self.echo(Fore.GREEN + "This is the output of the solution main.py run:" + Style.RESET_ALL)
+                self.echo(Fore.WHITE + cached["stdout"] + Style.RESET_ALL)
+                if cached["stderr"]:
+                    self.echo(Fore.LIGHTRED_EX + cached["stderr"] + Style.RESET_ALL)
+                result = CaptureResult([python_exe, main_file_path], cached["returncode"], cached["stdout"], cached["stderr"],
+                                       usage=cached["resource_usage"])
+            else:
+                # Output is echoed live while running, kept bounded in memory and spilled in full to the run folder
+                capture = OutputCapture(self.timeout, self.idle_timeout, self.output_limit, self.output_limit,
+                                        tee=not self.quiet, log=None if self.quiet else log_to_file,
+                                        sample_interval=self.sample_interval)
+                run_folder = create_run_folder(solution.folder)
+                self.echo(Fore.GREEN + "This is the output of the solution main.py run:" + Style.RESET_ALL)
+
+                if self.interpreter_pool is not None and self.interpreter_pool.supported():
+                    try:
+                        result = self.interpreter_pool.run(solution, venv_path, main_file_path, self.timeout, capture, run_folder)
+                    except Exception as e:
+                        self.echo(Fore.LIGHTYELLOW_EX + f"Warm interpreter unavailable ({e}), starting a new process." + Style.RESET_ALL)
+
+                if result is None:
+                    # Run the venv interpreter directly with the environment the activate script would set
+                    result = capture.run([python_exe, main_file_path], cwd=None,
+                                         env=venv_environment(venv_path), run_folder=run_folder)
+
+            execution_log += f"Output:\n{result.stdout}\n"
             if result.stderr:
-                print(Fore.LIGHTRED_EX + "Error:" + Style.RESET_ALL)
-                print(Fore.LIGHTRED_EX + "Error:" + Style.RESET_ALL)
-                print(Fore.LIGHTRED_EX + result.stderr + Style.RESET_ALL)
                 execution_log += f"Error:\n{result.stderr}\n"
                 # Don't set status here yet, check return code below
 
+            if result.truncated:
+                note = (f"Output truncated in memory ({result.stdout_bytes} bytes stdout, {result.stderr_bytes} bytes stderr); "
+                        f"full output saved in {result.run_folder}")
+                self.echo(Style.DIM + note + Style.RESET_ALL)
+                execution_log += note + "\n"
+
+            if result.timed_out:
+                limit = self.timeout if result.timed_out == "wall-clock" else self.idle_timeout
+                error_msg = f"Process killed after exceeding the {result.timed_out} timeout of {limit}s."
+                self.echo(Fore.LIGHTRED_EX + error_msg + Style.RESET_ALL)
+                execution_log += f"Error: {error_msg}\n"
+
             # Check return code AND stderr to determine status
-            if result.returncode != 0 or result.stderr:
+            if result.returncode != 0 or result.stderr or result.timed_out:
                 solution.status = 'ERROR'
-                if result.returncode != 0 and not result.stderr: # Add note if only return code indicated error
+                if result.returncode != 0 and not result.stderr and not result.timed_out: # Add note if only return code indicated error
                      error_msg = f"Process exited with non-zero status code: {result.returncode}"
-                     print(Fore.LIGHTRED_EX + error_msg + Style.RESET_ALL)
+                     self.echo(Fore.LIGHTRED_EX + error_msg + Style.RESET_ALL)
                      execution_log += f"Error: {error_msg}\n"
             else:
                 solution.status = 'SUCCESS'
+
+            if cached is not None:
+                solution.resource_usage = cached["resource_usage"]
+                solution.execution_time = cached["resource_usage"].get("wall_time", solution.execution_time)
+            else:
+                self.record_usage(solution, result)
+                if cache_key and not result.timed_out:
+                    run_cache.store(cache_key, solution.status, result.returncode, result.stdout, result.stderr,
+                                    solution.resource_usage)
         except Exception as e:
             solution.status = 'ERROR'
             error_traceback = traceback.format_exc()
-            print(Fore.LIGHTRED_EX + "Error:" + Style.RESET_ALL)
-            print(Fore.LIGHTRED_EX + error_traceback + Style.RESET_ALL)
+            self.echo(Fore.LIGHTRED_EX + "Error:" + Style.RESET_ALL)
+            self.echo(Fore.LIGHTRED_EX + error_traceback + Style.RESET_ALL)
             execution_log += f"Error:\n{error_traceback}\n"
 
-        print(Fore.LIGHTMAGENTA_EX + f"\nSolution completed with status: {solution.status}\n" + Style.RESET_ALL)
+        self.echo(Fore.LIGHTMAGENTA_EX + f"\nSolution completed with status: {solution.status}\n" + Style.RESET_ALL)
         execution_log += f"\nSolution '{solution.name}' completed with status: {solution.status}\n"
 
         solution.result_description = execution_log
-
-        print(Fore.LIGHTBLUE_EX + "\nSolution execution completed.\n" + Style.RESET_ALL)
+        self.snapshot.save(solution)
+
+        self.echo(Fore.LIGHTBLUE_EX + "\nSolution execution completed.\n" + Style.RESET_ALL)
+
+    def run_summary(self, solution):
+        """
+        Returns the outcome of the last run of a solution as event fields (see event_stream.py).
+        """
+        return {
+            "status": solution.status,
+            "reason": self.failure_reason(solution.result_description) if solution.status != 'SUCCESS' else None,
+            "execution_time": solution.execution_time,
+            "cached": self.last_run_cached,
+        }
+
+    @staticmethod
+    def failure_reason(result_description):
+        """
+        Returns the last line of the last error block of a run log (e.g. the exception of a
+        traceback or the timeout message), or None if the run reported no error.
+        """
+        lines = (result_description or "").splitlines()
+        starts = [i for i, line in enumerate(lines) if line.startswith("Error:")]
+        if not starts:
+            return None
+        block = [lines[starts[-1]][len("Error:"):]]
+        for line in lines[starts[-1] + 1:]:
+            if line.startswith("Solution '"):
+                break
+            block.append(line)
+        block = [line.strip() for line in block if line.strip() and not line.startswith("Output truncated in memory")]
+        return block[-1] if block else None
+
+    def record_usage(self, solution, result):
+        """
+        Stores wall time, CPU time, peak RSS and block I/O of a run on the solution and
+        appends them to the solution's run history.
+        """
+        history = RunHistory(solution.folder)
+        previous = history.load(limit=1)
+        record = RunHistory.build_record(solution, result, result.rss_samples)
+        history.append(record)
+
+        solution.execution_time = record["wall_time"]
+        solution.resource_usage = {key: value for key, value in record.items() if key != "rss_samples"}
+        self.echo(Style.DIM + "Resources: " + RunHistory.format_record(record, previous[0] if previous else None) + Style.RESET_ALL)
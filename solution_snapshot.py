@@ -0,0 +1,185 @@
+# solution_snapshot.py
+
+import json
+import os
+import struct
+import zlib
+from colorama import Fore, Style
+from file_utils import atomic_write, sha256_text
+from solution import Solution
+
+# Binary layout (little endian):
+#   header:     magic (8s) | version (H) | file count (I) | payload length (I)
+#   file entry: name length (H) | name (utf-8) | size (Q) | mtime_ns (q) | sha256 (32s)
+#   payload:    zlib-compressed JSON of Solution.to_dict()
+SNAPSHOT_FILE = "model.snapshot"
+SNAPSHOT_MAGIC = b"AIPYSNAP"
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct("<8sHII")
+_NAME_LENGTH = struct.Struct("<H")
+_FILE_ENTRY = struct.Struct("<Qq32s")
+# Modification times this close to the snapshot's own (or in whole seconds) do not prove a
+# file is unchanged: an edit in the same clock tick keeps them (FAT counts in 2s steps)
+RACY_WINDOW_NS = 2_000_000_000
+
+
+class SolutionSnapshot:
+    """
+    Compact binary snapshot of a solution stored next to model.txt.
+
+    model.txt and the component files remain the source of truth: a snapshot is only
+    used when the size and modification time recorded for every tracked file still
+    match what is on disk, and when the recorded hashes match the component contents
+    in the snapshot and model.txt. Files whose modification time cannot tell an edit
+    apart (whole seconds, or close to the snapshot's own) are hashed on disk as well.
+    Otherwise the loader falls back to parsing model.txt.
+    """
+
+    @staticmethod
+    def snapshot_path(solution_folder):
+        return os.path.join(solution_folder, SNAPSHOT_FILE)
+
+    @staticmethod
+    def _tracked_files(solution):
+        files = ["model.txt"]
+        files.extend(f"{component.name}.{component.extension}" for component in solution.components)
+        return files
+
+    @staticmethod
+    def _file_digest(file_path):
+        with open(file_path, "r", encoding="utf-8", errors="replace") as file:
+            return sha256_text(file.read())
+
+    def save(self, solution):
+        """
+        Writes the snapshot of a solution atomically. Returns True on success.
+        """
+        if not solution or not solution.folder or not os.path.isdir(solution.folder):
+            return False
+
+        contents = {f"{c.name}.{c.extension}": c.content for c in solution.components}
+        entries = []
+        for file_name in self._tracked_files(solution):
+            file_path = os.path.join(solution.folder, file_name)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                # Untracked or missing files make the snapshot unverifiable, so skip writing it
+                return False
+            if file_name in contents:
+                digest = sha256_text(contents[file_name])
+            else:
+                digest = self._file_digest(file_path)
+            entries.append((file_name, stat.st_size, stat.st_mtime_ns, bytes.fromhex(digest)))
+
+        payload = zlib.compress(json.dumps(solution.to_dict()).encode("utf-8"))
+
+        parts = [_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(entries), len(payload))]
+        for file_name, size, mtime_ns, digest in entries:
+            encoded_name = file_name.encode("utf-8")
+            parts.append(_NAME_LENGTH.pack(len(encoded_name)))
+            parts.append(encoded_name)
+            parts.append(_FILE_ENTRY.pack(size, mtime_ns, digest))
+        parts.append(payload)
+
+        try:
+            atomic_write(self.snapshot_path(solution.folder), b"".join(parts))
+            return True
+        except OSError as e:
+            print(Fore.LIGHTRED_EX + f"Could not write snapshot for '{solution.name}': {e}" + Style.RESET_ALL)
+            return False
+
+    def read(self, solution_folder):
+        """
+        Reads a snapshot file with a single sequential read.
+
+        Returns:
+            tuple[dict, list[tuple[str, int, int, str]]] | None: The solution dictionary and the
+            tracked file entries (name, size, mtime_ns, sha256), or None if the file is missing
+            or malformed.
+        """
+        try:
+            with open(self.snapshot_path(solution_folder), "rb") as file:
+                data = file.read()
+        except OSError:
+            return None
+
+        try:
+            magic, version, file_count, payload_length = _HEADER.unpack_from(data, 0)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                return None
+            offset = _HEADER.size
+            entries = []
+            for _ in range(file_count):
+                (name_length,) = _NAME_LENGTH.unpack_from(data, offset)
+                offset += _NAME_LENGTH.size
+                file_name = data[offset:offset + name_length].decode("utf-8")
+                offset += name_length
+                size, mtime_ns, digest = _FILE_ENTRY.unpack_from(data, offset)
+                offset += _FILE_ENTRY.size
+                entries.append((file_name, size, mtime_ns, digest.hex()))
+            payload = data[offset:offset + payload_length]
+            if len(payload) != payload_length:
+                return None
+            solution_data = json.loads(zlib.decompress(payload).decode("utf-8"))
+        except (struct.error, zlib.error, UnicodeDecodeError, ValueError):
+            return None
+
+        return solution_data, entries
+
+    def load(self, solution_name, solution_folder):
+        """
+        Returns a Solution restored from the snapshot, or None if the snapshot is missing,
+        stale with respect to model.txt and the component files, or fails its hash check.
+        """
+        snapshot = self.read(solution_folder)
+        if snapshot is None:
+            return None
+        solution_data, entries = snapshot
+        try:
+            snapshot_mtime_ns = os.stat(self.snapshot_path(solution_folder)).st_mtime_ns
+        except OSError:
+            return None
+
+        ambiguous = set()  # Same size and mtime, but the mtime cannot rule out an edit
+        for file_name, size, mtime_ns, _ in entries:
+            try:
+                stat = os.stat(os.path.join(solution_folder, file_name))
+            except OSError:
+                return None
+            if stat.st_size != size or stat.st_mtime_ns != mtime_ns:
+                return None
+            if mtime_ns % 1_000_000_000 == 0 or mtime_ns >= snapshot_mtime_ns - RACY_WINDOW_NS:
+                ambiguous.add(file_name)
+
+        solution = Solution.from_dict(solution_data)
+        hashes = {file_name: digest for file_name, _, _, digest in entries}
+        contents = {f"{c.name}.{c.extension}": c.content for c in solution.components}
+        for file_name, digest in hashes.items():
+            actual = [sha256_text(contents[file_name])] if file_name in contents else []
+            if file_name not in contents or file_name in ambiguous:
+                try:
+                    actual.append(self._file_digest(os.path.join(solution_folder, file_name)))
+                except OSError:
+                    return None
+            if any(value != digest for value in actual):
+                print(Fore.YELLOW + f"Snapshot of '{solution_name}' does not match the hash of {file_name}, "
+                      "loading model.txt instead." + Style.RESET_ALL)
+                return None
+        if set(contents) - set(hashes):
+            print(Fore.YELLOW + f"Snapshot of '{solution_name}' has components without a recorded hash, "
+                  "loading model.txt instead." + Style.RESET_ALL)
+            return None
+
+        solution.name = solution_name
+        solution.folder = solution_folder
+        return solution
+
+    def file_hashes(self, solution_folder):
+        """
+        Returns {file name: sha256} as recorded in the snapshot, or an empty dict.
+        """
+        snapshot = self.read(solution_folder)
+        if snapshot is None:
+            return {}
+        return {file_name: digest for file_name, _, _, digest in snapshot[1]}
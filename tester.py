@@ -6,7 +6,12 @@ import os
 import argparse # Import argparse
 import datetime # Import datetime
 import re # Import re for cleaning ANSI codes
+import json
+import queue
+import socket
+import threading
 from colorama import init, Fore, Style # Import colorama
+from adaptive_timeout import AdaptiveTimeouts
 init(autoreset=True) # Initialize colorama
 
 # Constants
@@ -14,6 +19,7 @@ TIMEOUT_SECONDS = 60  # General timeout for expect operations
 AI_PROCESSING_WAIT_TIME = 20 # Increased wait time after sending feature description
 INSTALLATION_WAIT_TIME = 15 # Increased wait time after selecting install method
 EXECUTION_WAIT_TIME = 10 # Increased wait time after selecting run
+EVENT_WAIT_LIMIT = 3600 # Upper bound for one operation when waiting on main.py events
 
 # --- Argument Parsing ---
 parser_tester = argparse.ArgumentParser(description="Run AIPyCraft tester with optional looping, run ID, target solution, and correction prompt.")
@@ -22,9 +28,20 @@ parser_tester.add_argument("--run-id", type=int, default=None, help="Optional un
 parser_tester.add_argument("--solution-name", type=str, required=True, help="The name of the solution to load and test.")
 parser_tester.add_argument("--solutions-base-path", type=str, required=True, help="The absolute path to the directory containing the solution folders.") # Added argument
 parser_tester.add_argument("--correction-prompt", type=str, required=True, help="The correction instructions to provide to the AI.") # Added argument
+parser_tester.add_argument("--backend", choices=["pexpect", "session"], default="pexpect",
+                           help="'pexpect' drives the main.py menu; 'session' calls the operations in-process (see session.py).")
+parser_tester.add_argument("--events", action="store_true",
+                           help="pexpect backend: wait for the operation events of main.py (see event_stream.py) instead of fixed timeouts.")
+parser_tester.add_argument("--run-timeout", type=float, default=600,
+                           help="Passed to main.py: kill a solution run after this many seconds (0 disables, default: 600).")
+parser_tester.add_argument("--fixed-timeouts", action="store_true",
+                           help="Use the fixed timeouts instead of the ones learned from past durations (see adaptive_timeout.py), and do not record durations.")
 args_tester = parser_tester.parse_args()
 # --- End Argument Parsing ---
 
+# Timeouts of the correction and run steps, from the durations of previous runs
+timeouts = None if args_tester.fixed_timeouts else AdaptiveTimeouts()
+
 # --- Read Detailed Correction Prompt from File ---
 # CORRECTED: Look for Correcting.txt inside the specific solution folder
 correcting_prompt_filepath = os.path.join(args_tester.solutions_base_path, args_tester.solution_name, "Correcting.txt")
@@ -82,6 +99,103 @@ PROMPT_CORRECT_COMPONENT_NAME = r"Enter the name of the component to correct in
 PROMPT_CORRECT_INSTRUCTIONS = r"Enter any specific instructions for the AI \(or leave blank\):\s*"
 # Removed unused prompts like FEATURE_SELECT, FEATURE_DESC, INSTALL_SELECT, INSTALL_METHOD
 
+class EventListener:
+    """
+    Receives the JSON-lines event stream of main.py on a local TCP socket (works with
+    PopenSpawn on Windows too) and saves it next to the tester log.
+    """
+    def __init__(self, events_log_path):
+        self.server = socket.create_server(("127.0.0.1", 0))
+        self.address = f"127.0.0.1:{self.server.getsockname()[1]}"
+        self.events_log_path = events_log_path
+        self.events = queue.Queue()
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        try:
+            connection, _ = self.server.accept()
+        except OSError:
+            return
+        with connection, connection.makefile("r", encoding="utf-8") as lines, \
+                open(self.events_log_path, "w", encoding="utf-8") as events_log:
+            for line in lines:
+                events_log.write(line)
+                events_log.flush()
+                try:
+                    self.events.put(json.loads(line))
+                except ValueError:
+                    continue
+
+    def _next_finished(self, operation, timeout):
+        # The operation_finished event of `operation` received within `timeout` seconds, or None
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                event = self.events.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                return None
+            if event.get("event") == "operation_finished" and event.get("operation") == operation:
+                return event
+
+    def wait_finished(self, operation, child, limit=EVENT_WAIT_LIMIT):
+        """
+        Waits until main.py reports the next `operation` finished or shows the main menu again,
+        whichever comes first: some paths (e.g. an unknown component) emit no event. The menu
+        prompt is consumed in both cases.
+
+        Returns:
+            dict | None: The operation_finished event, or None if the menu came back without one.
+        """
+        deadline = time.monotonic() + limit
+        while time.monotonic() < deadline:
+            finished = self._next_finished(operation, 0.5)
+            if finished is not None:
+                child.expect(PROMPT_CHOICE, timeout=TIMEOUT_SECONDS)
+                return finished
+            # Raises pexpect.EOF if main.py exits meanwhile
+            if child.expect([PROMPT_CHOICE, pexpect.TIMEOUT], timeout=0.5) == 0:
+                # The event, when there is one, is emitted before the menu is printed
+                return self._next_finished(operation, 1)
+        raise pexpect.TIMEOUT(f"Neither a '{operation}' event nor the menu within {limit:.0f}s")
+
+    def close(self):
+        self.server.close()
+
+
+def wait_for_menu(child, events, operation, timeout):
+    """
+    Waits for the main menu after an operation. With events, the wait ends when main.py
+    reports the operation finished (or the menu is back) instead of relying on a padded timeout.
+
+    Unless --fixed-timeouts is given, `timeout` is replaced by the adaptive timeout of the
+    operation and the duration of the operation is added to the history it is learned from.
+
+    Returns:
+        dict | None: The operation_finished event, or None without events or when none was emitted.
+    """
+    if timeouts is not None:
+        timeout = timeouts.timeout(operation, context=f"tester run {args_tester.run_id}")
+    start = time.monotonic()
+    finished = None
+    try:
+        if events is not None:
+            finished = events.wait_finished(operation, child, timeout if timeouts is not None else EVENT_WAIT_LIMIT)
+        else:
+            child.expect(PROMPT_CHOICE, timeout=timeout)
+    except pexpect.TIMEOUT:
+        if timeouts is not None:
+            timeouts.record(operation, timeout, "TIMEOUT")
+        raise
+    if timeouts is not None:
+        if finished is not None and finished.get("cached"):
+            pass  # A replayed run takes no time: it says nothing about how long a real run needs
+        elif finished is not None:
+            timeouts.record(operation, finished.get("duration", time.monotonic() - start), finished.get("status", "SUCCESS"))
+        else:
+            timeouts.record(operation, time.monotonic() - start)
+    return finished
+
+
 def main(loop_count, run_id, solution_name_arg): # Add solution_name_arg parameter
     # --- Log File Setup ---
     log_dir = "logs"
@@ -100,6 +214,12 @@ def main(loop_count, run_id, solution_name_arg): # Add solution_name_arg paramet
     main_command_args = ""
     if run_id is not None:
         main_command_args = f" --run-id {run_id}"
+    if args_tester.run_timeout:
+        main_command_args += f" --run-timeout {args_tester.run_timeout}"
+    events = None
+    if args_tester.events:
+        events = EventListener(log_filepath[:-len(".log")] + "_events.jsonl")
+        main_command_args += f" --events-socket {events.address}"
     command = f"{python_executable} main.py{main_command_args}"
     print(Fore.LIGHTBLACK_EX + f"Running command: {command}")
     print(Fore.LIGHTBLACK_EX + f"Looping correction/run steps {loop_count} times.") # Indicate loop count
@@ -149,7 +269,7 @@ def main(loop_count, run_id, solution_name_arg): # Add solution_name_arg paramet
         child.sendline(inputs[4])
         print(Fore.MAGENTA + f"WAIT: Waiting {EXECUTION_WAIT_TIME}s for execution (Run 1)...")
         print(Fore.CYAN + "\nEXPECT: Main Menu Choice (after Run 1)")
-        child.expect(PROMPT_CHOICE, timeout=EXECUTION_WAIT_TIME + TIMEOUT_SECONDS)
+        wait_for_menu(child, events, "run", EXECUTION_WAIT_TIME + TIMEOUT_SECONDS)
 
         # --- First Correction ---
         # 5: Choose "Correct a single component"
@@ -178,7 +298,7 @@ def main(loop_count, run_id, solution_name_arg): # Add solution_name_arg paramet
         child.sendline(inputs[8])
         print(Fore.MAGENTA + f"WAIT: Waiting {AI_PROCESSING_WAIT_TIME}s for AI processing (Correct 1)...")
         print(Fore.CYAN + "\nEXPECT: Main Menu Choice (after Correct 1)")
-        child.expect(PROMPT_CHOICE, timeout=AI_PROCESSING_WAIT_TIME + TIMEOUT_SECONDS)
+        wait_for_menu(child, events, "correct_component", AI_PROCESSING_WAIT_TIME + TIMEOUT_SECONDS)
 
         # --- Second Run ---
         # 9: Choose "Run solution"
@@ -194,7 +314,7 @@ def main(loop_count, run_id, solution_name_arg): # Add solution_name_arg paramet
         child.sendline(inputs[10])
         print(Fore.MAGENTA + f"WAIT: Waiting {EXECUTION_WAIT_TIME}s for execution (Run 2)...")
         print(Fore.CYAN + "\nEXPECT: Main Menu Choice (after Run 2)")
-        child.expect(PROMPT_CHOICE, timeout=EXECUTION_WAIT_TIME + TIMEOUT_SECONDS)
+        wait_for_menu(child, events, "run", EXECUTION_WAIT_TIME + TIMEOUT_SECONDS)
 
         # --- Loop for Correction and Run ---
         for i in range(loop_count):
@@ -228,7 +348,7 @@ def main(loop_count, run_id, solution_name_arg): # Add solution_name_arg paramet
             child.sendline(inputs[14]) # Send content read from Correcting.text
             print(Fore.MAGENTA + f"WAIT: Waiting {AI_PROCESSING_WAIT_TIME}s for AI processing (Correct Loop {loop_num})...")
             print(Fore.CYAN + f"\nEXPECT: Main Menu Choice (after Correct Loop {loop_num})")
-            child.expect(PROMPT_CHOICE, timeout=AI_PROCESSING_WAIT_TIME + TIMEOUT_SECONDS)
+            wait_for_menu(child, events, "correct_component", AI_PROCESSING_WAIT_TIME + TIMEOUT_SECONDS)
 
             # --- Run (Loop Iteration {loop_num}) ---
             # 15: Choose "Run solution"
@@ -251,7 +371,17 @@ def main(loop_count, run_id, solution_name_arg): # Add solution_name_arg paramet
 
             try:
                 # Expect the main menu prompt to ensure the run cycle finished
-                child.expect(PROMPT_CHOICE, timeout=EXECUTION_WAIT_TIME + TIMEOUT_SECONDS)
+                finished = wait_for_menu(child, events, "run", EXECUTION_WAIT_TIME + TIMEOUT_SECONDS)
+                if finished is not None:
+                    # The run event carries the status, no need to scrape the output
+                    if finished.get("status") == "SUCCESS":
+                        print(Fore.GREEN + "\nSUCCESS: Run event reported status SUCCESS. Stopping loop.")
+                        log_file.write(f"\n--- Solution '{solution_name_arg}' completed successfully (Detected: '{success_pattern_string}' in run event). Stopping loop. ---\n")
+                        break
+                    print(Fore.CYAN + f"INFO: Run event reported status {finished.get('status')}: {finished.get('reason')}. Continuing loop.")
+                    log_file.write(f"\n--- Run in loop {loop_num} failed: {finished.get('reason')} ---\n")
+                    print(Fore.BLUE + f"\n--- Finished Loop Iteration {loop_num}/{loop_count} ---")
+                    continue
 
                 # Get the buffer content before the prompt
                 buffer_content = child.before
@@ -327,10 +457,29 @@ def main(loop_count, run_id, solution_name_arg): # Add solution_name_arg paramet
             print(Fore.LIGHTBLACK_EX + "Child process terminated.")
         if log_file:
             log_file.close() # Ensure log file is closed
+        if events is not None:
+            events.close()
 
     print(Fore.GREEN + f"\nTester finished successfully. Log saved to: {log_filepath}")
     return 0 # Indicate success
 
+def main_session(loop_count, run_id, solution_name_arg):
+    """
+    Same test sequence as main(), run as a scenario against the Session API instead of scraping
+    the menu (see scenario_runner.py). The tester log keeps the format of the pexpect backend,
+    so the analysis scripts read both.
+    """
+    from scenario_runner import ScenarioRunner, tester_scenario
+    print(Fore.LIGHTBLACK_EX + "Starting AIPyCraft test with the in-process session...")
+    scenario = tester_scenario(solution_name_arg, args_tester.correction_prompt, loop_count)
+    result = ScenarioRunner(args_tester.solutions_base_path, "session", timeouts=timeouts,
+                            run_timeout=args_tester.run_timeout or None).run_suite([scenario], run_id)[0]
+    if result["error"]:
+        return 1
+
+    print(Fore.GREEN + f"\nTester finished successfully. Log saved to: {result['log']}")
+    return 0
+
 # (Argument parsing moved to the top)
 
 if __name__ == "__main__":
@@ -341,4 +490,6 @@ if __name__ == "__main__":
         sys.exit(1)
 
     # Pass loop count, run_id, and solution_name to main
+    if args_tester.backend == "session":
+        sys.exit(main_session(args_tester.loops, args_tester.run_id, args_tester.solution_name))
     sys.exit(main(args_tester.loops, args_tester.run_id, args_tester.solution_name))
@@ -0,0 +1,234 @@
+# trial_orchestrator.py
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from colorama import Fore, Style, init
+from file_utils import atomic_write
+from workspace_snapshot import WorkspaceSnapshot
+
+init(autoreset=True)
+
+STATE_FILE = "trials.json"
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+def initial_state(solution_folder):
+    """
+    Returns the file overrides giving the known starting state of the experiment: an empty
+    config.toml (what initialization.ps1 does for the sequential runs).
+    """
+    config_path = os.path.join(solution_folder, "config.toml")
+    if not os.path.isfile(config_path):
+        print(Fore.YELLOW + f"Warning: Configuration file '{config_path}' not found. Skipping clearing.")
+        return {}
+    return {"config.toml": b""}
+
+
+class TrialOrchestrator:
+    """
+    Runs tester.py trials of an experiment concurrently.
+
+    The starting state of the solution is captured once as a snapshot (see workspace_snapshot.py)
+    and each trial runs in its own working copy of it with a distinct run id, so the tester and
+    main.py logs of concurrent trials never collide. The state of every trial is
+    kept in <experiment folder>/trials.json: running the same experiment again skips the
+    finished trials and runs again the failed ones and those an interruption left unfinished.
+    """
+
+    def __init__(self, experiment_folder, solution_name, solutions_base_path, correction_prompt, trials, loops=1,
+                 parallel=None, first_run_id=1, backend="pexpect", initialize=True, run_timeout=600):
+        self.experiment_folder = os.path.abspath(experiment_folder)
+        self.state_path = os.path.join(self.experiment_folder, STATE_FILE)
+        self.config = {
+            "solution_name": solution_name,
+            "solutions_base_path": os.path.abspath(solutions_base_path),
+            "correction_prompt": correction_prompt,
+            "loops": loops,
+            "backend": backend,
+            "first_run_id": first_run_id,
+        }
+        self.trials = trials
+        self.parallel = parallel or min(4, trials)
+        self.initialize = initialize
+        self.run_timeout = run_timeout  # Seconds per solution run passed to tester.py, 0 for no limit
+        self.lock = threading.Lock()
+        self.state = None
+        # Snapshots are shared by the experiments stored next to this one
+        self.snapshots = WorkspaceSnapshot(os.path.join(os.path.dirname(self.experiment_folder), ".snapshots"))
+        self.snapshot_id = None
+
+    def load_state(self):
+        """
+        Reads the experiment state, or starts a new one. A state written for different
+        experiment settings is not resumed.
+        """
+        state = None
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            pass
+        if state is not None and state.get("config") != self.config:
+            raise ValueError(f"{self.state_path} belongs to an experiment with different settings; "
+                             "use another --experiment-folder or delete it.")
+        if state is None:
+            state = {"config": self.config, "trials": {}}
+        for trial in range(1, self.trials + 1):
+            entry = state["trials"].setdefault(str(trial), {"run_id": self.config["first_run_id"] + trial - 1})
+            if entry.get("status") == "running":  # Interrupted: restart it
+                entry["status"] = "pending"
+            entry.setdefault("status", "pending")
+        self.state = state
+        self.save_state()
+        return state
+
+    def save_state(self):
+        # Written under the lock too: otherwise an older state could be renamed over a newer one
+        with self.lock:
+            atomic_write(self.state_path, json.dumps(self.state, indent=2).encode("utf-8"))
+
+    def update(self, trial, **fields):
+        with self.lock:
+            self.state["trials"][str(trial)].update(fields)
+        self.save_state()
+
+    def tester_command(self, trial_folder, run_id):
+        return [
+            sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "tester.py"),
+            "--loops", str(self.config["loops"]),
+            "--run-id", str(run_id),
+            "--solution-name", self.config["solution_name"],
+            "--solutions-base-path", trial_folder,
+            "--correction-prompt", self.config["correction_prompt"],
+            "--backend", self.config["backend"],
+            "--run-timeout", str(self.run_timeout),
+        ]
+
+    def run_trial(self, trial):
+        """
+        Materializes the starting snapshot and tests one trial. The tester console output goes to trial_<n>.out.
+
+        Returns:
+            tuple[int, int, float]: Trial number, tester exit code and duration in seconds.
+        """
+        run_id = self.state["trials"][str(trial)]["run_id"]
+        trial_folder = os.path.join(self.experiment_folder, f"trial_{trial}")
+        start = time.time()
+        self.update(trial, status="running", started_at=start)
+        try:
+            self.snapshots.materialize(self.snapshot_id, os.path.join(trial_folder, self.config["solution_name"]))
+            with open(os.path.join(self.experiment_folder, f"trial_{trial}.out"), "w", encoding="utf-8") as output:
+                # tester.py starts main.py from the current directory and writes to logs/ there
+                returncode = subprocess.run(self.tester_command(trial_folder, run_id), stdout=output,
+                                            stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                                            cwd=os.path.dirname(os.path.abspath(__file__))).returncode
+        except OSError as e:
+            print(Fore.RED + f"Trial {trial} could not be prepared: {e}")
+            returncode = -1
+        duration = time.time() - start
+        self.update(trial, status="done" if returncode == 0 else "failed", exit_code=returncode,
+                    finished_at=time.time(), duration=duration)
+        return trial, returncode, duration
+
+    def progress(self, started_at, completed_now):
+        """
+        Returns the progress line: finished trials, failures and the estimated remaining time.
+        """
+        entries = list(self.state["trials"].values())
+        finished = [e for e in entries if e["status"] in ("done", "failed")]
+        failed = sum(e["status"] == "failed" for e in finished)
+        remaining = self.trials - len(finished)
+        if completed_now:
+            # Throughput of this session, which accounts for the parallelism actually achieved
+            eta = (time.time() - started_at) / completed_now * remaining
+        else:
+            eta = None
+        line = f"[{len(finished)}/{self.trials}] {failed} failed"
+        if remaining and eta is not None:
+            line += f", ETA {format_duration(eta)}"
+        return line
+
+    def run(self):
+        """
+        Runs the pending trials with at most `parallel` trials at a time.
+
+        Returns:
+            dict: The final experiment state.
+        """
+        os.makedirs(self.experiment_folder, exist_ok=True)
+        self.load_state()
+        # A resumed experiment restarts its trials from the state captured when it began
+        self.snapshot_id = self.state.get("snapshot")
+        if self.snapshot_id is None:
+            source = os.path.join(self.config["solutions_base_path"], self.config["solution_name"])
+            self.snapshot_id = self.snapshots.capture(source, initial_state(source) if self.initialize else None)
+            with self.lock:
+                self.state["snapshot"] = self.snapshot_id
+            self.save_state()
+        pending = [int(t) for t, e in self.state["trials"].items() if e["status"] != "done" and int(t) <= self.trials]
+        skipped = self.trials - len(pending)
+        print(Fore.LIGHTBLACK_EX + f"Experiment folder: {self.experiment_folder}")
+        print(Fore.CYAN + f"{len(pending)} trial(s) to run, {skipped} already done, {self.parallel} in parallel.")
+        started_at = time.time()
+        completed_now = 0
+        with ThreadPoolExecutor(max_workers=self.parallel) as executor:
+            futures = [executor.submit(self.run_trial, trial) for trial in sorted(pending)]
+            try:
+                for future in as_completed(futures):
+                    trial, returncode, duration = future.result()
+                    completed_now += 1
+                    color = Fore.GREEN if returncode == 0 else Fore.LIGHTRED_EX
+                    print(color + f"Trial {trial} finished with exit code {returncode} in {format_duration(duration)}. "
+                          + Style.RESET_ALL + self.progress(started_at, completed_now))
+            except KeyboardInterrupt:
+                for future in futures:
+                    future.cancel()
+                print(Fore.YELLOW + "Interrupted. Run the same command again to resume the unfinished trials.")
+                raise
+        print(Fore.GREEN + f"All {self.trials} trials completed in {format_duration(time.time() - started_at)}.")
+        return self.state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run tester.py trials concurrently, each in an isolated copy of the solution.")
+    parser.add_argument("--trials", type=int, required=True, help="Number of trials of the experiment.")
+    parser.add_argument("--loops", type=int, default=1, help="Value of --loops passed to tester.py.")
+    parser.add_argument("--solution-name", required=True, help="The name of the solution to test.")
+    parser.add_argument("--solutions-base-path", required=True, help="The directory containing the solution folders.")
+    parser.add_argument("--correction-prompt", required=True, help="The correction instructions to provide to the AI.")
+    parser.add_argument("--parallel", type=int, default=None, help="Number of trials run at the same time (default: min(4, trials)).")
+    parser.add_argument("--first-run-id", type=int, default=1, help="Run id of the first trial; trial n uses first + n - 1.")
+    parser.add_argument("--backend", choices=["pexpect", "session"], default="pexpect", help="tester.py backend.")
+    parser.add_argument("--experiment-folder", default=None,
+                        help="Folder of the trial copies, outputs and state (default: trials/<solution name>). Reuse it to resume.")
+    parser.add_argument("--no-init", action="store_true", help="Do not clear config.toml in the trial copies.")
+    parser.add_argument("--run-timeout", type=float, default=600, help="Seconds a solution run may take in a trial (0 disables, default: 600).")
+    args = parser.parse_args()
+
+    if args.trials < 1 or args.loops < 1:
+        parser.error("--trials and --loops must be at least 1")
+    orchestrator = TrialOrchestrator(
+        args.experiment_folder or os.path.join("trials", args.solution_name), args.solution_name,
+        args.solutions_base_path, args.correction_prompt, args.trials, args.loops, args.parallel,
+        args.first_run_id, args.backend, initialize=not args.no_init, run_timeout=args.run_timeout,
+    )
+    try:
+        state = orchestrator.run()
+    except ValueError as e:
+        print(Fore.RED + f"Error: {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    sys.exit(1 if any(e["status"] == "failed" for e in state["trials"].values()) else 0)
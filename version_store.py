@@ -0,0 +1,218 @@
+# version_store.py
+
+import argparse
+import difflib
+import json
+import os
+import zlib
+from datetime import datetime
+from colorama import Fore, Style
+from file_utils import atomic_write, sha256_bytes
+
+STORE_DIR = os.path.join(".aipycraft", "versions")
+INDEX_FILE = "index.json"
+
+
+class VersionStore:
+    """
+    Content-addressed revision store for the component files of one solution.
+
+    Blobs are stored once per distinct content under objects/<hash[:2]>/<hash>.
+    index.json keeps, per component file, the ordered list of revisions and a pointer
+    to the current one, plus the list of correction steps and the files each step
+    changed. Component files are written by ComponentPersistence; rollbacks replace
+    them through a temp file and a rename.
+    """
+
+    def __init__(self, solution_folder):
+        self.solution_folder = solution_folder
+        self.store_folder = os.path.join(solution_folder, STORE_DIR)
+        self.objects_folder = os.path.join(self.store_folder, "objects")
+        self.index_path = os.path.join(self.store_folder, INDEX_FILE)
+        self.index = self._load_index()
+        self.current_step = None
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {"components": {}, "steps": []}
+
+    def save(self):
+        atomic_write(self.index_path, json.dumps(self.index, indent=2).encode("utf-8"))
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_folder, digest[:2], digest)
+
+    def _put_blob(self, data):
+        digest = sha256_bytes(data)
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            atomic_write(object_path, zlib.compress(data), fsync=False)
+        return digest
+
+    def _get_blob(self, digest):
+        with open(self._object_path(digest), "rb") as file:
+            return zlib.decompress(file.read())
+
+    def _component_entry(self, file_name):
+        return self.index["components"].setdefault(file_name, {"revisions": [], "current": -1})
+
+    def _append_revision(self, file_name, digest, step):
+        entry = self._component_entry(file_name)
+        if entry["revisions"] and entry["revisions"][entry["current"]]["hash"] == digest:
+            return entry["current"]
+        entry["revisions"].append({
+            "hash": digest,
+            "step": step,
+            "timestamp": datetime.now().isoformat(),
+        })
+        entry["current"] = len(entry["revisions"]) - 1
+        return entry["current"]
+
+    def begin_step(self, label):
+        """
+        Starts a new correction step. Writes made until the next call are grouped under it.
+
+        Returns:
+            int: The step id.
+        """
+        step_id = len(self.index["steps"])
+        self.index["steps"].append({
+            "id": step_id,
+            "label": label,
+            "timestamp": datetime.now().isoformat(),
+            "changes": {},
+        })
+        self.current_step = step_id
+        self.save()
+        return step_id
+
+    def record(self, file_name, content, capture_disk=True, save_index=True):
+        """
+        Records a new revision of a component file. Writing the file itself is left to
+        ComponentPersistence.
+
+        If the content on disk differs from the current revision (first tracked write,
+        or an edit made outside the store) it is recorded first, so the AI edit that
+        overwrites it can always be rolled back.
+
+        Returns:
+            int: The index of the current revision of the file.
+        """
+        file_path = os.path.join(self.solution_folder, file_name)
+        entry = self._component_entry(file_name)
+        if capture_disk and os.path.exists(file_path):
+            with open(file_path, "rb") as file:
+                self._append_revision(file_name, self._put_blob(file.read()), None)
+
+        previous = entry["revisions"][entry["current"]]["hash"] if entry["revisions"] else None
+        revision = self._append_revision(file_name, self._put_blob(content.encode("utf-8")), self.current_step)
+        if self.current_step is not None and entry["revisions"][revision]["hash"] != previous:
+            changes = self.index["steps"][self.current_step]["changes"]
+            changes.setdefault(file_name, {"before": previous})["after"] = entry["revisions"][revision]["hash"]
+
+        if save_index:
+            self.save()
+        return revision
+
+    def history(self, file_name):
+        """
+        Returns the list of revisions recorded for a component file.
+        """
+        return list(self.index["components"].get(file_name, {}).get("revisions", []))
+
+    def read_revision(self, file_name, revision):
+        """
+        Returns the content of a revision (negative indexes count from the end).
+        """
+        revisions = self.index["components"][file_name]["revisions"]
+        return self._get_blob(revisions[revision]["hash"]).decode("utf-8")
+
+    def rollback(self, file_name, revision=None):
+        """
+        Restores a component file to a given revision, by default the one before the current.
+
+        Returns:
+            str: The restored content.
+        """
+        entry = self.index["components"].get(file_name)
+        if not entry or not entry["revisions"]:
+            raise KeyError(f"No revisions recorded for '{file_name}'.")
+        if revision is None:
+            revision = entry["current"] - 1
+        if revision < 0:
+            revision += len(entry["revisions"])
+        if not 0 <= revision < len(entry["revisions"]):
+            raise IndexError(f"Revision {revision} does not exist for '{file_name}'.")
+
+        data = self._get_blob(entry["revisions"][revision]["hash"])
+        atomic_write(os.path.join(self.solution_folder, file_name), data)
+        entry["current"] = revision
+        self.save()
+        return data.decode("utf-8")
+
+    def rollback_step(self, step_id):
+        """
+        Restores every file changed by a correction step to its content before that step.
+
+        Returns:
+            dict[str, str]: The restored content per file name.
+        """
+        restored = {}
+        for file_name, change in self.index["steps"][step_id]["changes"].items():
+            if change["before"] is None:
+                continue
+            revisions = self.index["components"][file_name]["revisions"]
+            revision = next(i for i, r in enumerate(revisions) if r["hash"] == change["before"])
+            restored[file_name] = self.rollback(file_name, revision)
+        return restored
+
+    def diff(self, file_name, revision_a=-2, revision_b=-1):
+        """
+        Returns a unified diff between two revisions of a component file.
+        """
+        content_a = self.read_revision(file_name, revision_a).splitlines(keepends=True)
+        content_b = self.read_revision(file_name, revision_b).splitlines(keepends=True)
+        return "".join(difflib.unified_diff(
+            content_a, content_b,
+            fromfile=f"{file_name}@{revision_a}", tofile=f"{file_name}@{revision_b}"
+        ))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or roll back component revisions of a solution.")
+    parser.add_argument("solution_folder", help="Path to the solution folder.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    history_parser = subparsers.add_parser("history", help="List the revisions of a component file.")
+    history_parser.add_argument("file_name")
+    diff_parser = subparsers.add_parser("diff", help="Show the diff between two revisions.")
+    diff_parser.add_argument("file_name")
+    diff_parser.add_argument("revision_a", type=int, nargs="?", default=-2)
+    diff_parser.add_argument("revision_b", type=int, nargs="?", default=-1)
+    rollback_parser = subparsers.add_parser("rollback", help="Restore a component file to a revision.")
+    rollback_parser.add_argument("file_name")
+    rollback_parser.add_argument("revision", type=int, nargs="?", default=None)
+    step_parser = subparsers.add_parser("rollback-step", help="Undo every change made by a correction step.")
+    step_parser.add_argument("step_id", type=int)
+    subparsers.add_parser("steps", help="List the recorded correction steps.")
+    args = parser.parse_args()
+
+    store = VersionStore(args.solution_folder)
+    if args.command == "history":
+        current = store.index["components"].get(args.file_name, {}).get("current", -1)
+        for i, revision in enumerate(store.history(args.file_name)):
+            marker = "*" if i == current else " "
+            print(f"{marker} {i}: {revision['hash'][:12]} step={revision['step']} {revision['timestamp']}")
+    elif args.command == "diff":
+        print(store.diff(args.file_name, args.revision_a, args.revision_b))
+    elif args.command == "rollback":
+        store.rollback(args.file_name, args.revision)
+        print(Fore.GREEN + f"Restored {args.file_name}." + Style.RESET_ALL)
+    elif args.command == "rollback-step":
+        restored = store.rollback_step(args.step_id)
+        print(Fore.GREEN + f"Restored: {', '.join(restored) or 'nothing'}." + Style.RESET_ALL)
+    elif args.command == "steps":
+        for step in store.index["steps"]:
+            print(f"{step['id']}: {step['label']} ({step['timestamp']}) -> {', '.join(step['changes']) or 'no changes'}")
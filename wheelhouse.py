@@ -0,0 +1,199 @@
+# wheelhouse.py
+
+import argparse
+import glob
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from colorama import Fore, Style
+from packaging.version import InvalidVersion, Version
+from environment_store import EnvironmentStore, normalize_requirement, read_requirements
+from incremental_installer import canonical_name
+
+
+def normalize_version(version):
+    """
+    Returns a PEP 440 Version, so that 1.0 and 1.0.0 compare equal; the text itself if it is not valid.
+    """
+    try:
+        return Version(version)
+    except InvalidVersion:
+        return version
+
+
+def default_wheelhouse():
+    """
+    Returns the wheelhouse configured through the AIPYCRAFT_WHEELHOUSE environment variable, or None.
+    """
+    return os.getenv("AIPYCRAFT_WHEELHOUSE") or None
+
+
+class Wheelhouse:
+    """
+    Local wheel directory used to install solution environments without network access.
+
+    populate() downloads or builds wheels once (on a machine with PyPI access); verify()
+    checks that every requirement and its dependencies can be installed from the folder
+    alone before any environment is touched; install() is an EnvironmentStore installer
+    running pip with --no-index --find-links.
+    """
+
+    def __init__(self, folder, python=None):
+        self.folder = os.path.abspath(folder)
+        self.python = python or sys.executable
+
+    def distributions(self):
+        """
+        Returns {canonical name: set of normalized versions} for the wheels and sdists in the folder.
+        """
+        found = {}
+        for path in glob.glob(os.path.join(self.folder, "*")):
+            file_name = os.path.basename(path)
+            if file_name.endswith(".whl"):
+                parts = file_name[:-4].split("-")
+            else:
+                match = re.match(r"^(.+)-([0-9][^-]*)\.(tar\.gz|zip|tar\.bz2)$", file_name)
+                if not match:
+                    continue
+                parts = [match.group(1), match.group(2)]
+            if len(parts) >= 2:
+                found.setdefault(canonical_name(parts[0]), set()).add(normalize_version(parts[1]))
+        return found
+
+    def missing(self, requirements):
+        """
+        Returns the requirements with no matching file in the wheelhouse. Pinned (==)
+        requirements need the exact version (compared as PEP 440 versions); other specifiers
+        are left to pip.
+        """
+        available = self.distributions()
+        missing = []
+        for requirement in requirements:
+            requirement = normalize_requirement(requirement)
+            if not requirement:
+                continue
+            match = re.match(r"^([a-z0-9][a-z0-9-]*)(\[[^\]]*\])?(==([^,;]+))?", requirement)
+            if not match:
+                continue
+            versions = available.get(match.group(1), set())
+            if not versions or (match.group(4) and normalize_version(match.group(4).strip()) not in versions):
+                missing.append(requirement)
+        return missing
+
+    def verify(self, requirements):
+        """
+        Checks up front that the requirements, including their dependencies, resolve from the wheelhouse.
+
+        Returns:
+            tuple[bool, str]: Whether the install can succeed offline and a description of the problem.
+        """
+        requirements = [r for r in map(normalize_requirement, requirements) if r]
+        missing = self.missing(requirements)
+        if missing:
+            return False, f"Not in the wheelhouse: {', '.join(missing)}"
+        if not requirements:
+            return True, ""
+        # A dry run resolves the full dependency tree without installing anything
+        result = subprocess.run(
+            [self.python, "-m", "pip", "install", "--dry-run", "--ignore-installed", "--quiet",
+             "--no-index", "--find-links", self.folder, *requirements],
+            capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            return False, result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "pip dry run failed"
+        return True, ""
+
+    def populate(self, requirements):
+        """
+        Builds or downloads wheels for the requirements (and their dependencies) not yet in the folder.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        requirements = [r for r in map(normalize_requirement, requirements) if r]
+        needed = self.missing(requirements)
+        if not needed:
+            return []
+        subprocess.run([self.python, "-m", "pip", "wheel", "--wheel-dir", self.folder, *needed], check=True)
+        return needed
+
+    def install(self, python_exe, requirements):
+        clean_env = os.environ.copy()
+        clean_env.pop('PYTHONPATH', None)
+        result = subprocess.run(
+            [python_exe, "-m", "pip", "install", "--no-index", "--find-links", self.folder, *requirements],
+            env=clean_env, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            print(f"{Fore.RED}Offline pip install failed with return code {result.returncode}{Style.RESET_ALL}")
+            print(f"{Fore.RED}{result.stderr}{Style.RESET_ALL}")
+            raise subprocess.CalledProcessError(result.returncode, result.args, result.stdout, result.stderr)
+
+
+def install_solutions(solutions_folder, solution_names, wheelhouse=None, jobs=None):
+    """
+    Installs the environments of several solutions in parallel from their requirements.txt.
+
+    Solutions with the same requirements share one environment; the store's per-environment
+    lock keeps concurrent builds of it from clashing.
+
+    Returns:
+        dict: {solution name: error message or None}
+    """
+    installer = wheelhouse.install if wheelhouse else None
+    store = EnvironmentStore(solutions_folder, installer=installer)
+
+    def install_one(name):
+        solution_directory = os.path.join(solutions_folder, name)
+        requirements = read_requirements(os.path.join(solution_directory, "requirements.txt"))
+        if wheelhouse:
+            ok, problem = wheelhouse.verify(requirements)
+            if not ok:
+                return name, problem
+        try:
+            store.link(solution_directory, store.ensure(requirements))
+            return name, None
+        except (OSError, subprocess.CalledProcessError) as e:
+            return name, str(e)
+
+    with ThreadPoolExecutor(max_workers=jobs or min(4, os.cpu_count() or 1)) as executor:
+        return dict(executor.map(install_one, solution_names))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline wheelhouse for solution environments.")
+    parser.add_argument("command", choices=["populate", "verify", "install"])
+    parser.add_argument("solutions_folder", help="Path to the solutions folder.")
+    parser.add_argument("solutions", nargs="*", help="Solution names (default: every solution with a requirements.txt).")
+    parser.add_argument("--wheelhouse", default=default_wheelhouse(), help="Wheel folder (default: $AIPYCRAFT_WHEELHOUSE).")
+    parser.add_argument("--jobs", type=int, default=None, help="Number of solutions installed in parallel.")
+    args = parser.parse_args()
+
+    names = args.solutions or sorted(
+        name for name in os.listdir(args.solutions_folder)
+        if os.path.isfile(os.path.join(args.solutions_folder, name, "requirements.txt"))
+    )
+    wheelhouse = Wheelhouse(args.wheelhouse) if args.wheelhouse else None
+    if wheelhouse is None and args.command != "install":
+        parser.error("--wheelhouse or AIPYCRAFT_WHEELHOUSE is required")
+
+    start = time.perf_counter()
+    failures = 0
+    if args.command == "install":
+        for name, error in install_solutions(args.solutions_folder, names, wheelhouse, args.jobs).items():
+            failures += error is not None
+            color = Fore.GREEN if error is None else Fore.LIGHTRED_EX
+            print(color + f"- {name}: {error or 'installed'}" + Style.RESET_ALL)
+    else:
+        for name in names:
+            requirements = read_requirements(os.path.join(args.solutions_folder, name, "requirements.txt"))
+            if args.command == "populate":
+                added = wheelhouse.populate(requirements)
+                print(Fore.GREEN + f"- {name}: {len(added)} requirement(s) added to the wheelhouse" + Style.RESET_ALL)
+            else:
+                ok, problem = wheelhouse.verify(requirements)
+                failures += not ok
+                print((Fore.GREEN if ok else Fore.LIGHTRED_EX) + f"- {name}: {'OK' if ok else problem}" + Style.RESET_ALL)
+    print(Style.DIM + f"{args.command} finished in {time.perf_counter() - start:.1f}s" + Style.RESET_ALL)
+    sys.exit(1 if failures else 0)
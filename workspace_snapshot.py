@@ -0,0 +1,234 @@
+# workspace_snapshot.py
+
+import argparse
+import json
+import os
+import shutil
+import stat
+import sys
+import time
+from colorama import Fore, Style
+from file_utils import atomic_write, sha256_bytes, sha256_file
+
+SNAPSHOT_STORE = ".aipycraft_snapshots"
+# Runtime state and environments: never captured, environments are linked instead
+EXCLUDED = {".aipycraft", "__pycache__", "venv", "conda_env"}
+SHARED_FOLDERS = ("venv", "conda_env")
+FICLONE = 0x40049409  # Linux ioctl cloning a file's extents (btrfs, XFS, ...)
+
+
+def reflink(source, destination):
+    """
+    Creates destination as a copy-on-write clone of source. Raises OSError where the
+    platform or filesystem does not support it.
+    """
+    if not sys.platform.startswith("linux"):
+        raise OSError("reflinks are only used on Linux")
+    import fcntl
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.remove(destination)
+            raise
+
+
+def reflink_or_copy(source, destination):
+    """
+    Copies a file with its metadata (as shutil.copy2), as a reflink where supported: a
+    copy_function for shutil.copytree whose copies never share data written in place.
+
+    Returns:
+        str: 'reflink' or 'copy'.
+    """
+    try:
+        reflink(source, destination)
+        shutil.copystat(source, destination)
+        return "reflink"
+    except OSError:
+        shutil.copy2(source, destination)
+        return "copy"
+
+
+class WorkspaceSnapshot:
+    """
+    Content-addressed snapshots of solution folders, materialized as cheap working copies.
+
+    capture() stores each file once under blobs/ (keyed by its SHA-256, read-only) and
+    writes a manifest; identical files and identical snapshots are stored only once.
+    materialize() rebuilds a writable folder from a manifest with reflinks (independent
+    copies sharing extents until written, on btrfs and XFS), else plain copies. Hardlinks
+    to the blobs are only used on request, for read-only working copies: an in-place write
+    would go through the link and change the blob, the snapshot and every other copy.
+    The venv is not part of the snapshot: working copies link to the original one.
+    """
+
+    def __init__(self, store_folder):
+        self.store_folder = os.path.abspath(store_folder)
+        self.blobs_folder = os.path.join(self.store_folder, "blobs")
+        self.manifests_folder = os.path.join(self.store_folder, "snapshots")
+
+    def blob_path(self, digest):
+        return os.path.join(self.blobs_folder, digest[:2], digest)
+
+    def manifest_path(self, snapshot_id):
+        return os.path.join(self.manifests_folder, snapshot_id + ".json")
+
+    def _store_blob(self, digest, source=None, data=None):
+        blob_path = self.blob_path(digest)
+        if os.path.exists(blob_path):
+            return False
+        if data is None:
+            with open(source, "rb") as file:
+                data = file.read()
+        atomic_write(blob_path, data, fsync=False)
+        os.chmod(blob_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        return True
+
+    def capture(self, solution_folder, overrides=None):
+        """
+        Captures the files of a solution folder.
+
+        Args:
+            solution_folder (str): Folder to capture.
+            overrides (dict, optional): {relative path: bytes} replacing or adding files in the
+                snapshot, e.g. an empty config.toml for the starting state of an experiment.
+
+        Returns:
+            str: The snapshot id (hash of the manifest).
+        """
+        solution_folder = os.path.abspath(solution_folder)
+        files = {}
+        stored = 0
+        for root, folders, file_names in os.walk(solution_folder):
+            folders[:] = sorted(f for f in folders if f not in EXCLUDED)
+            for file_name in file_names:
+                path = os.path.join(root, file_name)
+                if os.path.islink(path):
+                    continue
+                relative = os.path.relpath(path, solution_folder).replace(os.sep, "/")
+                digest = sha256_file(path)
+                stored += self._store_blob(digest, source=path)
+                files[relative] = {"sha256": digest, "mode": stat.S_IMODE(os.stat(path).st_mode)}
+        for relative, data in (overrides or {}).items():
+            digest = sha256_bytes(data)
+            stored += self._store_blob(digest, data=data)
+            files[relative] = {"sha256": digest, "mode": files.get(relative, {}).get("mode", 0o644)}
+
+        shared = {name: os.path.realpath(os.path.join(solution_folder, name))
+                  for name in SHARED_FOLDERS if os.path.exists(os.path.join(solution_folder, name))}
+        manifest = {"files": dict(sorted(files.items())), "shared": shared}
+        payload = json.dumps(manifest, sort_keys=True).encode("utf-8")
+        snapshot_id = sha256_bytes(payload)[:16]
+        if not os.path.exists(self.manifest_path(snapshot_id)):
+            manifest.update({"source": solution_folder, "created_at": time.time()})
+            atomic_write(self.manifest_path(snapshot_id), json.dumps(manifest, indent=2).encode("utf-8"))
+        print(Style.DIM + f"Snapshot {snapshot_id}: {len(files)} file(s), {stored} new blob(s)." + Style.RESET_ALL)
+        return snapshot_id
+
+    def manifest(self, snapshot_id):
+        with open(self.manifest_path(snapshot_id), "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def materialize(self, snapshot_id, destination, method="auto"):
+        """
+        Builds a working copy of a snapshot in destination (replacing what is there).
+
+        Args:
+            method (str): 'auto' (reflink, else copy), 'copy', or 'hardlink' for a read-only
+                working copy sharing the blobs (falls back to copies where links fail).
+
+        Returns:
+            dict: Number of files created per method.
+        """
+        manifest = self.manifest(snapshot_id)
+        if os.path.lexists(destination):
+            shutil.rmtree(destination)
+        os.makedirs(destination)
+        counts = {"reflink": 0, "hardlink": 0, "copy": 0}
+        for relative, entry in manifest["files"].items():
+            blob_path = self.blob_path(entry["sha256"])
+            path = os.path.join(destination, *relative.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Working copies are written by the trials, whatever the mode of the captured file
+            mode = entry["mode"] | stat.S_IWUSR
+            used = None
+            if method == "auto":
+                try:
+                    reflink(blob_path, path)
+                    os.chmod(path, mode)
+                    used = "reflink"
+                except OSError:
+                    pass
+            elif method == "hardlink":
+                try:
+                    os.link(blob_path, path)
+                    used = "hardlink"  # Keeps the blob's read-only mode
+                except OSError:
+                    pass
+            if used is None:
+                shutil.copyfile(blob_path, path)
+                os.chmod(path, mode)
+                used = "copy"
+            counts[used] += 1
+        for name, target in manifest.get("shared", {}).items():
+            if not os.path.isdir(target):
+                continue
+            try:
+                os.symlink(target, os.path.join(destination, name), target_is_directory=True)
+            except (OSError, NotImplementedError):
+                # No symlink privilege (Windows): copy it, keeping its own links
+                shutil.copytree(target, os.path.join(destination, name), symlinks=True)
+        return counts
+
+    def snapshots(self):
+        """
+        Returns (snapshot id, manifest) of every stored snapshot.
+        """
+        if not os.path.isdir(self.manifests_folder):
+            return []
+        return [(name[:-5], self.manifest(name[:-5])) for name in sorted(os.listdir(self.manifests_folder))
+                if name.endswith(".json")]
+
+    def verify(self, snapshot_id):
+        """
+        Returns the files of a snapshot whose blob is missing or no longer matches its hash,
+        e.g. after something wrote in place through a hardlinked working copy.
+        """
+        damaged = []
+        for relative, entry in self.manifest(snapshot_id)["files"].items():
+            blob_path = self.blob_path(entry["sha256"])
+            if not os.path.exists(blob_path) or sha256_file(blob_path) != entry["sha256"]:
+                damaged.append(relative)
+        return damaged
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Capture and materialize solution folder snapshots.")
+    parser.add_argument("command", choices=["capture", "materialize", "list", "verify"])
+    parser.add_argument("paths", nargs="*", help="capture: <solution folder>; materialize: <snapshot id> <destination>; verify: <snapshot id>.")
+    parser.add_argument("--store", default=SNAPSHOT_STORE, help=f"Snapshot store folder (default: {SNAPSHOT_STORE}).")
+    parser.add_argument("--copy", action="store_true", help="materialize: plain copies instead of reflinks.")
+    parser.add_argument("--hardlink", action="store_true", help="materialize: read-only working copy hardlinked to the blobs.")
+    args = parser.parse_args()
+
+    store = WorkspaceSnapshot(args.store)
+    expected = {"capture": 1, "materialize": 2, "list": 0, "verify": 1}[args.command]
+    if len(args.paths) != expected:
+        parser.error(f"{args.command} takes {expected} path argument(s)")
+    if args.command == "capture":
+        print(store.capture(args.paths[0]))
+    elif args.command == "materialize":
+        start = time.perf_counter()
+        counts = store.materialize(args.paths[0], args.paths[1], "copy" if args.copy else "hardlink" if args.hardlink else "auto")
+        summary = ", ".join(f"{count} {method}" for method, count in counts.items() if count)
+        print(Fore.GREEN + f"Materialized {args.paths[0]} in {args.paths[1]} ({summary or 'no files'}) "
+              f"in {time.perf_counter() - start:.3f}s." + Style.RESET_ALL)
+    elif args.command == "list":
+        for snapshot_id, manifest in store.snapshots():
+            print(Fore.GREEN + f"- {snapshot_id}: {len(manifest['files'])} file(s) from {manifest.get('source', '?')}" + Style.RESET_ALL)
+    else:
+        damaged = store.verify(args.paths[0])
+        print((Fore.LIGHTRED_EX if damaged else Fore.GREEN) + (f"Damaged: {', '.join(damaged)}" if damaged else "OK") + Style.RESET_ALL)
+        sys.exit(1 if damaged else 0)